@@ -1,46 +1,156 @@
+"""
+PlanVenture API 應用程式
+以 create_app() 建立應用程式；各子系統依設定啟用，且在啟用時才導入，
+讓 CLI 腳本與 worker 只負擔實際需要的啟動成本
+"""
 
-from flask import Flask, jsonify
-from flask_cors import CORS
-from flasgger import Swagger
+from flask import Flask, jsonify, request
 import os
-from models import db  # 導入我們的 db 實例
-from routes.auth import auth_bp
-from routes.protected import protected_bp
-from config.swagger_config import SWAGGER_CONFIG, SWAGGER_TEMPLATE
-from config.cors_config import get_cors_config
 
-app = Flask(__name__)
-app.config['SWAGGER'] = {
-  'uiversion': 3,
-  'swagger_ui': True,
-  'specs_route': '/apidocs/'
-}
+# 可選的子系統 (config['SUBSYSTEMS'])，預設全部啟用
+#   cors     - Flask-CORS
+#   api      - 認證、行程等路由 (含一般端點)
+#   metrics  - /metrics 端點與連線池統計
+#   docs     - OpenAPI 規格與 Swagger UI (依 SWAGGER_UI 設定)
+#   denylist - 背景載入 token 撤銷清單
+#   compression - gzip/brotli 回應壓縮
+ALL_SUBSYSTEMS = ('cors', 'api', 'metrics', 'docs', 'denylist', 'compression')
 
-# CORS 配置 - 針對 React 前端優化
-CORS(app, **get_cors_config())
+def create_app(config=None):
+    """
+    建立並設定 Flask 應用程式
+
+    config 為覆寫預設值的設定 dict；SUBSYSTEMS 指定要啟用的子系統，
+    例如 CLI 腳本只需要資料庫時可傳入 {'SUBSYSTEMS': ()}
+    """
+    config = dict(config or {})
+    subsystems = set(config.pop('SUBSYSTEMS', ALL_SUBSYSTEMS))
+    unknown = subsystems - set(ALL_SUBSYSTEMS)
+    if unknown:
+        raise ValueError(f"Unknown subsystems: {', '.join(sorted(unknown))}")
+
+    app = Flask(__name__)
+    # JSON provider (orjson 可用時使用)，日期一律輸出為 ISO 8601
+    from utils.json_provider import init_json_provider
+    init_json_provider(app)
+    _configure_database(app, config)
+
+    if 'cors' in subsystems:
+        # CORS 配置 - 針對 React 前端優化
+        from flask_cors import CORS
+        from config.cors_config import get_cors_config
+        CORS(app, **get_cors_config())
+
+    if 'docs' in subsystems:
+        # 初始化 Swagger UI (SWAGGER_UI=false 時不載入 flasgger)
+        from config.swagger_config import SWAGGER_UI_ENABLED
+        from utils.openapi import init_swagger_ui
+        app.config['SWAGGER'] = {
+          'uiversion': 3,
+          'swagger_ui': SWAGGER_UI_ENABLED,
+          'specs_route': '/apidocs/'
+        }
+        init_swagger_ui(app)
+
+    if 'api' in subsystems:
+        _register_api(app)
+
+    if 'metrics' in subsystems:
+        _register_metrics(app)
+
+    if 'compression' in subsystems:
+        from utils.compression import init_compression
+        init_compression(app)
+
+    if 'denylist' in subsystems:
+        # 背景載入 token 撤銷清單
+        from utils import token_denylist
+        _add_background_task(app, token_denylist.start_refresher)
+
+    if 'docs' in subsystems:
+        # OpenAPI 規格只產生一次 (或載入預先產生的檔案)，之後由記憶體回應 (需在所有路由註冊後)
+        from utils.openapi import install_openapi
+        install_openapi(app)
+
+    return app
+
+def _add_background_task(app, start):
+    # DEFER_BACKGROUND_TASKS 時只記錄，由 start_background_tasks 在 fork 出的 worker 中啟動
+    # (gunicorn preload 時 create_app 在 master 執行，master 不應執行背景工作)
+    if app.config.get('DEFER_BACKGROUND_TASKS'):
+        app.extensions.setdefault('background_tasks', []).append(start)
+    else:
+        start(app)
+
+def start_background_tasks(app):
+    """
+    啟動 create_app 延後的背景執行緒 (每個 worker 程序呼叫一次)
+    """
+    for start in app.extensions.pop('background_tasks', []):
+        start(app)
 
-# 初始化 Swagger
-swagger = Swagger(app, config=SWAGGER_CONFIG, template=SWAGGER_TEMPLATE)
+def _configure_database(app, config):
+    from models import db  # 導入 db 實例時也會註冊所有模型
+    from config.database_config import DATABASE_REPLICA_URL
+    from utils.db_pool import engine_options
+    from utils.replica import REPLICA_BIND
+    from utils.sqlite_tuning import ensure_database_dir, install_sqlite_pragmas
 
-# 基本 SQLAlchemy 設定
-db_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instance', 'planventure.db')
-app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', f'sqlite:///{db_path}')
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    # 基本 SQLAlchemy 設定
+    db_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instance', 'planventure.db')
+    app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', f'sqlite:///{db_path}')
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    # 唯讀副本 (選用)，GET 行程端點會自動從副本讀取
+    if DATABASE_REPLICA_URL:
+        app.config['SQLALCHEMY_BINDS'] = {REPLICA_BIND: DATABASE_REPLICA_URL}
+    app.config.update(config)
+    # 伺服器資料庫的連線池設定 (見 config/database_config.py)
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', engine_options(app.config['SQLALCHEMY_DATABASE_URI']))
 
-# 初始化 db 與 app
-db.init_app(app)
+    # 初始化 db 與 app
+    db.init_app(app)
 
-# 導入模型以確保它們被註冊
-from models import User, Trip
+    # SQLite 連線調校 (WAL、busy_timeout 等)，啟動時回報實際生效的設定；
+    # 這會開啟第一個連線，資料庫所在目錄 (例如 instance/) 不存在時先建立
+    with app.app_context():
+        for engine in db.engines.values():
+            ensure_database_dir(engine)
+        sqlite_pragmas = install_sqlite_pragmas(db.engine)
+        if REPLICA_BIND in db.engines:
+            install_sqlite_pragmas(db.engines[REPLICA_BIND])
+    if sqlite_pragmas:
+        print(f"SQLite pragmas: {sqlite_pragmas}")
+    app.extensions['sqlite_pragmas'] = sqlite_pragmas
 
-# Blueprints
-from routes.trip import trip_bp
+def _register_api(app):
+    from routes.auth import auth_bp
+    from routes.protected import protected_bp
+    from routes.trip import trip_bp
+    from routes.itinerary import itinerary_bp
 
-app.register_blueprint(auth_bp, url_prefix='/auth')
-app.register_blueprint(protected_bp)
-app.register_blueprint(trip_bp, url_prefix='/api')
+    app.register_blueprint(auth_bp, url_prefix='/auth')
+    app.register_blueprint(protected_bp)
+    app.register_blueprint(trip_bp, url_prefix='/api')
+    app.register_blueprint(itinerary_bp, url_prefix='/api')
+
+    app.add_url_rule('/', view_func=home)
+    app.add_url_rule('/health', view_func=health_check)
+    app.add_url_rule('/cors-test', view_func=cors_test)
+
+def _register_metrics(app):
+    from models import db
+    from utils import metrics
+    from utils.db_pool import pool_stats
+
+    sqlite_pragmas = app.extensions.get('sqlite_pragmas')
+    if sqlite_pragmas:
+        metrics.register_source('sqlite_pragmas', lambda: sqlite_pragmas)
+    metrics.register_source('db_pool', lambda: pool_stats(db.engine))
+    # 指標會透露內部狀態，需以 METRICS_ENABLED 明確開啟 (見 config/metrics_config.py)
+    from config.metrics_config import METRICS_ENABLED
+    if METRICS_ENABLED:
+        app.add_url_rule('/metrics', view_func=metrics_endpoint)
 
-@app.route('/')
 def home():
     """
     歡迎頁面
@@ -59,7 +169,6 @@ def home():
     """
     return jsonify({"message": "Welcome to PlanVenture API"})
 
-@app.route('/health')
 def health_check():
     """
     健康檢查端點
@@ -78,7 +187,48 @@ def health_check():
     """
     return jsonify({"status": "healthy"})
 
-@app.route('/cors-test')
+def metrics_endpoint():
+    """
+    程序內指標 (目前 worker 的計數器與快取統計)
+    ---
+    tags:
+      - General
+    parameters:
+      - in: header
+        name: Authorization
+        type: string
+        required: false
+        description: 有設定 METRICS_TOKEN 時需帶 "Bearer <METRICS_TOKEN>"；未設定時只接受本機請求
+    responses:
+      200:
+        description: 指標快照
+        schema:
+          type: object
+          properties:
+            counters:
+              type: object
+              example: {"jwt_cache_hits": 120, "jwt_cache_misses": 3}
+            token_cache:
+              type: object
+              example: {"size": 3, "maxsize": 4096, "hits": 120, "misses": 3}
+            user_cache:
+              type: object
+              example: {"size": 1, "maxsize": 1024, "hits": 118, "misses": 1}
+      403:
+        description: 未帶正確的 METRICS_TOKEN，或未設定 token 時來自非本機的請求
+    """
+    import hmac
+    from config.metrics_config import METRICS_TOKEN
+    from utils import metrics
+
+    if METRICS_TOKEN:
+        supplied = request.headers.get('Authorization', '')
+        if not hmac.compare_digest(supplied.encode(), f'Bearer {METRICS_TOKEN}'.encode()):
+            return jsonify({'msg': 'Forbidden'}), 403
+    elif request.remote_addr not in ('127.0.0.1', '::1'):
+        return jsonify({'msg': 'Forbidden'}), 403
+    return jsonify(metrics.snapshot())
+
 def cors_test():
     """
     CORS 配置測試端點
@@ -104,5 +254,12 @@ def cors_test():
         "timestamp": "2025-07-26"
     })
 
+def __getattr__(name):
+    # 相容舊用法 `from app import app` 與 `flask --app app`：第一次存取時才以預設設定建立
+    if name == 'app':
+        app = globals()['app'] = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 if __name__ == '__main__':
-    app.run(debug=True, port=5000)
\ No newline at end of file
+    create_app().run(debug=True, port=5000)
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+附近行程搜尋基準測試
+在一個使用者底下建立隨機分布的行程，比較 geohash 索引查詢
+(utils/trip_nearby.py) 與讀取全部座標後逐筆計算距離的全表掃描
+
+用法: python benchmarks/nearby_bench.py [--trips 200000] [--radius 25] [--queries 50]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert, select
+
+from app import create_app
+from models import db, User, Trip
+from utils.geo import coordinate_columns, haversine_km
+from utils.trip_nearby import nearby_trip_distances
+
+BATCH_SIZE = 10000
+
+
+def populate(count: int, rng: random.Random) -> None:
+    db.session.execute(insert(User), {'email': 'bench@example.com', 'password_hash': 'x'})
+    for offset in range(0, count, BATCH_SIZE):
+        rows = []
+        for i in range(offset, min(offset + BATCH_SIZE, count)):
+            coordinates = {'lat': rng.uniform(-60, 70), 'lng': rng.uniform(-180, 180)}
+            rows.append({
+                'user_id': 1,
+                'destination': f'Bench {i}',
+                'start_date': date(2024, 1, 1),
+                'end_date': date(2024, 1, 5),
+                'coordinates': coordinates,
+                **coordinate_columns(coordinates),
+            })
+        db.session.execute(insert(Trip), rows)
+    db.session.commit()
+    db.session.execute(db.text('ANALYZE'))
+
+
+def full_scan(lat: float, lng: float, radius_km: float, limit: int):
+    # 基準組: 沒有地理欄位時只能讀出每筆行程的座標再計算距離
+    rows = db.session.execute(select(Trip.id, Trip.coordinates).where(Trip.user_id == 1))
+    distances = []
+    for trip_id, coordinates in rows:
+        distance = haversine_km(lat, lng, coordinates['lat'], coordinates['lng'])
+        if distance <= radius_km:
+            distances.append((trip_id, distance))
+    distances.sort(key=lambda pair: (pair[1], pair[0]))
+    return distances[:limit]
+
+
+def timed(search, points, radius_km: float, limit: int):
+    results = []
+    started = time.perf_counter()
+    for lat, lng in points:
+        results.append(search(1, lat, lng, radius_km, limit) if search is nearby_trip_distances
+                       else search(lat, lng, radius_km, limit))
+    return (time.perf_counter() - started) / len(points), results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Nearby trip search benchmark')
+    parser.add_argument('--trips', type=int, default=200000)
+    parser.add_argument('--radius', type=float, default=25, help='search radius in km')
+    parser.add_argument('--queries', type=int, default=50)
+    parser.add_argument('--limit', type=int, default=50)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_app({
+            'SUBSYSTEMS': (),
+            'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+        })
+        with app.app_context():
+            db.create_all()
+            started = time.perf_counter()
+            populate(args.trips, rng)
+            print(f"inserted {args.trips} trips in {time.perf_counter() - started:.1f}s")
+
+            points = [(rng.uniform(-60, 70), rng.uniform(-180, 180)) for _ in range(args.queries)]
+            indexed, indexed_results = timed(nearby_trip_distances, points, args.radius, args.limit)
+            scan_points = points[:max(1, args.queries // 10)]
+            scanned, scan_results = timed(full_scan, scan_points, args.radius, args.limit)
+
+            assert indexed_results[:len(scan_results)] == scan_results, 'results differ'
+            print(f"geohash index  {indexed * 1000:9.2f} ms/query")
+            print(f"full scan      {scanned * 1000:9.2f} ms/query  ({scanned / indexed:.0f}x slower)")
+            db.session.remove()
+            db.engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+行程序列化基準測試
+以未寫入資料庫的 Trip 物件 (含行程規劃) 產生列表回應，比較：
+舊作法 (手動組 dict + isoformat + Flask 預設 provider) 與
+serialize_trip 搭配 IsoJSONProvider / OrjsonProvider
+
+用法: python benchmarks/serialize_bench.py [--trips 10000] [--runs 5]
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+from models import Trip
+from utils.json_provider import IsoJSONProvider, OrjsonProvider, orjson
+from utils.serializers import serialize_trip
+
+
+def make_trips(count: int):
+    trips = []
+    for i in range(count):
+        start = date(2024, 1, 1) + timedelta(days=i % 365)
+        trips.append(Trip(
+            id=i + 1,
+            destination=f'Destination {i}',
+            start_date=start,
+            end_date=start + timedelta(days=4),
+            coordinates={'lat': 25.03, 'lng': 121.56},
+            itinerary=[{'day': day, 'plan': f'Day {day} plan', 'budget': 100 * day} for day in range(1, 4)],
+        ))
+    return trips
+
+
+def legacy_serialize(trip) -> dict:
+    # 重構前各路由手動組成的格式
+    return {
+        'id': trip.id,
+        'destination': trip.destination,
+        'start_date': trip.start_date.isoformat(),
+        'end_date': trip.end_date.isoformat(),
+        'coordinates': trip.coordinates,
+        'itinerary': trip.itinerary
+    }
+
+
+def run(provider_class, serialize, trips, runs: int) -> dict:
+    app = Flask(__name__)
+    app.json = provider_class(app)
+    best = None
+    with app.app_context():
+        for _ in range(runs):
+            started = time.perf_counter()
+            response = app.json.response({'trips': [serialize(trip) for trip in trips]})
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+    return {'seconds': best, 'bytes': len(response.get_data())}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Trip serialization benchmark')
+    parser.add_argument('--trips', type=int, default=10000)
+    parser.add_argument('--runs', type=int, default=5, help='runs per case (best is reported)')
+    args = parser.parse_args()
+
+    trips = make_trips(args.trips)
+    cases = [
+        ('legacy + default', DefaultJSONProvider, legacy_serialize),
+        ('serialize_trip + iso', IsoJSONProvider, serialize_trip),
+    ]
+    if orjson is not None:
+        cases.append(('serialize_trip + orjson', OrjsonProvider, serialize_trip))
+    else:
+        print('orjson is not installed; skipping the orjson case')
+
+    baseline = None
+    for label, provider_class, serialize in cases:
+        result = run(provider_class, serialize, trips, args.runs)
+        baseline = baseline or result['seconds']
+        print(f"{label:24} {result['seconds'] * 1000:8.1f} ms  "
+              f"{args.trips / result['seconds']:9.0f} trips/s  "
+              f"{baseline / result['seconds']:5.2f}x  ({result['bytes']} bytes)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+SQLite 寫入吞吐量基準測試
+比較預設設定與 config/database_config.py 調校後的 PRAGMA：
+多個執行緒同時建立行程，每筆各自提交一次交易
+
+用法: python benchmarks/sqlite_write_bench.py [--threads 8] [--writes 200]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.exc import OperationalError
+
+from config.database_config import SQLITE_PRAGMAS
+from models import db, User, Trip
+from utils.sqlite_tuning import install_sqlite_pragmas
+
+
+def run(pragmas, threads: int, writes: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        # 基準組為未調校的引擎 (rollback journal、synchronous=FULL)
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        applied = install_sqlite_pragmas(engine, pragmas) if pragmas else {}
+        db.metadata.create_all(engine, tables=[User.__table__, Trip.__table__])
+        with engine.begin() as conn:
+            conn.execute(insert(User), {'email': 'bench@example.com', 'password_hash': 'x'})
+
+        errors = []
+
+        def worker(n):
+            for i in range(writes):
+                try:
+                    with engine.begin() as conn:
+                        conn.execute(insert(Trip), {
+                            'user_id': 1,
+                            'destination': f'Bench {n}-{i}',
+                            'start_date': date(2024, 1, 1),
+                            'end_date': date(2024, 1, 5),
+                        })
+                except OperationalError as e:
+                    errors.append(str(e.orig))
+
+        workers = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+        started = time.perf_counter()
+        for t in workers:
+            t.start()
+        for t in workers:
+            t.join()
+        elapsed = time.perf_counter() - started
+        engine.dispose()
+
+    committed = threads * writes - len(errors)
+    return {
+        'pragmas': applied,
+        'committed': committed,
+        'errors': len(errors),
+        'seconds': elapsed,
+        'writes_per_second': committed / elapsed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='SQLite write throughput benchmark')
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--writes', type=int, default=200, help='transactions per thread')
+    args = parser.parse_args()
+
+    for label, pragmas in (('default', {}), ('tuned', SQLITE_PRAGMAS)):
+        result = run(pragmas, args.threads, args.writes)
+        print(f"{label:8} {result['writes_per_second']:9.1f} writes/s  "
+              f"committed={result['committed']} errors={result['errors']} "
+              f"({result['seconds']:.2f}s)")
+        if result['pragmas']:
+            print(f"         pragmas: {result['pragmas']}")
+
+
+if __name__ == '__main__':
+    main()
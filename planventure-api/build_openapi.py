@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""
+在建置時產生 OpenAPI 規格檔
+設定 OPENAPI_SPEC_FILE 指向產生的檔案後，app 啟動時直接載入 (見 config/swagger_config.py)，
+不必在每個 worker 解析路由文件；修改路由文件後需重新產生
+
+用法: python build_openapi.py [輸出路徑]   (預設為 OPENAPI_SPEC_FILE，未設定時為 instance/openapi.json)
+"""
+
+import os
+import sys
+
+from app import create_app
+from config.swagger_config import OPENAPI_SPEC_FILE
+from utils.openapi import build_spec, dump_spec
+
+DEFAULT_OUTPUT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instance', 'openapi.json')
+
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else (OPENAPI_SPEC_FILE or DEFAULT_OUTPUT)
+    # 規格涵蓋所有路由，但不需要 CORS、背景執行緒或載入既有的規格檔
+    app = create_app({'SUBSYSTEMS': ('api', 'metrics')})
+    body = dump_spec(build_spec(app))
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(body)
+    print(f"Wrote OpenAPI spec to {path} ({len(body)} bytes).")
+    if os.path.abspath(path) != os.path.abspath(OPENAPI_SPEC_FILE or ''):
+        print(f"Set OPENAPI_SPEC_FILE={path} to serve it instead of building the spec at startup.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""
+程序內快取配置
+"""
+
+import os
+
+# 已驗證使用者的快取 (auth_required 使用)
+USER_CACHE_CONFIG = {
+    # 快取項目存活時間 (秒)
+    "ttl": float(os.getenv('USER_CACHE_TTL', '60')),
+
+    # 最多快取的使用者數量，設為 0 可停用快取
+    "maxsize": int(os.getenv('USER_CACHE_MAXSIZE', '1024')),
+}
+
+# 已驗證 JWT 的快取 (verify_access_token 使用)，項目在 token 到期時自動失效
+TOKEN_CACHE_CONFIG = {
+    # 最多快取的 token 數量，設為 0 可停用快取
+    "maxsize": int(os.getenv('TOKEN_CACHE_MAXSIZE', '4096')),
+}
+
+# 行程讀取的回應快取 (GET /api/trips 與 GET /api/trips/<id>)，寫入時依使用者與行程精確失效
+RESPONSE_CACHE_CONFIG = {
+    # 快取項目存活時間 (秒)，也是其他程序直接寫入資料庫時的最長延遲
+    "ttl": float(os.getenv('RESPONSE_CACHE_TTL', '30')),
+
+    # 最多快取的回應數量，設為 0 可停用快取
+    "maxsize": int(os.getenv('RESPONSE_CACHE_MAXSIZE', '4096')),
+
+    # 快取回應內容的總大小上限 (MB)
+    "max_bytes": int(float(os.getenv('RESPONSE_CACHE_MAX_MB', '64')) * 1024 * 1024),
+}
+
+# 回應快取的儲存後端:
+#   memory - 每個 worker 各自快取 (單一程序部署；其他 worker 的寫入不會使其失效)
+#   sqlite - 多個 worker 共用同一個 SQLite 檔案 (共享後端的替代品)
+RESPONSE_CACHE_BACKEND = os.getenv('RESPONSE_CACHE_BACKEND', 'memory')
+RESPONSE_CACHE_SQLITE_PATH = os.getenv(
+    'RESPONSE_CACHE_SQLITE_PATH',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'instance', 'response_cache.db')
+)
@@ -0,0 +1,32 @@
+"""
+回應壓縮配置
+"""
+
+import os
+
+# 設為 false 可停用回應壓縮 (例如前面已有反向代理負責壓縮)
+COMPRESSION_ENABLED = os.getenv('COMPRESSION_ENABLED', 'true').lower() == 'true'
+
+# 小於此位元組數的回應不壓縮 (壓縮後的節省不足以抵銷 CPU 成本與標頭)
+COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', '1024'))
+
+# 預設壓縮等級，可用 @compress_level 針對單一路由覆寫
+#   gzip   1-9  (6 為 zlib 預設值)
+#   brotli 0-11 (動態內容建議 4-6；需安裝 brotli 套件)
+COMPRESSION_GZIP_LEVEL = int(os.getenv('COMPRESSION_GZIP_LEVEL', '6'))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv('COMPRESSION_BROTLI_QUALITY', '4'))
+
+# 行程列表 (GET /api/trips，含行程規劃時常超過 100 KB) 的壓縮等級：
+# 回應大、行動網路上傳輸時間遠大於壓縮的 CPU 時間，用較高的等級換取更小的回應
+COMPRESSION_LIST_GZIP_LEVEL = int(os.getenv('COMPRESSION_LIST_GZIP_LEVEL', '9'))
+COMPRESSION_LIST_BROTLI_QUALITY = int(os.getenv('COMPRESSION_LIST_BROTLI_QUALITY', '6'))
+
+# 會被壓縮的內容類型
+COMPRESSIBLE_MIMETYPES = {
+    'application/json',
+    'application/x-ndjson',
+    'application/javascript',
+    'text/html',
+    'text/css',
+    'text/plain',
+}
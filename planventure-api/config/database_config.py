@@ -0,0 +1,59 @@
+"""
+資料庫引擎配置
+"""
+
+import os
+
+# SQLite 連線層級的 PRAGMA，每個新連線建立時套用
+# 將某個環境變數設為空字串即可略過該項；SQLITE_TUNING=false 停用全部
+SQLITE_TUNING = os.getenv('SQLITE_TUNING', 'true').lower() == 'true'
+
+_SQLITE_PRAGMA_SETTINGS = {
+    # WAL: 讀取不會阻擋寫入，寫入只需附加到 WAL 檔
+    "journal_mode": os.getenv('SQLITE_JOURNAL_MODE', 'WAL'),
+    # WAL 模式下 NORMAL 只在 checkpoint 時 fsync，斷電最多遺失最後幾筆交易，不會損毀資料庫
+    "synchronous": os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL'),
+    # 遇到鎖時等待的毫秒數，而不是立即回傳 "database is locked"
+    "busy_timeout": os.getenv('SQLITE_BUSY_TIMEOUT', '5000'),
+    # 以記憶體映射讀取資料庫檔案的位元組數 (256 MB)
+    "mmap_size": os.getenv('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024)),
+    # 頁面快取大小，負值代表 KiB (64 MB)
+    "cache_size": os.getenv('SQLITE_CACHE_SIZE', '-64000'),
+    # 暫存表與排序使用記憶體
+    "temp_store": os.getenv('SQLITE_TEMP_STORE', 'MEMORY'),
+}
+
+SQLITE_PRAGMAS = {
+    name: value for name, value in _SQLITE_PRAGMA_SETTINGS.items() if value
+} if SQLITE_TUNING else {}
+
+# 伺服器資料庫 (PostgreSQL、MySQL 等) 的連線池設定，SQLite 不套用
+# 每個 worker 程序各有一個連線池，資料庫端的連線上限需大於
+# worker 數 x (DB_POOL_SIZE + DB_MAX_OVERFLOW)
+DB_POOL_CONFIG = {
+    # 常駐連線數
+    "pool_size": int(os.getenv('DB_POOL_SIZE', '5')),
+    # 尖峰時可額外建立的連線數
+    "max_overflow": int(os.getenv('DB_MAX_OVERFLOW', '10')),
+    # 連線全部被佔用時，等待可用連線的秒數
+    "pool_timeout": float(os.getenv('DB_POOL_TIMEOUT', '30')),
+    # 取出連線前先確認仍可使用 (資料庫重啟或閒置斷線後自動重連)
+    "pool_pre_ping": os.getenv('DB_POOL_PRE_PING', 'true').lower() == 'true',
+    # 連線使用超過此秒數後重建，避免被資料庫或防火牆的閒置逾時切斷
+    "pool_recycle": int(os.getenv('DB_POOL_RECYCLE', '1800')),
+}
+
+# 唯讀副本 (選用)；設定後，標記為可讀副本的 GET 端點會從副本讀取
+DATABASE_REPLICA_URL = os.getenv('DATABASE_REPLICA_URL')
+
+# 使用者寫入後，在此秒數內的讀取仍走主資料庫，避免讀到尚未同步的舊資料
+REPLICA_STICKY_SECONDS = float(os.getenv('REPLICA_STICKY_SECONDS', '5'))
+
+# 記錄「剛寫入的使用者」的後端:
+#   memory - 每個 worker 各自記錄 (單一程序部署)
+#   sqlite - 多個 worker 共用同一個 SQLite 檔案，下一個請求落在其他 worker 時同樣走主資料庫
+REPLICA_STICKY_BACKEND = os.getenv('REPLICA_STICKY_BACKEND', 'memory')
+REPLICA_STICKY_SQLITE_PATH = os.getenv(
+    'REPLICA_STICKY_SQLITE_PATH',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'instance', 'replica_sticky.db')
+)
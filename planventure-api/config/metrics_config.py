@@ -0,0 +1,13 @@
+"""
+/metrics 端點配置
+指標包含連線池、快取與資料庫設定等內部資訊，預設不提供
+"""
+
+import os
+
+# 設為 true 才註冊 GET /metrics
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'false').lower() == 'true'
+
+# 設定後需帶 Authorization: Bearer <METRICS_TOKEN> 才能讀取；
+# 未設定時只接受來自本機 (127.0.0.1 / ::1) 的請求
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
@@ -0,0 +1,36 @@
+"""
+速率限制 (token bucket) 配置
+"""
+
+import os
+
+# 設為 false 可停用所有速率限制 (例如本機壓力測試)
+RATE_LIMIT_ENABLED = os.getenv('RATE_LIMIT_ENABLED', 'true').lower() == 'true'
+
+# 儲存後端:
+#   memory - 每個 worker 各自計算 (單一程序部署)
+#   sqlite - 多個 worker 共用同一個 SQLite 檔案 (共享後端的替代品)
+RATE_LIMIT_BACKEND = os.getenv('RATE_LIMIT_BACKEND', 'memory')
+RATE_LIMIT_SQLITE_PATH = os.getenv(
+    'RATE_LIMIT_SQLITE_PATH',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'instance', 'ratelimit.db')
+)
+
+# 各路由群組的 token bucket
+#   capacity    - 桶的容量，也就是允許的突發請求數
+#   refill_rate - 每秒補充的 token 數
+#   key         - ip: 依來源 IP 計算；user: 依已驗證的 user_id 計算
+RATE_LIMITS = {
+    # 登入與註冊 (bcrypt 成本高)，依 IP 限制
+    "auth": {
+        "capacity": int(os.getenv('AUTH_RATE_LIMIT_BURST', '20')),
+        "refill_rate": float(os.getenv('AUTH_RATE_LIMIT_PER_MINUTE', '20')) / 60,
+        "key": "ip",
+    },
+    # 需要登入的 API，依使用者限制
+    "api": {
+        "capacity": int(os.getenv('API_RATE_LIMIT_BURST', '60')),
+        "refill_rate": float(os.getenv('API_RATE_LIMIT_PER_SECOND', '10')),
+        "key": "user",
+    },
+}
@@ -0,0 +1,33 @@
+"""
+生產環境 WSGI 伺服器 (gunicorn) 配置
+由 gunicorn.conf.py 讀取；開發伺服器 (python app.py) 不使用
+"""
+
+import os
+
+SERVER_HOST = os.getenv('API_HOST', '0.0.0.0')
+SERVER_PORT = int(os.getenv('API_PORT', '5000'))
+
+# worker 程序數量預設為 CPU 核心數：JSON 序列化、壓縮等 CPU 工作受 GIL 限制，
+# 每個核心一個程序即可用滿 CPU；等待資料庫與 bcrypt 執行緒池時由 worker 內的執行緒處理其他請求
+SERVER_WORKERS = int(os.getenv('SERVER_WORKERS', str(os.cpu_count() or 1)))
+SERVER_THREADS = int(os.getenv('SERVER_THREADS', '4'))
+
+# 每個 worker 同時保持的連線上限 (含 keep-alive 閒置連線)，超過時新連線在 backlog 中等待
+SERVER_WORKER_CONNECTIONS = int(os.getenv('SERVER_WORKER_CONNECTIONS', '100'))
+# 尚未被 accept 的連線佇列長度；佇列滿時直接拒絕，讓負載平衡器改送其他實例，而不是讓請求排隊逾時
+SERVER_BACKLOG = int(os.getenv('SERVER_BACKLOG', '256'))
+# keep-alive 連線的閒置秒數 (需小於前方負載平衡器的閒置逾時)
+SERVER_KEEPALIVE = int(os.getenv('SERVER_KEEPALIVE', '5'))
+
+# 單一請求的處理逾時，以及關閉/重新載入時等待進行中請求完成的秒數
+SERVER_TIMEOUT = int(os.getenv('SERVER_TIMEOUT', '30'))
+SERVER_GRACEFUL_TIMEOUT = int(os.getenv('SERVER_GRACEFUL_TIMEOUT', '30'))
+
+# 每個 worker 處理這麼多請求後重新啟動 (加上隨機值避免同時重啟)，0 表示不重啟
+SERVER_MAX_REQUESTS = int(os.getenv('SERVER_MAX_REQUESTS', '10000'))
+SERVER_MAX_REQUESTS_JITTER = int(os.getenv('SERVER_MAX_REQUESTS_JITTER', '1000'))
+
+SERVER_LOG_LEVEL = os.getenv('SERVER_LOG_LEVEL', 'info')
+# 存取紀錄輸出位置 ('-' 為標準輸出，空字串停用)
+SERVER_ACCESS_LOG = os.getenv('SERVER_ACCESS_LOG', '-') or None
@@ -2,6 +2,15 @@
 Swagger/OpenAPI 配置
 """
 
+import os
+
+# 是否提供 Swagger UI (/swagger/)；生產環境可關閉，worker 啟動時不必載入 flasgger
+SWAGGER_UI_ENABLED = os.getenv('SWAGGER_UI', 'true').lower() == 'true'
+
+# 預先產生的 OpenAPI 規格檔 (python build_openapi.py)；需明確設定才會載入，不在啟動時解析路由文件。
+# 未設定時 (預設) 在啟動時由路由文件產生，規格一定與目前的程式碼一致
+OPENAPI_SPEC_FILE = os.getenv('OPENAPI_SPEC_FILE', '')
+
 # Swagger 配置
 SWAGGER_CONFIG = {
     "headers": [],
@@ -1,10 +1,110 @@
-from app import app
-from models import db
+from app import create_app
+from models import db, Trip, ItineraryItem
+from models.itinerary import itinerary_item_rows
+from models.trip_search import search_index_available, rebuild_search_index
+from models.trip_stats import TripStats, reconcile_trip_stats
+from utils.geo import coordinate_columns
+from sqlalchemy import inspect, insert, text
+import json
+
+def upgrade_legacy_schema():
+    """
+    升級舊版資料庫 (db.create_all 不會修改已存在的資料表)
+    - 補上 trips 新增的欄位與索引
+    - 由 coordinates 回填 latitude/longitude/geohash
+    - 將 trips.itinerary JSON 欄位搬移到 itinerary_items 資料表
+    """
+    columns = {column['name'] for column in inspect(db.engine).get_columns('trips')}
+
+    with db.engine.begin() as conn:
+        if 'version' not in columns:
+            conn.execute(text("ALTER TABLE trips ADD COLUMN version INTEGER NOT NULL DEFAULT 1"))
+        if 'updated_at' not in columns:
+            conn.execute(text(
+                "ALTER TABLE trips ADD COLUMN updated_at DATETIME NOT NULL DEFAULT '1970-01-01 00:00:00'"
+            ))
+        for column, ddl in (('latitude', 'FLOAT'), ('longitude', 'FLOAT'), ('geohash', 'VARCHAR(12)')):
+            if column not in columns:
+                conn.execute(text(f"ALTER TABLE trips ADD COLUMN {column} {ddl}"))
+        # 已由 ix_trips_user_start_id_end 取代
+        conn.execute(text("DROP INDEX IF EXISTS ix_trips_user_start_id"))
+        for index in Trip.__table__.indexes:
+            index.create(conn, checkfirst=True)
+
+    backfill_coordinate_columns()
+
+    if 'itinerary' not in columns:
+        return
+
+    with db.engine.begin() as conn:
+        rows = conn.execute(text("SELECT id, itinerary FROM trips WHERE itinerary IS NOT NULL")).all()
+        migrated = 0
+        for trip_id, raw in rows:
+            entries = json.loads(raw) if isinstance(raw, str) else raw
+            try:
+                item_rows = itinerary_item_rows(entries)
+            except ValueError as e:
+                print(f"Skipping itinerary of trip {trip_id}: {e}")
+                continue
+            if item_rows:
+                conn.execute(insert(ItineraryItem), [{'trip_id': trip_id, **row} for row in item_rows])
+            # 清空舊欄位，避免重複搬移
+            conn.execute(text("UPDATE trips SET itinerary = NULL WHERE id = :id"), {'id': trip_id})
+            migrated += 1
+    if migrated:
+        print(f"Migrated {migrated} legacy itineraries.")
+
+def backfill_coordinate_columns():
+    """為有 coordinates 但尚未有 geohash 的行程回填索引欄位"""
+    with db.engine.begin() as conn:
+        rows = conn.execute(text(
+            "SELECT id, coordinates FROM trips WHERE coordinates IS NOT NULL AND geohash IS NULL"
+        )).all()
+        updates = []
+        for trip_id, raw in rows:
+            coordinates = json.loads(raw) if isinstance(raw, str) else raw
+            if coordinates is None:
+                continue
+            try:
+                updates.append({'trip_id': trip_id, **coordinate_columns(coordinates)})
+            except ValueError as e:
+                print(f"Skipping coordinates of trip {trip_id}: {e}")
+        if updates:
+            conn.execute(text(
+                "UPDATE trips SET latitude = :latitude, longitude = :longitude, geohash = :geohash "
+                "WHERE id = :trip_id"
+            ), updates)
+    if updates:
+        print(f"Backfilled coordinate columns for {len(updates)} trips.")
+
+def ensure_search_index():
+    """舊資料庫沒有全文檢索索引時建立並匯入既有行程 (需在行程規劃搬移之後執行)"""
+    if db.engine.dialect.name != 'sqlite':
+        return
+    with db.engine.begin() as conn:
+        if search_index_available(conn):
+            return
+        indexed = rebuild_search_index(conn)
+    print(f"Built full-text search index for {indexed} trips.")
+
+def build_trip_stats():
+    """統計資料表剛建立時，由既有行程計算每位使用者的統計"""
+    with db.engine.begin() as conn:
+        rebuilt = reconcile_trip_stats(conn)
+    if rebuilt:
+        print(f"Built trip statistics for {rebuilt} users.")
 
 def main():
     print("Creating all tables...")
+    # 只需要資料庫，不載入路由、文件等子系統
+    app = create_app({'SUBSYSTEMS': ()})
     with app.app_context():
+        has_trip_stats = inspect(db.engine).has_table(TripStats.__tablename__)
         db.create_all()
+        upgrade_legacy_schema()
+        ensure_search_index()
+        if not has_trip_stats:
+            build_trip_stats()
     print("All tables created.")
 
 if __name__ == "__main__":
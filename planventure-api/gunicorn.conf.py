@@ -0,0 +1,88 @@
+"""
+gunicorn 配置 (生產環境)
+設定值見 config/server_config.py；在專案目錄執行 gunicorn 時自動載入此檔案:
+
+    gunicorn wsgi:app
+
+訊號:
+  TERM / INT - 停止接受新連線，等待進行中的請求 (最多 SERVER_GRACEFUL_TIMEOUT 秒) 後結束
+  HUP        - 重新讀取配置並逐一替換 worker (preload 時不會載入新的程式碼)
+  USR2 + TERM (舊 master) - 不中斷服務地部署新版程式碼
+"""
+
+import os
+
+from dotenv import load_dotenv
+
+# 與 flask run 相同，從 .env 載入環境變數 (已設定的環境變數優先)
+load_dotenv()
+
+from config.server_config import (
+    SERVER_HOST, SERVER_PORT, SERVER_WORKERS, SERVER_THREADS, SERVER_WORKER_CONNECTIONS,
+    SERVER_BACKLOG, SERVER_KEEPALIVE, SERVER_TIMEOUT, SERVER_GRACEFUL_TIMEOUT,
+    SERVER_MAX_REQUESTS, SERVER_MAX_REQUESTS_JITTER, SERVER_LOG_LEVEL, SERVER_ACCESS_LOG
+)
+
+bind = f'{SERVER_HOST}:{SERVER_PORT}'
+worker_class = 'gthread'
+workers = SERVER_WORKERS
+threads = SERVER_THREADS
+worker_connections = SERVER_WORKER_CONNECTIONS
+backlog = SERVER_BACKLOG
+keepalive = SERVER_KEEPALIVE
+timeout = SERVER_TIMEOUT
+graceful_timeout = SERVER_GRACEFUL_TIMEOUT
+max_requests = SERVER_MAX_REQUESTS
+max_requests_jitter = SERVER_MAX_REQUESTS_JITTER
+loglevel = SERVER_LOG_LEVEL
+accesslog = SERVER_ACCESS_LOG
+
+# master 先載入應用程式再 fork：導入與 create_app 只執行一次，worker 共用記憶體分頁，
+# 應用程式無法啟動時 master 直接結束而不是不斷重啟 worker
+preload_app = True
+reload = False
+
+# preload 時 create_app 在 master 中執行：背景執行緒 (token 撤銷清單) 延後到 post_fork 才在 worker 中啟動，
+# master 只負責管理 worker，不輪詢資料庫
+if preload_app:
+    os.environ['DEFER_BACKGROUND_TASKS'] = 'true'
+
+# 預設為每個程序各自保存的後端；多個 worker 時未設定者改用共用的 SQLite 檔案，
+# 否則快取與 ETag 在各 worker 間不一致 (其他 worker 回應過期資料或誤判 412)，速率限制也會放寬為 worker 數倍
+SHARED_BACKENDS = ('RESPONSE_CACHE_BACKEND', 'RATE_LIMIT_BACKEND', 'REPLICA_STICKY_BACKEND')
+if workers > 1:
+    for name in SHARED_BACKENDS:
+        os.environ.setdefault(name, 'sqlite')
+
+
+def _dispose_engines(close):
+    from wsgi import app
+    from models import db
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=close)
+
+
+def on_starting(server):
+    # 明確設定為 memory (或以 -w 指定多個 worker) 時提醒: 各 worker 的快取與速率限制互不相通
+    if server.cfg.workers > 1:
+        for name in SHARED_BACKENDS:
+            if os.getenv(name, 'memory') == 'memory':
+                server.log.warning('%s=memory with %d workers: each worker keeps its own state; '
+                                   'set %s=sqlite to share it', name, server.cfg.workers, name)
+
+
+def post_fork(server, worker):
+    # 連線池中的連線是在 master 建立的，不能與 master 或其他 worker 共用；
+    # close=False 只捨棄而不關閉，避免影響 master 仍在使用的連線。
+    # bcrypt 執行緒池與 SQLite 後端連線依 PID 在第一次使用時重建
+    _dispose_engines(close=False)
+    # 在 worker 中啟動 create_app 延後的背景執行緒
+    from wsgi import app
+    from app import start_background_tasks
+    start_background_tasks(app)
+
+
+def worker_exit(server, worker):
+    # 正常結束時關閉此 worker 的資料庫連線
+    _dispose_engines(close=True)
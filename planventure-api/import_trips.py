@@ -0,0 +1,47 @@
+"""
+從 NDJSON 檔案匯入行程
+用法: python import_trips.py user@example.com trips.ndjson  (檔案為 - 時從標準輸入讀取)
+"""
+
+import argparse
+import sys
+
+from app import create_app
+from models import User
+from utils.trip_bulk import import_trips_ndjson, IMPORT_CHUNK_SIZE
+
+def main():
+    parser = argparse.ArgumentParser(description="Import newline-delimited JSON trips for a user.")
+    parser.add_argument("email", help="owner of the imported trips")
+    parser.add_argument("path", help="NDJSON file, or - for stdin")
+    parser.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_SIZE,
+                        help=f"trips per INSERT batch (default {IMPORT_CHUNK_SIZE})")
+    args = parser.parse_args()
+
+    # 只需要資料庫，不載入路由、文件等子系統
+    app = create_app({'SUBSYSTEMS': ()})
+    with app.app_context():
+        user = User.query.filter_by(email=args.email).first()
+        if not user:
+            print(f"User not found: {args.email}")
+            return 1
+
+        def on_progress(report):
+            print(f"Processed {report['processed']} lines, imported {report['imported']}, failed {report['failed']}")
+
+        stream = sys.stdin if args.path == "-" else open(args.path, encoding="utf-8")
+        try:
+            report = import_trips_ndjson(stream, user.id, chunk_size=args.chunk_size, on_progress=on_progress)
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+    for error in report['errors']:
+        print(f"Line {error['line']}: {error['msg']}")
+    if report['errors_truncated']:
+        print(f"... {report['failed'] - len(report['errors'])} more errors not shown")
+    print(f"Import finished: {report['imported']} imported, {report['failed']} failed.")
+    return 0 if report['failed'] == 0 else 2
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,9 +1,18 @@
 from flask_sqlalchemy import SQLAlchemy
 
-db = SQLAlchemy()
+from .session import RoutingSession
+
+# 讀取可依請求路由到唯讀副本 (見 utils/replica.py)
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 # 在這裡導入所有模型以確保它們都被註冊
 from .user import User
 from .trip import Trip
+from .itinerary import ItineraryItem
+from .revoked_token import RevokedToken
+from .trip_stats import TripStats, TripDestinationStats
+
+# 全文檢索索引 (註冊 after_flush 索引更新)
+from . import trip_search
 
-__all__ = ['db', 'User', 'Trip']
+__all__ = ['db', 'User', 'Trip', 'ItineraryItem', 'RevokedToken', 'TripStats', 'TripDestinationStats']
@@ -0,0 +1,67 @@
+from sqlalchemy import Column, Integer, Text, ForeignKey, JSON, Index
+from sqlalchemy.orm import relationship
+
+# 延遲導入 db，避免循環導入
+def get_db():
+    from models import db
+    return db
+
+class ItineraryItem(get_db().Model):
+    __tablename__ = "itinerary_items"
+    __table_args__ = (
+        # 單日讀取與插入/移動時的位置位移都依 (trip_id, day, position) 範圍查詢
+        Index("ix_itinerary_items_trip_day_position", "trip_id", "day", "position"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    trip_id = Column(Integer, ForeignKey("trips.id", ondelete="CASCADE"), nullable=False)
+    day = Column(Integer, nullable=False)
+    position = Column(Integer, nullable=False)  # 同一天內的順序，從 0 開始
+    plan = Column(Text, nullable=True)
+    details = Column(JSON, nullable=True)       # day/plan 以外的欄位，例如: {"time": "09:00"}
+    trip = relationship("Trip", back_populates="itinerary_items")
+
+    def to_dict(self) -> dict:
+        """回傳與舊版 Trip.itinerary JSON 相同格式的項目"""
+        entry = {"day": self.day, "plan": self.plan}
+        if self.details:
+            entry.update(self.details)
+        return entry
+
+
+def parse_itinerary_entry(entry) -> dict:
+    """
+    驗證單一行程項目並拆成資料表欄位
+    格式錯誤時拋出 ValueError
+    """
+    if not isinstance(entry, dict):
+        raise ValueError("Itinerary entries must be objects")
+    day = entry.get("day")
+    if not isinstance(day, int) or isinstance(day, bool) or day < 0:
+        raise ValueError("Itinerary entries require a non-negative integer day")
+    plan = entry.get("plan")
+    if plan is not None and not isinstance(plan, str):
+        raise ValueError("Itinerary plan must be a string")
+    details = {key: value for key, value in entry.items() if key not in ("id", "day", "plan", "position")}
+    return {"day": day, "plan": plan, "details": details or None}
+
+
+def itinerary_item_rows(entries) -> list:
+    """
+    將舊版 itinerary JSON 陣列轉為 itinerary_items 的資料列 (不含 trip_id)
+    同一天的項目依出現順序編排 position，格式錯誤時拋出 ValueError
+    """
+    if entries is None:
+        return []
+    if not isinstance(entries, list):
+        raise ValueError("Itinerary must be an array")
+
+    rows = []
+    next_position = {}
+    for entry in entries:
+        fields = parse_itinerary_entry(entry)
+        position = next_position.get(fields["day"], 0)
+        next_position[fields["day"]] = position + 1
+        rows.append({"position": position, **fields})
+    return rows
+
@@ -0,0 +1,28 @@
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Index, func
+
+# 延遲導入 db，避免循環導入
+def get_db():
+    from models import db
+    return db
+
+class RevokedToken(get_db().Model):
+    """
+    Persisted token denylist entry.
+
+    A row either revokes one token (``jti``) or every token of ``user_id``
+    issued at or before ``issued_before`` (logout from all sessions).
+    ``expires_at`` is when the entry stops mattering and can be pruned.
+    Rows are append-only, so ``id`` doubles as the refresh cursor.
+    """
+    __tablename__ = 'revoked_tokens'
+
+    id = Column(Integer, primary_key=True)
+    jti = Column(String(64), nullable=True)
+    user_id = Column(Integer, ForeignKey('users.id', ondelete='CASCADE'), nullable=True)
+    issued_before = Column(Float, nullable=True)
+    expires_at = Column(Float, nullable=False)
+    created_at = Column(DateTime, default=func.now(), nullable=False)
+
+    __table_args__ = (
+        Index('ix_revoked_tokens_expires_at', 'expires_at'),
+    )
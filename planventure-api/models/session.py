@@ -0,0 +1,46 @@
+from flask import g, has_app_context
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.sql.dml import UpdateBase
+
+from utils import metrics
+from utils.replica import REPLICA_BIND, replica_allowed, mark_primary_sticky
+
+class RoutingSession(Session):
+    """
+    Session that sends reads to the 'replica' bind when the request allows it.
+
+    Flushes and INSERT/UPDATE/DELETE statements always use the primary, and
+    once a session has written, its later reads stay on the primary too.
+    Sessions that read from the replica are flagged with info['read_replica'].
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and REPLICA_BIND in self._db.engines:
+            if self._flushing or isinstance(clause, UpdateBase):
+                self.info['wrote'] = True
+            elif not self.info.get('wrote') and replica_allowed():
+                metrics.increment('db_replica_queries')
+                self.info['read_replica'] = True
+                return self._db.engines[REPLICA_BIND]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+# 記錄這個交易新增的使用者 (註冊請求還沒有 current_user_id)
+@event.listens_for(RoutingSession, 'after_flush')
+def _collect_new_users(session, flush_context):
+    for obj in session.new:
+        if getattr(obj, '__tablename__', None) == 'users':
+            session.info.setdefault('new_user_ids', set()).add(obj.id)
+
+# 寫入提交後，該使用者接下來的讀取暫時固定走主資料庫
+@event.listens_for(RoutingSession, 'after_commit')
+def _stick_to_primary(session):
+    new_user_ids = session.info.pop('new_user_ids', ())
+    if session.info.get('wrote') and has_app_context():
+        mark_primary_sticky(g.get('current_user_id'))
+        for user_id in new_user_ids:
+            mark_primary_sticky(user_id)
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def _forget_new_users(session):
+    session.info.pop('new_user_ids', None)
@@ -1,6 +1,7 @@
-
-from sqlalchemy import Column, Integer, String, Date, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, ForeignKey, JSON, Index, func
 from sqlalchemy.orm import relationship
+from datetime import datetime
+from models.itinerary import ItineraryItem, itinerary_item_rows
 
 # 延遲導入 db，避免循環導入
 def get_db():
@@ -9,6 +10,13 @@ def get_db():
 
 class Trip(get_db().Model):
     __tablename__ = "trips"
+    __table_args__ = (
+        # 支援 GET /api/trips 的 keyset 分頁 (依 start_date, id 排序)；
+        # 附帶 end_date，日期範圍篩選 (from/to) 與重疊檢查不需讀取資料列即可判斷
+        Index("ix_trips_user_start_id_end", "user_id", "start_date", "id", "end_date"),
+        # 支援 GET /api/trips/nearby 以 geohash 前綴範圍查詢
+        Index("ix_trips_user_geohash", "user_id", "geohash"),
+    )
 
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -16,5 +24,41 @@ class Trip(get_db().Model):
     start_date = Column(Date, nullable=False)
     end_date = Column(Date, nullable=False)
     coordinates = Column(JSON, nullable=True)  # 例如: {"lat": ..., "lng": ...}
-    itinerary = Column(JSON, nullable=True)    # 例如: [{"day": 1, "plan": ...}, ...]
-    user = relationship("User", back_populates="trips")
\ No newline at end of file
+    # 由 coordinates 衍生、可建立索引的欄位 (見 utils.geo.coordinate_columns)
+    latitude = Column(Float, nullable=True)
+    longitude = Column(Float, nullable=True)
+    geohash = Column(String(12), nullable=True)
+    # 每次更新自動遞增，用於 ETag 與樂觀鎖 (並行更新時拋出 StaleDataError)
+    version = Column(Integer, nullable=False, default=1)
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now(), nullable=False)
+    user = relationship("User", back_populates="trips")
+    # 行程規劃存放於 itinerary_items 資料表，依 (day, position) 排序
+    itinerary_items = relationship(
+        "ItineraryItem",
+        back_populates="trip",
+        order_by="(ItineraryItem.day, ItineraryItem.position)",
+        cascade="all, delete-orphan",
+    )
+
+    __mapper_args__ = {"version_id_col": version}
+
+    @property
+    def itinerary(self):
+        """以舊版 JSON 格式回傳行程規劃，例如: [{"day": 1, "plan": ...}, ...]"""
+        if not self.itinerary_items:
+            return None
+        return [item.to_dict() for item in self.itinerary_items]
+
+    @itinerary.setter
+    def itinerary(self, entries):
+        """整份取代行程規劃 (格式錯誤時拋出 ValueError)"""
+        self.set_itinerary_rows(itinerary_item_rows(entries))
+
+    def set_itinerary_rows(self, rows):
+        """以已驗證的資料列 (見 itinerary_item_rows) 整份取代行程規劃"""
+        self.itinerary_items = [ItineraryItem(**row) for row in rows]
+        self.touch()
+
+    def touch(self):
+        """標記行程已變更，使 version 遞增 (例如只修改了 itinerary_items 時)"""
+        self.updated_at = datetime.utcnow()
\ No newline at end of file
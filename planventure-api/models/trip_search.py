@@ -0,0 +1,182 @@
+"""
+行程全文檢索索引 (SQLite FTS5)
+trip_search 虛擬資料表以 trips.id 為 rowid，索引目的地與行程規劃文字。
+ORM 寫入在 after_flush 時於同一交易內更新索引；
+Core 批次寫入 (批次端點、匯入) 需自行呼叫 reindex_trips / remove_trips
+"""
+
+import re
+from typing import Iterable
+
+from sqlalchemy import DDL, event, select, text
+
+from .session import RoutingSession
+from .trip import Trip
+from .itinerary import ItineraryItem
+
+SEARCH_TABLE = 'trip_search'
+
+# owner 欄位存放使用者 token (見 owner_token)，查詢時以 owner:u<id> 限定在該使用者的行程
+CREATE_SEARCH_TABLE = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} "
+    "USING fts5(owner, destination, plans, tokenize = 'unicode61 remove_diacritics 2')"
+)
+
+# SQLite 單一查詢的參數數量有上限，IN 清單分批處理
+_CHUNK_SIZE = 500
+
+# 假名、中日韓統一表意文字 (含擴充 A、相容字) 與韓文音節
+CJK_RANGES = '\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uac00-\ud7af'
+_CJK_CHAR = re.compile(f'([{CJK_RANGES}])')
+
+# 中日韓文字間插入的分隔字元 (unicode61 視控制字元為分隔符，且不會出現在一般文字中)
+TOKEN_SEPARATOR = '\x1f'
+
+# 已確認有索引資料表的引擎 (資料表不存在時不更新索引，避免舊資料庫的寫入失敗)
+_available_engines = set()
+
+# 新資料庫建立 trips 時一併建立索引資料表
+event.listen(Trip.__table__, 'after_create', DDL(CREATE_SEARCH_TABLE).execute_if(dialect='sqlite'))
+
+
+def segment_text(value: str) -> str:
+    """
+    Put TOKEN_SEPARATOR around CJK characters so each one is a separate token.
+
+    unicode61 treats a run of CJK characters as one token; indexing them one
+    by one lets a phrase query match any word inside the run. The separator
+    is removed again when snippets are displayed.
+    """
+    return _CJK_CHAR.sub(TOKEN_SEPARATOR + r'\1' + TOKEN_SEPARATOR, value)
+
+
+def owner_token(user_id: int) -> str:
+    return f'u{user_id}'
+
+
+def search_index_available(connection) -> bool:
+    if connection.dialect.name != 'sqlite':
+        return False
+    key = str(connection.engine.url)
+    if key not in _available_engines:
+        exists = connection.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {'name': SEARCH_TABLE}
+        ).first()
+        if not exists:
+            return False
+        _available_engines.add(key)
+    return True
+
+
+def create_search_index(connection) -> bool:
+    """
+    Create the index table if it is missing; returns True if it was created.
+    """
+    existed = search_index_available(connection)
+    if not existed:
+        connection.execute(text(CREATE_SEARCH_TABLE))
+    return not existed
+
+
+def _chunks(ids: Iterable[int]):
+    ids = sorted(set(ids))
+    for start in range(0, len(ids), _CHUNK_SIZE):
+        yield ids[start:start + _CHUNK_SIZE]
+
+
+def remove_trips(connection, trip_ids: Iterable[int]) -> None:
+    """
+    Drop trips from the index.
+    """
+    if not search_index_available(connection):
+        return
+    for chunk in _chunks(trip_ids):
+        connection.execute(
+            text(f"DELETE FROM {SEARCH_TABLE} WHERE rowid IN ({', '.join(map(str, chunk))})")
+        )
+
+
+def reindex_trips(connection, trip_ids: Iterable[int]) -> None:
+    """
+    Rewrite the index rows of the given trips from the current table data
+    (trips that no longer exist are dropped).
+    """
+    if not search_index_available(connection):
+        return
+    for chunk in _chunks(trip_ids):
+        connection.execute(
+            text(f"DELETE FROM {SEARCH_TABLE} WHERE rowid IN ({', '.join(map(str, chunk))})")
+        )
+        trips = connection.execute(
+            select(Trip.id, Trip.user_id, Trip.destination).where(Trip.id.in_(chunk))
+        ).all()
+        if not trips:
+            continue
+        plans = {}
+        for trip_id, plan in connection.execute(
+            select(ItineraryItem.trip_id, ItineraryItem.plan)
+            .where(ItineraryItem.trip_id.in_(chunk), ItineraryItem.plan.isnot(None))
+            .order_by(ItineraryItem.trip_id, ItineraryItem.day, ItineraryItem.position)
+        ):
+            plans.setdefault(trip_id, []).append(plan)
+        connection.execute(
+            text(f"INSERT INTO {SEARCH_TABLE} (rowid, owner, destination, plans) "
+                 "VALUES (:id, :owner, :destination, :plans)"),
+            [
+                {
+                    'id': trip_id,
+                    'owner': owner_token(user_id),
+                    'destination': segment_text(destination),
+                    'plans': segment_text('\n'.join(plans.get(trip_id, []))),
+                }
+                for trip_id, user_id, destination in trips
+            ]
+        )
+
+
+def rebuild_search_index(connection, chunk_size: int = 1000) -> int:
+    """
+    Recreate the index from every trip; returns the number of trips indexed.
+    """
+    connection.execute(text(f"DROP TABLE IF EXISTS {SEARCH_TABLE}"))
+    connection.execute(text(CREATE_SEARCH_TABLE))
+    _available_engines.add(str(connection.engine.url))
+
+    indexed = 0
+    last_id = 0
+    while True:
+        ids = connection.execute(
+            select(Trip.id).where(Trip.id > last_id).order_by(Trip.id).limit(chunk_size)
+        ).scalars().all()
+        if not ids:
+            return indexed
+        reindex_trips(connection, ids)
+        indexed += len(ids)
+        last_id = ids[-1]
+
+
+# ORM 寫入後 (仍在同一交易內) 更新受影響行程的索引
+@event.listens_for(RoutingSession, 'after_flush')
+def _update_search_index(session, flush_context):
+    changed, removed = set(), set()
+    for obj in session.new | session.dirty:
+        if isinstance(obj, Trip):
+            changed.add(obj.id)
+        elif isinstance(obj, ItineraryItem):
+            # 直接讀取已載入的值，避免在 flush 期間觸發延遲載入
+            changed.add(obj.__dict__.get('trip_id'))
+    for obj in session.deleted:
+        if isinstance(obj, Trip):
+            removed.add(obj.__dict__.get('id'))
+        elif isinstance(obj, ItineraryItem):
+            changed.add(obj.__dict__.get('trip_id'))
+    changed.discard(None)
+    removed.discard(None)
+    changed -= removed
+    if not (changed or removed):
+        return
+
+    connection = session.connection()
+    remove_trips(connection, removed)
+    reindex_trips(connection, changed)
@@ -0,0 +1,261 @@
+"""
+每位使用者的行程統計 (GET /api/trips/stats)
+trip_stats 存放行程數與旅行天數，trip_destination_stats 存放各目的地的行程數。
+ORM 寫入在 after_flush 時於同一交易內套用增量；
+Core 批次寫入 (批次端點、匯入) 需自行呼叫 apply_trip_deltas。
+reconcile_trip_stats 以 GROUP BY 從 trips 重新計算，用於建立與校正
+"""
+
+from collections import Counter
+from datetime import date
+from typing import Iterable, Optional, Tuple
+
+from sqlalchemy import Column, Integer, String, ForeignKey, Index, event, select, update, delete, func, inspect
+from sqlalchemy.dialects import postgresql, sqlite
+
+from .session import RoutingSession
+from .trip import Trip
+from .user import User
+
+# 延遲導入 db，避免循環導入
+def get_db():
+    from models import db
+    return db
+
+# (user_id, destination, start_date, end_date)
+TripKey = Tuple[int, str, date, date]
+
+
+class TripStats(get_db().Model):
+    __tablename__ = "trip_stats"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    trip_count = Column(Integer, nullable=False, default=0)
+    total_days = Column(Integer, nullable=False, default=0)  # 各行程天數 (含首尾兩天) 的總和
+
+
+class TripDestinationStats(get_db().Model):
+    __tablename__ = "trip_destination_stats"
+    __table_args__ = (
+        # 熱門目的地依行程數由多到少讀取
+        Index("ix_trip_destination_stats_user_count", "user_id", "trip_count"),
+    )
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    destination = Column(String, primary_key=True)
+    trip_count = Column(Integer, nullable=False, default=0)
+
+
+def trip_days(start_date: date, end_date: date) -> int:
+    """Length of a trip in days, counting both the first and the last day."""
+    return (end_date - start_date).days + 1
+
+
+def _upsert_increments(connection, table, keys: Tuple[str, ...], rows: list) -> None:
+    """對 rows 中的非主鍵欄位做累加 (資料列不存在時新增)"""
+    if not rows:
+        return
+    increments = [column for column in rows[0] if column not in keys]
+    dialect = {'sqlite': sqlite, 'postgresql': postgresql}.get(connection.dialect.name)
+    if dialect is not None:
+        statement = dialect.insert(table)
+        statement = statement.on_conflict_do_update(
+            index_elements=list(keys),
+            set_={column: table.c[column] + statement.excluded[column] for column in increments}
+        )
+        connection.execute(statement, rows)
+        return
+    # 其他資料庫: 先更新，沒有資料列時再新增
+    for row in rows:
+        result = connection.execute(
+            table.update()
+            .where(*[table.c[key] == row[key] for key in keys])
+            .values({column: table.c[column] + row[column] for column in increments})
+        )
+        if result.rowcount == 0:
+            connection.execute(table.insert().values(row))
+
+
+def apply_trip_deltas(connection, removed: Iterable[TripKey] = (), added: Iterable[TripKey] = ()) -> None:
+    """
+    Update the aggregates for trips that were removed and added.
+
+    An update is a removal of the old values plus an addition of the new
+    ones. Must run in the same transaction as the trip writes.
+    """
+    totals, destinations = Counter(), Counter()
+    for sign, trips in ((-1, removed), (1, added)):
+        for user_id, destination, start_date, end_date in trips:
+            totals[(user_id, 'trip_count')] += sign
+            totals[(user_id, 'total_days')] += sign * trip_days(start_date, end_date)
+            destinations[(user_id, destination)] += sign
+
+    user_ids = sorted({user_id for user_id, _ in totals})
+    _upsert_increments(connection, TripStats.__table__, ('user_id',), [
+        {'user_id': user_id,
+         'trip_count': totals[(user_id, 'trip_count')],
+         'total_days': totals[(user_id, 'total_days')]}
+        for user_id in user_ids
+    ])
+    changed = [
+        {'user_id': user_id, 'destination': destination, 'trip_count': count}
+        for (user_id, destination), count in sorted(destinations.items()) if count
+    ]
+    _upsert_increments(connection, TripDestinationStats.__table__, ('user_id', 'destination'), changed)
+    if changed:
+        # 已沒有行程的目的地不保留
+        connection.execute(
+            delete(TripDestinationStats)
+            .where(TripDestinationStats.user_id.in_(user_ids), TripDestinationStats.trip_count <= 0)
+        )
+
+
+def _trip_days_sum(connection):
+    if connection.dialect.name == 'sqlite':
+        days = func.julianday(Trip.end_date) - func.julianday(Trip.start_date) + 1
+    else:
+        days = Trip.end_date - Trip.start_date + 1
+    return func.coalesce(func.sum(days), 0)
+
+
+def user_id_chunks(connection, chunk_size: int = 1000):
+    """Yield all user ids in ascending chunks of ``chunk_size``."""
+    last_id = 0
+    while True:
+        ids = connection.execute(
+            select(User.id).where(User.id > last_id).order_by(User.id).limit(chunk_size)
+        ).scalars().all()
+        if not ids:
+            return
+        yield ids
+        last_id = ids[-1]
+
+
+def reconcile_trip_stats(connection, user_ids: Optional[Iterable[int]] = None,
+                         chunk_size: int = 1000) -> int:
+    """
+    Recompute the aggregates from the trips table with GROUP BY, for the
+    given users or everyone; returns the number of users whose stored
+    statistics were wrong or missing.
+    """
+    if user_ids is not None:
+        pending = sorted(set(user_ids))
+        chunks = (pending[i:i + chunk_size] for i in range(0, len(pending), chunk_size))
+    else:
+        # 依使用者 ID 分批，避免一次把所有統計載入記憶體
+        chunks = user_id_chunks(connection, chunk_size)
+
+    days = _trip_days_sum(connection)
+    drifted = 0
+    for chunk in chunks:
+        # 先以寫入取得鎖 (SQLite 在第一個寫入時才開始交易)，計算期間其他交易無法修改這些使用者的統計
+        connection.execute(
+            update(TripStats).where(TripStats.user_id.in_(chunk)).values(trip_count=TripStats.trip_count)
+        )
+        fresh = {
+            user_id: (count, int(total_days))
+            for user_id, count, total_days in connection.execute(
+                select(Trip.user_id, func.count(), days)
+                .where(Trip.user_id.in_(chunk)).group_by(Trip.user_id)
+            )
+        }
+        fresh_destinations = {}
+        for user_id, destination, count in connection.execute(
+            select(Trip.user_id, Trip.destination, func.count())
+            .where(Trip.user_id.in_(chunk)).group_by(Trip.user_id, Trip.destination)
+        ):
+            fresh_destinations.setdefault(user_id, {})[destination] = count
+
+        stored = {
+            user_id: (count, total_days)
+            for user_id, count, total_days in connection.execute(
+                select(TripStats.user_id, TripStats.trip_count, TripStats.total_days)
+                .where(TripStats.user_id.in_(chunk))
+            )
+        }
+        stored_destinations = {}
+        for user_id, destination, count in connection.execute(
+            select(TripDestinationStats.user_id, TripDestinationStats.destination, TripDestinationStats.trip_count)
+            .where(TripDestinationStats.user_id.in_(chunk))
+        ):
+            stored_destinations.setdefault(user_id, {})[destination] = count
+
+        wrong = [
+            user_id for user_id in chunk
+            if stored.get(user_id, (0, 0)) != fresh.get(user_id, (0, 0))
+            or stored_destinations.get(user_id, {}) != fresh_destinations.get(user_id, {})
+        ]
+        if not wrong:
+            continue
+        drifted += len(wrong)
+        connection.execute(delete(TripStats).where(TripStats.user_id.in_(wrong)))
+        connection.execute(delete(TripDestinationStats).where(TripDestinationStats.user_id.in_(wrong)))
+        stats_rows = [
+            {'user_id': user_id, 'trip_count': fresh[user_id][0], 'total_days': fresh[user_id][1]}
+            for user_id in wrong if user_id in fresh
+        ]
+        if stats_rows:
+            connection.execute(TripStats.__table__.insert(), stats_rows)
+        destination_rows = [
+            {'user_id': user_id, 'destination': destination, 'trip_count': count}
+            for user_id in wrong
+            for destination, count in fresh_destinations.get(user_id, {}).items()
+        ]
+        if destination_rows:
+            connection.execute(TripDestinationStats.__table__.insert(), destination_rows)
+    return drifted
+
+
+_MISSING = object()
+
+
+def _old_value(state, key):
+    history = state.attrs[key].history
+    if history.deleted:
+        return history.deleted[0]
+    if history.unchanged:
+        return history.unchanged[0]
+    return _MISSING
+
+
+# ORM 寫入後 (仍在同一交易內) 套用統計增量
+@event.listens_for(RoutingSession, 'after_flush')
+def _update_trip_stats(session, flush_context):
+    removed, added, recompute = [], [], set()
+    fields = ('user_id', 'destination', 'start_date', 'end_date')
+    for obj in session.new:
+        if isinstance(obj, Trip):
+            added.append(tuple(getattr(obj, field) for field in fields))
+    for obj in session.dirty:
+        if not isinstance(obj, Trip):
+            continue
+        state = inspect(obj)
+        # 只修改其他欄位 (例如行程規劃、座標) 時統計不變
+        if any(state.attrs[field].history.has_changes() for field in fields):
+            old = tuple(_old_value(state, field) for field in fields)
+            new = tuple(obj.__dict__.get(field, _MISSING) for field in fields)
+            if _MISSING in old or _MISSING in new:
+                # 欄位未載入 (例如 load_only)，無法得知舊值，改為重新計算該使用者
+                recompute.add(obj.__dict__.get('user_id'))
+            elif old != new:
+                removed.append(old)
+                added.append(new)
+    for obj in session.deleted:
+        if isinstance(obj, Trip):
+            old = tuple(obj.__dict__.get(field, _MISSING) for field in fields)
+            if _MISSING in old:
+                recompute.add(obj.__dict__.get('user_id'))
+            else:
+                removed.append(old)
+    recompute.discard(None)
+    if not (removed or added or recompute):
+        return
+
+    connection = session.connection()
+    apply_trip_deltas(
+        connection,
+        removed=[trip for trip in removed if trip[0] not in recompute],
+        added=[trip for trip in added if trip[0] not in recompute],
+    )
+    if recompute:
+        reconcile_trip_stats(connection, recompute)
@@ -1,6 +1,6 @@
 from sqlalchemy import Column, Integer, String, DateTime, func
 from sqlalchemy.orm import relationship
-from utils.password_utils import hash_password, check_password as verify_password
+from utils.password_utils import hash_password, check_password as verify_password, needs_rehash
 
 # 延遲導入 db，避免循環導入
 def get_db():
@@ -23,4 +23,7 @@ class User(get_db().Model):
     def check_password(self, password: str) -> bool:
         return verify_password(password, self.password_hash.encode('utf-8'))
 
+    def password_needs_rehash(self) -> bool:
+        return needs_rehash(self.password_hash.encode('utf-8'))
+
 
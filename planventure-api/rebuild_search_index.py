@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+"""
+重建行程全文檢索索引
+由 trips 與 itinerary_items 重新產生 trip_search 資料表，
+用於匯入既有資料、索引損毀，或以 Core 直接寫入資料庫之後
+
+用法: python rebuild_search_index.py
+"""
+
+import sys
+
+from app import create_app
+from models import db
+from models.trip_search import rebuild_search_index
+
+
+def main():
+    # 只需要資料庫，不載入路由、文件等子系統
+    app = create_app({'SUBSYSTEMS': ()})
+    with app.app_context():
+        if db.engine.dialect.name != 'sqlite':
+            print("Full-text search requires SQLite FTS5; nothing to rebuild.")
+            sys.exit(1)
+        # 單一交易內重建，完成前其他連線仍看到舊索引
+        with db.engine.begin() as conn:
+            indexed = rebuild_search_index(conn)
+    print(f"Rebuilt full-text search index for {indexed} trips.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+校正行程統計
+以 GROUP BY 從 trips 重新計算每位使用者的統計 (GET /api/trips/stats)，
+只改寫與計算結果不符的使用者。可定期執行 (例如 cron)，
+或在以 Core / SQL 直接修改 trips 之後執行
+
+用法: python reconcile_trip_stats.py [user_id ...]
+"""
+
+import sys
+
+from app import create_app
+from models import db
+from models.trip_stats import reconcile_trip_stats, user_id_chunks
+
+
+def main():
+    user_ids = [int(arg) for arg in sys.argv[1:]] or None
+    # 只需要資料庫，不載入路由、文件等子系統
+    app = create_app({'SUBSYSTEMS': ()})
+    with app.app_context():
+        if user_ids is None:
+            with db.engine.connect() as conn:
+                chunks = list(user_id_chunks(conn))
+        else:
+            chunks = [user_ids]
+        drifted = 0
+        # 每批各自一個交易，不會長時間阻擋其他寫入
+        for chunk in chunks:
+            with db.engine.begin() as conn:
+                drifted += reconcile_trip_stats(conn, chunk)
+    print(f"Reconciled trip statistics: {drifted} users corrected.")
+
+
+if __name__ == "__main__":
+    main()
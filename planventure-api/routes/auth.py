@@ -1,14 +1,26 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, g
 from models import db, User
-from utils.password_utils import hash_password
+from utils.password_utils import PasswordPoolBusy, PASSWORD_RETRY_AFTER
 from utils.jwt_utils import create_access_token
+from utils.rate_limit import rate_limit
+from utils.auth_middleware import auth_required
+from utils.token_denylist import revoke_token, revoke_all
+from utils.serializers import serialize_user
 import re
 
 auth_bp = Blueprint('auth', __name__)
 
 EMAIL_REGEX = r"^[\w\.-]+@[\w\.-]+\.\w+$"
 
+@auth_bp.errorhandler(PasswordPoolBusy)
+def password_pool_busy(e):
+    """密碼雜湊佇列已滿時快速回應 503，而不是讓請求排隊佔住 worker"""
+    response = jsonify({'error': 'Server is busy, please retry shortly.'})
+    response.headers['Retry-After'] = str(PASSWORD_RETRY_AFTER)
+    return response, 503
+
 @auth_bp.route('/register', methods=['POST'])
+@rate_limit('auth')
 def register():
     """
     用戶註冊
@@ -56,6 +68,8 @@ def register():
             error:
               type: string
               example: "Email and password are required."
+      503:
+        description: 密碼處理佇列已滿，請依 Retry-After 稍後重試
     """
     print("Register endpoint called")
     data = request.get_json()
@@ -80,6 +94,7 @@ def register():
     return jsonify({'message': 'User registered successfully.', 'token': token}), 201
 
 @auth_bp.route('/login', methods=['POST'])
+@rate_limit('auth')
 def login():
     """
     用戶登入
@@ -144,6 +159,8 @@ def login():
             error:
               type: string
               example: "Invalid email or password."
+      503:
+        description: 密碼處理佇列已滿，請依 Retry-After 稍後重試
     """
     data = request.get_json()
     email = data.get('email')
@@ -159,13 +176,72 @@ def login():
     user = User.query.filter_by(email=email).first()
     if not user or not user.check_password(password):
         return jsonify({'error': 'Invalid email or password.'}), 401
+
+    # 成本因子設定變更後，登入成功時以新成本重新雜湊
+    if user.password_needs_rehash():
+        user.set_password(password)
+        db.session.commit()
     
     token = create_access_token({"user_id": user.id, "email": user.email})
     return jsonify({
         'message': 'Login successful.',
         'token': token,
-        'user': {
-            'id': user.id,
-            'email': user.email
-        }
+        'user': serialize_user(user)
     }), 200
+
+@auth_bp.route('/logout', methods=['POST'])
+@auth_required
+@rate_limit('api')
+def logout():
+    """
+    登出 (撤銷目前使用的 token)
+    ---
+    tags:
+      - Authentication
+    security:
+      - Bearer: []
+    responses:
+      200:
+        description: 登出成功，此 token 之後的請求會回傳 401
+        schema:
+          type: object
+          properties:
+            message:
+              type: string
+              example: "Logged out successfully."
+      400:
+        description: 舊版 token 沒有 jti，無法單獨撤銷 (請改用 /auth/logout-all)
+      401:
+        description: 未授權
+    """
+    payload = g.jwt_payload
+    if not payload.get('jti') or not payload.get('exp'):
+        return jsonify({'error': 'This token cannot be revoked individually; use /auth/logout-all.'}), 400
+    revoke_token(payload)
+    return jsonify({'message': 'Logged out successfully.'}), 200
+
+@auth_bp.route('/logout-all', methods=['POST'])
+@auth_required
+@rate_limit('api')
+def logout_all():
+    """
+    登出所有裝置 (撤銷此用戶目前為止簽發的所有 token)
+    ---
+    tags:
+      - Authentication
+    security:
+      - Bearer: []
+    responses:
+      200:
+        description: 已撤銷所有 token，需重新登入
+        schema:
+          type: object
+          properties:
+            message:
+              type: string
+              example: "Logged out from all sessions."
+      401:
+        description: 未授權
+    """
+    revoke_all(g.current_user_id)
+    return jsonify({'message': 'Logged out from all sessions.'}), 200
@@ -0,0 +1,390 @@
+from flask import Blueprint, request, jsonify
+from models import db, Trip, ItineraryItem
+from models.itinerary import parse_itinerary_entry
+from utils.rate_limit import rate_limit
+from utils.auth_middleware import auth_required, get_current_user
+from utils.etag_utils import trip_etag
+from utils.response_cache import invalidate_trips
+from sqlalchemy import func
+from sqlalchemy.orm import load_only
+from sqlalchemy.orm.exc import StaleDataError
+
+itinerary_bp = Blueprint('itinerary', __name__)
+
+def get_owned_trip(trip_id, user_id):
+    """只載入驗證擁有者與遞增版本所需的欄位"""
+    return (
+        Trip.query.options(load_only(Trip.id, Trip.user_id, Trip.version))
+        .filter_by(id=trip_id, user_id=user_id)
+        .first()
+    )
+
+def serialize_item(item):
+    """單一項目的回應格式，包含項目端點需要的 id 與 position"""
+    data = item.to_dict()
+    data['id'] = item.id
+    data['position'] = item.position
+    return data
+
+def count_day_items(trip_id, day, exclude_id=None):
+    query = db.session.query(func.count(ItineraryItem.id)).filter(
+        ItineraryItem.trip_id == trip_id,
+        ItineraryItem.day == day
+    )
+    if exclude_id is not None:
+        query = query.filter(ItineraryItem.id != exclude_id)
+    return query.scalar()
+
+def shift_positions(trip_id, day, from_position, delta, exclude_id=None):
+    """將同一天 position >= from_position 的項目位移 delta，只影響該天的索引範圍"""
+    query = ItineraryItem.query.filter(
+        ItineraryItem.trip_id == trip_id,
+        ItineraryItem.day == day,
+        ItineraryItem.position >= from_position
+    )
+    if exclude_id is not None:
+        query = query.filter(ItineraryItem.id != exclude_id)
+    query.update({ItineraryItem.position: ItineraryItem.position + delta}, synchronize_session=False)
+
+def parse_position(value, upper_bound):
+    """解析目標位置，省略時放在最後，超出範圍時夾在 [0, upper_bound]"""
+    if value is None:
+        return upper_bound
+    if not isinstance(value, int) or isinstance(value, bool):
+        raise ValueError('position must be an integer')
+    return max(0, min(value, upper_bound))
+
+def commit_with_etag(trip, body, status):
+    """遞增行程版本並提交，回應帶有新的行程 ETag"""
+    trip.touch()
+    db.session.commit()
+    invalidate_trips(trip.user_id, trip.id)
+    response = jsonify(body)
+    response.set_etag(trip_etag(trip.id, trip.version))
+    return response, status
+
+@itinerary_bp.route('/trips/<int:trip_id>/itinerary/<int:day>', methods=['GET'])
+@auth_required
+@rate_limit('api')
+def get_itinerary_day(trip_id, day):
+    """
+    獲取行程某一天的規劃
+    ---
+    tags:
+      - Itinerary
+    security:
+      - Bearer: []
+    parameters:
+      - in: path
+        name: trip_id
+        type: integer
+        required: true
+        description: 行程 ID
+      - in: path
+        name: day
+        type: integer
+        required: true
+        description: 第幾天
+    responses:
+      200:
+        description: 成功獲取單日規劃
+        schema:
+          type: object
+          properties:
+            trip_id:
+              type: integer
+              example: 1
+            day:
+              type: integer
+              example: 1
+            items:
+              type: array
+              items:
+                type: object
+                properties:
+                  id:
+                    type: integer
+                    example: 10
+                  day:
+                    type: integer
+                    example: 1
+                  position:
+                    type: integer
+                    example: 0
+                  plan:
+                    type: string
+                    example: "參觀淺草寺"
+      401:
+        description: 未授權
+      404:
+        description: 行程不存在
+    """
+    try:
+        user = get_current_user()
+        if not user:
+            return jsonify({'msg': 'User not found'}), 401
+
+        items = (
+            ItineraryItem.query.join(Trip)
+            .filter(Trip.id == trip_id, Trip.user_id == user.id, ItineraryItem.day == day)
+            .order_by(ItineraryItem.position)
+            .all()
+        )
+        # 沒有項目時才需要確認行程是否存在
+        if not items and not get_owned_trip(trip_id, user.id):
+            return jsonify({'msg': 'Trip not found'}), 404
+
+        return jsonify({
+            'trip_id': trip_id,
+            'day': day,
+            'items': [serialize_item(item) for item in items]
+        }), 200
+
+    except Exception as e:
+        return jsonify({'msg': f'Error fetching itinerary: {str(e)}'}), 500
+
+@itinerary_bp.route('/trips/<int:trip_id>/itinerary/<int:day>/items', methods=['POST'])
+@auth_required
+@rate_limit('api')
+def create_itinerary_item(trip_id, day):
+    """
+    在行程某一天插入規劃項目
+    ---
+    tags:
+      - Itinerary
+    security:
+      - Bearer: []
+    parameters:
+      - in: path
+        name: trip_id
+        type: integer
+        required: true
+        description: 行程 ID
+      - in: path
+        name: day
+        type: integer
+        required: true
+        description: 第幾天
+      - in: body
+        name: item
+        required: true
+        schema:
+          type: object
+          properties:
+            plan:
+              type: string
+              example: "築地市場早餐"
+            position:
+              type: integer
+              description: 插入位置 (從 0 開始)，省略時加在最後
+              example: 0
+    responses:
+      201:
+        description: 項目新增成功
+      400:
+        description: 請求資料錯誤
+      401:
+        description: 未授權
+      404:
+        description: 行程不存在
+      412:
+        description: 行程已被其他請求修改，變更未套用
+    """
+    try:
+        user = get_current_user()
+        if not user:
+            return jsonify({'msg': 'User not found'}), 401
+
+        trip = get_owned_trip(trip_id, user.id)
+        if not trip:
+            return jsonify({'msg': 'Trip not found'}), 404
+
+        data = request.get_json()
+        if not data:
+            return jsonify({'msg': 'No data provided'}), 400
+
+        try:
+            fields = parse_itinerary_entry({**data, 'day': day})
+            position = parse_position(data.get('position'), count_day_items(trip_id, day))
+        except ValueError as e:
+            return jsonify({'msg': f'Invalid itinerary item: {str(e)}'}), 400
+
+        shift_positions(trip_id, day, position, 1)
+        item = ItineraryItem(trip_id=trip_id, position=position, **fields)
+        db.session.add(item)
+        db.session.flush()
+
+        return commit_with_etag(trip, {
+            'message': 'Itinerary item created successfully',
+            'item': serialize_item(item)
+        }, 201)
+
+    except StaleDataError:
+        # 讀取後、提交前行程版本已被其他請求更新 (例如同時編輯同一行程的項目)
+        db.session.rollback()
+        return jsonify({'msg': 'Trip has been modified by another request'}), 412
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'msg': f'Error creating itinerary item: {str(e)}'}), 500
+
+@itinerary_bp.route('/trips/<int:trip_id>/itinerary/items/<int:item_id>', methods=['PUT'])
+@auth_required
+@rate_limit('api')
+def update_itinerary_item(trip_id, item_id):
+    """
+    更新或移動規劃項目
+    ---
+    tags:
+      - Itinerary
+    security:
+      - Bearer: []
+    parameters:
+      - in: path
+        name: trip_id
+        type: integer
+        required: true
+        description: 行程 ID
+      - in: path
+        name: item_id
+        type: integer
+        required: true
+        description: 項目 ID
+      - in: body
+        name: item
+        required: true
+        schema:
+          type: object
+          properties:
+            plan:
+              type: string
+              example: "改去上野公園"
+            day:
+              type: integer
+              description: 移動到第幾天
+              example: 2
+            position:
+              type: integer
+              description: 移動到的位置 (從 0 開始)
+              example: 1
+    responses:
+      200:
+        description: 項目更新成功
+      400:
+        description: 請求資料錯誤
+      401:
+        description: 未授權
+      404:
+        description: 行程或項目不存在
+      412:
+        description: 行程已被其他請求修改，變更未套用
+    """
+    try:
+        user = get_current_user()
+        if not user:
+            return jsonify({'msg': 'User not found'}), 401
+
+        trip = get_owned_trip(trip_id, user.id)
+        if not trip:
+            return jsonify({'msg': 'Trip not found'}), 404
+
+        item = ItineraryItem.query.filter_by(id=item_id, trip_id=trip_id).first()
+        if not item:
+            return jsonify({'msg': 'Itinerary item not found'}), 404
+
+        data = request.get_json()
+        if not data:
+            return jsonify({'msg': 'No data provided'}), 400
+
+        try:
+            fields = parse_itinerary_entry({**item.to_dict(), **data})
+        except ValueError as e:
+            return jsonify({'msg': f'Invalid itinerary item: {str(e)}'}), 400
+
+        # 移動項目: 先補上原位置的空缺，再在目標位置騰出空間
+        if 'day' in data or 'position' in data:
+            shift_positions(trip_id, item.day, item.position + 1, -1, exclude_id=item.id)
+            try:
+                position = parse_position(
+                    data.get('position'),
+                    count_day_items(trip_id, fields['day'], exclude_id=item.id)
+                )
+            except ValueError as e:
+                db.session.rollback()
+                return jsonify({'msg': f'Invalid itinerary item: {str(e)}'}), 400
+            shift_positions(trip_id, fields['day'], position, 1, exclude_id=item.id)
+            item.position = position
+
+        item.day = fields['day']
+        item.plan = fields['plan']
+        item.details = fields['details']
+
+        return commit_with_etag(trip, {
+            'message': 'Itinerary item updated successfully',
+            'item': serialize_item(item)
+        }, 200)
+
+    except StaleDataError:
+        # 讀取後、提交前行程版本已被其他請求更新 (例如同時編輯同一行程的項目)
+        db.session.rollback()
+        return jsonify({'msg': 'Trip has been modified by another request'}), 412
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'msg': f'Error updating itinerary item: {str(e)}'}), 500
+
+@itinerary_bp.route('/trips/<int:trip_id>/itinerary/items/<int:item_id>', methods=['DELETE'])
+@auth_required
+@rate_limit('api')
+def delete_itinerary_item(trip_id, item_id):
+    """
+    刪除規劃項目
+    ---
+    tags:
+      - Itinerary
+    security:
+      - Bearer: []
+    parameters:
+      - in: path
+        name: trip_id
+        type: integer
+        required: true
+        description: 行程 ID
+      - in: path
+        name: item_id
+        type: integer
+        required: true
+        description: 項目 ID
+    responses:
+      200:
+        description: 項目刪除成功
+      401:
+        description: 未授權
+      404:
+        description: 行程或項目不存在
+      412:
+        description: 行程已被其他請求修改，變更未套用
+    """
+    try:
+        user = get_current_user()
+        if not user:
+            return jsonify({'msg': 'User not found'}), 401
+
+        trip = get_owned_trip(trip_id, user.id)
+        if not trip:
+            return jsonify({'msg': 'Trip not found'}), 404
+
+        item = ItineraryItem.query.filter_by(id=item_id, trip_id=trip_id).first()
+        if not item:
+            return jsonify({'msg': 'Itinerary item not found'}), 404
+
+        db.session.delete(item)
+        shift_positions(trip_id, item.day, item.position + 1, -1, exclude_id=item.id)
+
+        return commit_with_etag(trip, {'message': 'Itinerary item deleted successfully'}, 200)
+
+    except StaleDataError:
+        # 讀取後、提交前行程版本已被其他請求更新 (例如同時編輯同一行程的項目)
+        db.session.rollback()
+        return jsonify({'msg': 'Trip has been modified by another request'}), 412
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'msg': f'Error deleting itinerary item: {str(e)}'}), 500
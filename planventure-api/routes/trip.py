@@ -1,28 +1,98 @@
-from flask import Blueprint, request, jsonify, g
-from models import db, Trip, User
-from utils.auth_middleware import auth_required
-from utils.jwt_utils import verify_access_token
+from flask import Blueprint, request, jsonify, current_app, stream_with_context
+from models import db, Trip, ItineraryItem
+from models.trip_search import reindex_trips, remove_trips, search_index_available
+from models.trip_stats import TripStats, TripDestinationStats, apply_trip_deltas
+from utils.rate_limit import rate_limit
+from utils.replica import prefer_replica
+from utils.auth_middleware import auth_required, get_current_user
+from utils.trip_validation import validate_trip_data, parse_date, TripValidationError
+from utils.trip_overlap import (
+    parse_overlap_policy, date_range_filter, find_overlapping_trips
+)
+from utils.trip_bulk import bulk_insert_trips, import_trips_ndjson
+from utils.serializers import TRIP_FIELDS, SUMMARY_FIELDS, serialize_trip
+from utils.response_cache import cache_response, invalidate_trips, TRIPS_ROUTE, TRIP_ROUTE
+from utils.pagination import (
+    encode_cursor, decode_cursor, encode_offset_cursor, decode_offset_cursor, parse_limit
+)
+from utils.geo import parse_coordinates
+from utils.trip_nearby import nearby_trip_distances
+from utils.trip_search import build_match_query, search_trip_matches
+from utils.compression import compress_level
+from utils.etag_utils import (
+    trip_etag, trip_list_etag, is_not_modified, precondition_failed, not_modified_response
+)
+from sqlalchemy import select, tuple_, insert, update, delete, func
+from sqlalchemy.orm import load_only, selectinload
+from sqlalchemy.orm.exc import StaleDataError
+from config.compression_config import COMPRESSION_LIST_GZIP_LEVEL, COMPRESSION_LIST_BROTLI_QUALITY
 from datetime import datetime
-import json
+import os
 
 trip_bp = Blueprint('trip', __name__)
 
-def get_current_user():
-    """從 JWT token 中獲取當前用戶"""
-    auth_header = request.headers.get('Authorization', None)
-    if not auth_header or not auth_header.startswith('Bearer '):
-        return None
-    
-    token = auth_header.split(' ')[1]
-    payload = verify_access_token(token)
-    if not payload:
-        return None
-    
-    user = User.query.get(payload['user_id'])
-    return user
+# GET 端點可從唯讀副本讀取 (有設定 DATABASE_REPLICA_URL 時)
+prefer_replica(trip_bp)
+
+# 批次端點單次請求的操作上限
+BATCH_MAX_OPERATIONS = int(os.getenv('TRIPS_BATCH_MAX_OPERATIONS', '500'))
+BATCH_OPERATIONS = ('create', 'update', 'delete')
+
+# 匯出時每批從資料庫讀取的行程數量
+EXPORT_CHUNK_SIZE = int(os.getenv('TRIPS_EXPORT_CHUNK_SIZE', '500'))
+
+# 附近行程搜尋的預設與最大半徑 (公里)
+NEARBY_DEFAULT_RADIUS_KM = float(os.getenv('TRIPS_NEARBY_DEFAULT_RADIUS_KM', '10'))
+NEARBY_MAX_RADIUS_KM = float(os.getenv('TRIPS_NEARBY_MAX_RADIUS_KM', '1000'))
+
+# 統計端點回傳的熱門目的地數量 (預設與上限)
+STATS_DEFAULT_TOP_DESTINATIONS = 5
+STATS_MAX_TOP_DESTINATIONS = 20
+
+def parse_trip_fields(args):
+    """依 fields / view 查詢參數決定要回傳的欄位"""
+    fields = args.get('fields')
+    if fields:
+        requested = [field.strip() for field in fields.split(',') if field.strip()]
+        unknown = [field for field in requested if field not in TRIP_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+        # id 永遠回傳，方便客戶端識別行程
+        return tuple(dict.fromkeys(['id'] + requested))
+
+    view = args.get('view', 'full')
+    if view == 'summary':
+        return SUMMARY_FIELDS
+    if view == 'full':
+        return TRIP_FIELDS
+    raise ValueError(f'Unknown view: {view}')
+
+def load_trip_fields(query, fields):
+    """只從資料庫讀取需要的欄位；start_date 與 id 為分頁排序鍵，一定要載入"""
+    if fields != TRIP_FIELDS:
+        columns = (set(fields) - {'itinerary'}) | {'id', 'start_date'}
+        query = query.options(load_only(*[getattr(Trip, column) for column in columns]))
+    # 行程規劃以一次 IN 查詢批次載入，避免逐筆查詢
+    if 'itinerary' in fields:
+        query = query.options(selectinload(Trip.itinerary_items))
+    return query
+
+def is_trip_id(value):
+    """JSON 中的行程 ID 必須是整數 (true/false 在 Python 中也是 int，需排除)"""
+    return isinstance(value, int) and not isinstance(value, bool)
+
+def overlap_conflict(policy, user_id, start_date, end_date, exclude_id=None):
+    """依 on_overlap 政策檢查日期重疊，回傳 (重疊的行程, 需要直接回傳的 409 回應或 None)"""
+    if policy == 'ignore':
+        return [], None
+    overlapping = find_overlapping_trips(user_id, start_date, end_date, exclude_id=exclude_id)
+    if overlapping and policy == 'reject':
+        return overlapping, (jsonify({'msg': 'Trip overlaps existing trips', 'overlapping_trips': overlapping}), 409)
+    return overlapping, None
 
 @trip_bp.route('/trips', methods=['POST'])
 @auth_required
+@rate_limit('api')
 def create_trip():
     """
     創建新行程
@@ -79,9 +149,15 @@ def create_trip():
                   plan:
                     type: string
                     example: "參觀淺草寺"
+      - in: query
+        name: on_overlap
+        type: string
+        enum: [warn, reject, ignore]
+        required: false
+        description: 與既有行程日期重疊時的處理方式 (預設 warn，由 TRIPS_OVERLAP_POLICY 設定)
     responses:
       201:
-        description: 行程創建成功
+        description: 行程創建成功 (warn 時若有重疊，另外回傳 overlapping_trips)
         schema:
           type: object
           properties:
@@ -103,10 +179,15 @@ def create_trip():
                 end_date:
                   type: string
                   example: "2024-03-07"
+            overlapping_trips:
+              type: array
+              description: 日期重疊的既有行程 (僅 warn 且有重疊時)
       400:
         description: 請求資料錯誤
       401:
         description: 未授權
+      409:
+        description: 與既有行程日期重疊 (on_overlap=reject)
     """
     try:
         user = get_current_user()
@@ -114,57 +195,45 @@ def create_trip():
             return jsonify({'msg': 'User not found'}), 401
 
         data = request.get_json()
-        if not data:
-            return jsonify({'msg': 'No data provided'}), 400
-
-        # 驗證必填欄位
-        required_fields = ['destination', 'start_date', 'end_date']
-        for field in required_fields:
-            if field not in data or not data[field]:
-                return jsonify({'msg': f'Missing required field: {field}'}), 400
-
-        # 驗證日期格式
         try:
-            start_date = datetime.strptime(data['start_date'], '%Y-%m-%d').date()
-            end_date = datetime.strptime(data['end_date'], '%Y-%m-%d').date()
-        except ValueError:
-            return jsonify({'msg': 'Invalid date format. Use YYYY-MM-DD'}), 400
+            fields = validate_trip_data(data)
+            overlap_policy = parse_overlap_policy(request.args.get('on_overlap'))
+        except ValueError as e:
+            return jsonify({'msg': str(e)}), 400
 
-        # 驗證日期邏輯
-        if start_date >= end_date:
-            return jsonify({'msg': 'End date must be after start date'}), 400
+        overlapping, conflict = overlap_conflict(overlap_policy, user.id, fields['start_date'], fields['end_date'])
+        if conflict:
+            return conflict
 
         # 創建新行程
-        trip = Trip(
-            user_id=user.id,
-            destination=data['destination'],
-            start_date=start_date,
-            end_date=end_date,
-            coordinates=data.get('coordinates'),
-            itinerary=data.get('itinerary')
-        )
+        itinerary_rows = fields.pop('itinerary_rows', None)
+        trip = Trip(user_id=user.id, **fields)
+        if itinerary_rows:
+            trip.set_itinerary_rows(itinerary_rows)
 
         db.session.add(trip)
         db.session.commit()
+        invalidate_trips(user.id)
 
-        return jsonify({
+        body = {
             'message': 'Trip created successfully',
-            'trip': {
-                'id': trip.id,
-                'destination': trip.destination,
-                'start_date': trip.start_date.isoformat(),
-                'end_date': trip.end_date.isoformat(),
-                'coordinates': trip.coordinates,
-                'itinerary': trip.itinerary
-            }
-        }), 201
+            'trip': serialize_trip(trip)
+        }
+        if overlapping:
+            body['overlapping_trips'] = overlapping
+        response = jsonify(body)
+        response.set_etag(trip_etag(trip.id, trip.version))
+        return response, 201
 
     except Exception as e:
         db.session.rollback()
         return jsonify({'msg': f'Error creating trip: {str(e)}'}), 500
 
 @trip_bp.route('/trips', methods=['GET'])
+@compress_level(gzip_level=COMPRESSION_LIST_GZIP_LEVEL, brotli_quality=COMPRESSION_LIST_BROTLI_QUALITY)
 @auth_required
+@rate_limit('api')
+@cache_response(TRIPS_ROUTE)
 def get_user_trips():
     """
     獲取用戶的所有行程
@@ -173,12 +242,54 @@ def get_user_trips():
       - Trips
     security:
       - Bearer: []
+    parameters:
+      - in: query
+        name: limit
+        type: integer
+        required: false
+        description: 每頁筆數 (提供 limit 或 cursor 時啟用分頁，上限 200)
+      - in: query
+        name: cursor
+        type: string
+        required: false
+        description: 上一頁回應中的 next_cursor
+      - in: header
+        name: If-None-Match
+        type: string
+        required: false
+        description: 先前取得的 ETag，列表未變更時回傳 304
+      - in: query
+        name: view
+        type: string
+        enum: [full, summary]
+        required: false
+        description: summary 只回傳 id、destination 與日期，不讀取 coordinates 與 itinerary
+      - in: query
+        name: fields
+        type: string
+        required: false
+        description: 以逗號分隔的欄位清單 (例如 destination,start_date)，優先於 view
+      - in: query
+        name: from
+        type: string
+        format: date
+        required: false
+        description: 只回傳結束日期不早於此日的行程 (YYYY-MM-DD)
+      - in: query
+        name: to
+        type: string
+        format: date
+        required: false
+        description: 只回傳開始日期不晚於此日的行程 (YYYY-MM-DD)
     responses:
       200:
-        description: 成功獲取行程列表
+        description: 成功獲取行程列表 (依 start_date, id 排序)
         schema:
           type: object
           properties:
+            next_cursor:
+              type: string
+              description: 下一頁的 cursor，已無更多資料時為 null
             trips:
               type: array
               items:
@@ -200,6 +311,10 @@ def get_user_trips():
                     type: object
                   itinerary:
                     type: array
+      304:
+        description: 列表未變更 (If-None-Match 與目前 ETag 相符)
+      400:
+        description: 分頁、欄位或日期參數錯誤
       401:
         description: 未授權
     """
@@ -208,26 +323,388 @@ def get_user_trips():
         if not user:
             return jsonify({'msg': 'User not found'}), 401
 
-        trips = Trip.query.filter_by(user_id=user.id).all()
-        
-        trips_data = []
-        for trip in trips:
-            trips_data.append({
-                'id': trip.id,
-                'destination': trip.destination,
-                'start_date': trip.start_date.isoformat(),
-                'end_date': trip.end_date.isoformat(),
-                'coordinates': trip.coordinates,
-                'itinerary': trip.itinerary
+        try:
+            fields = parse_trip_fields(request.args)
+        except ValueError as e:
+            return jsonify({'msg': str(e)}), 400
+
+        # from/to: 只回傳與此期間 (含首尾) 有交集的行程
+        try:
+            date_from = parse_date(request.args['from']) if request.args.get('from') else None
+            date_to = parse_date(request.args['to']) if request.args.get('to') else None
+        except ValueError:
+            return jsonify({'msg': 'Invalid from/to date format. Use YYYY-MM-DD'}), 400
+        if date_from and date_to and date_from > date_to:
+            return jsonify({'msg': 'from must not be after to'}), 400
+
+        query = (
+            Trip.query.filter_by(user_id=user.id)
+            .filter(*date_range_filter(date_from, date_to))
+            .order_by(Trip.start_date, Trip.id)
+        )
+
+        # 提供 limit 或 cursor 時使用 keyset 分頁，否則維持回傳全部行程
+        paginate = 'limit' in request.args or 'cursor' in request.args
+        if paginate:
+            try:
+                limit = parse_limit(request.args.get('limit'))
+                cursor = request.args.get('cursor')
+                if cursor:
+                    after = decode_cursor(cursor)
+                    query = query.filter(tuple_(Trip.start_date, Trip.id) > tuple_(*after))
+            except ValueError as e:
+                return jsonify({'msg': f'Invalid pagination parameters: {str(e)}'}), 400
+
+            # 多取一筆以判斷是否還有下一頁
+            query = query.limit(limit + 1)
+
+        # 先只讀取 (id, version) 計算 ETag，內容未變更時直接回傳 304
+        keys = query.with_entities(Trip.id, Trip.version).all()
+        has_more = paginate and len(keys) > limit
+        if has_more:
+            keys = keys[:limit]
+        etag = trip_list_etag(keys, fields, request.args.get('limit'), request.args.get('cursor'), has_more)
+        if is_not_modified(etag):
+            return not_modified_response(etag)
+
+        trips = load_trip_fields(query, fields).all()
+        next_cursor = None
+        if paginate and len(trips) > limit:
+            trips = trips[:limit]
+            next_cursor = encode_cursor(trips[-1].start_date, trips[-1].id)
+
+        trips_data = [serialize_trip(trip, fields) for trip in trips]
+
+        response = jsonify({'trips': trips_data, 'next_cursor': next_cursor})
+        response.set_etag(etag)
+        return response, 200
+
+    except Exception as e:
+        return jsonify({'msg': f'Error fetching trips: {str(e)}'}), 500
+
+@trip_bp.route('/trips/nearby', methods=['GET'])
+@auth_required
+@rate_limit('api')
+def get_nearby_trips():
+    """
+    搜尋指定座標附近的行程
+    ---
+    tags:
+      - Trips
+    security:
+      - Bearer: []
+    parameters:
+      - in: query
+        name: lat
+        type: number
+        required: true
+        description: 緯度
+      - in: query
+        name: lng
+        type: number
+        required: true
+        description: 經度
+      - in: query
+        name: radius_km
+        type: number
+        required: false
+        description: 搜尋半徑 (公里，預設 10，上限 1000)
+      - in: query
+        name: limit
+        type: integer
+        required: false
+        description: 最多回傳筆數 (預設 50，上限 200)
+      - in: query
+        name: view
+        type: string
+        enum: [full, summary]
+        required: false
+        description: summary 只回傳 id、destination 與日期
+      - in: query
+        name: fields
+        type: string
+        required: false
+        description: 以逗號分隔的欄位清單，優先於 view
+    responses:
+      200:
+        description: 半徑內的行程，依距離由近到遠排序
+        schema:
+          type: object
+          properties:
+            trips:
+              type: array
+              items:
+                type: object
+                properties:
+                  id:
+                    type: integer
+                    example: 1
+                  destination:
+                    type: string
+                    example: "東京"
+                  distance_km:
+                    type: number
+                    example: 3.214
+      400:
+        description: 座標、半徑或欄位參數錯誤
+      401:
+        description: 未授權
+    """
+    try:
+        user = get_current_user()
+        if not user:
+            return jsonify({'msg': 'User not found'}), 401
+
+        if 'lat' not in request.args or 'lng' not in request.args:
+            return jsonify({'msg': 'lat and lng are required'}), 400
+        try:
+            lat, lng = parse_coordinates({
+                'lat': float(request.args['lat']),
+                'lng': float(request.args['lng'])
             })
+            radius_km = float(request.args.get('radius_km', NEARBY_DEFAULT_RADIUS_KM))
+            if not 0 < radius_km <= NEARBY_MAX_RADIUS_KM:
+                raise ValueError(f'radius_km must be greater than 0 and at most {NEARBY_MAX_RADIUS_KM:g}')
+            limit = parse_limit(request.args.get('limit'))
+            fields = parse_trip_fields(request.args)
+        except ValueError as e:
+            return jsonify({'msg': f'Invalid parameters: {str(e)}'}), 400
+
+        nearest = dict(nearby_trip_distances(user.id, lat, lng, radius_km, limit))
+
+        trips = {}
+        if nearest:
+            query = Trip.query.filter(Trip.user_id == user.id, Trip.id.in_(nearest))
+            trips = {trip.id: trip for trip in load_trip_fields(query, fields)}
 
+        trips_data = [
+            {**serialize_trip(trips[trip_id], fields), 'distance_km': round(distance, 3)}
+            for trip_id, distance in nearest.items() if trip_id in trips
+        ]
         return jsonify({'trips': trips_data}), 200
 
     except Exception as e:
-        return jsonify({'msg': f'Error fetching trips: {str(e)}'}), 500
+        return jsonify({'msg': f'Error searching nearby trips: {str(e)}'}), 500
+
+@trip_bp.route('/trips/search', methods=['GET'])
+@auth_required
+@rate_limit('api')
+def search_trips():
+    """
+    全文檢索行程目的地與行程規劃
+    ---
+    tags:
+      - Trips
+    security:
+      - Bearer: []
+    description: >
+      所有詞都必須出現 (最後一個詞也比對字首)，依相關度排序；
+      目的地命中的權重高於行程規劃內文。
+    parameters:
+      - in: query
+        name: q
+        type: string
+        required: true
+        description: 搜尋字詞 (最多 200 字元)
+      - in: query
+        name: limit
+        type: integer
+        required: false
+        description: 每頁筆數 (預設 50，上限 200)
+      - in: query
+        name: cursor
+        type: string
+        required: false
+        description: 上一頁回應的 next_cursor
+      - in: query
+        name: view
+        type: string
+        enum: [full, summary]
+        required: false
+        description: summary 只回傳 id、destination 與日期
+      - in: query
+        name: fields
+        type: string
+        required: false
+        description: 以逗號分隔的欄位清單，優先於 view
+    responses:
+      200:
+        description: 符合的行程，依相關度排序
+        schema:
+          type: object
+          properties:
+            trips:
+              type: array
+              items:
+                type: object
+                properties:
+                  id:
+                    type: integer
+                    example: 1
+                  destination:
+                    type: string
+                    example: "東京"
+                  score:
+                    type: number
+                    example: 4.2187
+                  snippet:
+                    type: string
+                    description: HTML 跳脫後的摘要，命中詞以 <mark> 標示
+                    example: "…築地市場吃<mark>拉麵</mark>…"
+            next_cursor:
+              type: string
+              description: 下一頁的 cursor，沒有下一頁時為 null
+      400:
+        description: 查詢字詞、分頁或欄位參數錯誤
+      401:
+        description: 未授權
+      501:
+        description: 資料庫沒有全文檢索索引
+    """
+    try:
+        user = get_current_user()
+        if not user:
+            return jsonify({'msg': 'User not found'}), 401
+
+        match_query = build_match_query(request.args.get('q', ''), user.id)
+        if match_query is None:
+            return jsonify({'msg': 'q must contain at least one word'}), 400
+        try:
+            limit = parse_limit(request.args.get('limit'))
+            offset = decode_offset_cursor(request.args.get('cursor'))
+            fields = parse_trip_fields(request.args)
+        except ValueError as e:
+            return jsonify({'msg': f'Invalid parameters: {str(e)}'}), 400
+
+        if not search_index_available(db.session.connection()):
+            return jsonify({'msg': 'Full-text search is not available'}), 501
+
+        # 多取一筆判斷是否還有下一頁
+        matches = search_trip_matches(match_query, limit + 1, offset)
+        next_cursor = encode_offset_cursor(offset + limit) if len(matches) > limit else None
+        matches = matches[:limit]
+
+        trips = {}
+        if matches:
+            query = Trip.query.filter(Trip.user_id == user.id, Trip.id.in_([match[0] for match in matches]))
+            trips = {trip.id: trip for trip in load_trip_fields(query, fields)}
+
+        trips_data = [
+            {**serialize_trip(trips[trip_id], fields), 'score': score, 'snippet': snippet}
+            for trip_id, score, snippet in matches if trip_id in trips
+        ]
+        return jsonify({'trips': trips_data, 'next_cursor': next_cursor}), 200
+
+    except Exception as e:
+        return jsonify({'msg': f'Error searching trips: {str(e)}'}), 500
+
+@trip_bp.route('/trips/stats', methods=['GET'])
+@auth_required
+@rate_limit('api')
+def get_trip_stats():
+    """
+    取得用戶的行程統計
+    ---
+    tags:
+      - Trips
+    security:
+      - Bearer: []
+    description: >
+      行程數、旅行天數與熱門目的地來自寫入行程時同步更新的統計資料表，
+      不需要讀取全部行程；即將出發的行程依當天日期 (UTC) 由索引計算。
+    parameters:
+      - in: query
+        name: top
+        type: integer
+        required: false
+        description: 熱門目的地數量 (預設 5，上限 20)
+    responses:
+      200:
+        description: 行程統計
+        schema:
+          type: object
+          properties:
+            trip_count:
+              type: integer
+              example: 12
+            total_days:
+              type: integer
+              description: 各行程天數 (含首尾兩天) 的總和
+              example: 58
+            upcoming_trips:
+              type: integer
+              description: 今天或之後出發的行程數
+              example: 3
+            next_trip:
+              type: object
+              description: 下一個出發的行程 (id、destination 與日期)，沒有時為 null
+            top_destinations:
+              type: array
+              items:
+                type: object
+                properties:
+                  destination:
+                    type: string
+                    example: "東京"
+                  trip_count:
+                    type: integer
+                    example: 4
+      400:
+        description: top 參數錯誤
+      401:
+        description: 未授權
+    """
+    try:
+        user = get_current_user()
+        if not user:
+            return jsonify({'msg': 'User not found'}), 401
+
+        try:
+            top = int(request.args.get('top', STATS_DEFAULT_TOP_DESTINATIONS))
+        except ValueError:
+            top = 0
+        if top < 1:
+            return jsonify({'msg': 'Invalid parameters: top must be a positive integer'}), 400
+        top = min(top, STATS_MAX_TOP_DESTINATIONS)
+
+        # 以主鍵讀取彙總；尚未建立行程的用戶沒有資料列
+        stats = db.session.get(TripStats, user.id)
+        top_destinations = (
+            db.session.query(TripDestinationStats.destination, TripDestinationStats.trip_count)
+            .filter(TripDestinationStats.user_id == user.id)
+            .order_by(TripDestinationStats.trip_count.desc(), TripDestinationStats.destination)
+            .limit(top)
+            .all()
+        )
+
+        # 「即將出發」隨日期改變，無法預先彙總；在 (user_id, start_date, ...) 索引上計算
+        today = datetime.utcnow().date()
+        upcoming = Trip.query.filter(Trip.user_id == user.id, Trip.start_date >= today)
+        upcoming_count = upcoming.with_entities(func.count(Trip.id)).scalar()
+        next_trip = (
+            upcoming.options(load_only(*[getattr(Trip, field) for field in SUMMARY_FIELDS]))
+            .order_by(Trip.start_date, Trip.id)
+            .first()
+        )
+
+        return jsonify({
+            'trip_count': stats.trip_count if stats else 0,
+            'total_days': stats.total_days if stats else 0,
+            'upcoming_trips': upcoming_count,
+            'next_trip': serialize_trip(next_trip, SUMMARY_FIELDS) if next_trip else None,
+            'top_destinations': [
+                {'destination': destination, 'trip_count': count}
+                for destination, count in top_destinations
+            ]
+        }), 200
+
+    except Exception as e:
+        return jsonify({'msg': f'Error getting trip stats: {str(e)}'}), 500
 
 @trip_bp.route('/trips/<int:trip_id>', methods=['GET'])
 @auth_required
+@rate_limit('api')
+@cache_response(TRIP_ROUTE)
 def get_trip(trip_id):
     """
     獲取特定行程詳情
@@ -242,6 +719,11 @@ def get_trip(trip_id):
         type: integer
         required: true
         description: 行程 ID
+      - in: header
+        name: If-None-Match
+        type: string
+        required: false
+        description: 先前取得的 ETag，內容未變更時回傳 304
     responses:
       200:
         description: 成功獲取行程詳情
@@ -267,6 +749,12 @@ def get_trip(trip_id):
                   type: object
                 itinerary:
                   type: array
+        headers:
+          ETag:
+            type: string
+            description: 行程版本的強 ETag
+      304:
+        description: 行程未變更 (If-None-Match 與目前 ETag 相符)
       401:
         description: 未授權
       404:
@@ -277,26 +765,30 @@ def get_trip(trip_id):
         if not user:
             return jsonify({'msg': 'User not found'}), 401
 
+        # 先只讀取 version 計算 ETag，內容未變更時不需載入與序列化整筆行程
+        version = db.session.query(Trip.version).filter_by(id=trip_id, user_id=user.id).scalar()
+        if version is None:
+            return jsonify({'msg': 'Trip not found'}), 404
+        etag = trip_etag(trip_id, version)
+        if is_not_modified(etag):
+            return not_modified_response(etag)
+
         trip = Trip.query.filter_by(id=trip_id, user_id=user.id).first()
         if not trip:
             return jsonify({'msg': 'Trip not found'}), 404
 
-        trip_data = {
-            'id': trip.id,
-            'destination': trip.destination,
-            'start_date': trip.start_date.isoformat(),
-            'end_date': trip.end_date.isoformat(),
-            'coordinates': trip.coordinates,
-            'itinerary': trip.itinerary
-        }
+        trip_data = serialize_trip(trip)
 
-        return jsonify({'trip': trip_data}), 200
+        response = jsonify({'trip': trip_data})
+        response.set_etag(trip_etag(trip.id, trip.version))
+        return response, 200
 
     except Exception as e:
         return jsonify({'msg': f'Error fetching trip: {str(e)}'}), 500
 
 @trip_bp.route('/trips/<int:trip_id>', methods=['PUT'])
 @auth_required
+@rate_limit('api')
 def update_trip(trip_id):
     """
     更新行程
@@ -338,9 +830,20 @@ def update_trip(trip_id):
             itinerary:
               type: array
               description: 行程規劃
+      - in: header
+        name: If-Match
+        type: string
+        required: false
+        description: 先前取得的 ETag，行程已被修改時回傳 412
+      - in: query
+        name: on_overlap
+        type: string
+        enum: [warn, reject, ignore]
+        required: false
+        description: 修改後的日期與其他行程重疊時的處理方式 (預設 warn)
     responses:
       200:
-        description: 行程更新成功
+        description: 行程更新成功 (warn 時若有重疊，另外回傳 overlapping_trips)
         schema:
           type: object
           properties:
@@ -355,6 +858,10 @@ def update_trip(trip_id):
         description: 未授權
       404:
         description: 行程不存在
+      409:
+        description: 修改後的日期與其他行程重疊 (on_overlap=reject)
+      412:
+        description: If-Match 與目前版本不符，行程已被修改
     """
     try:
         user = get_current_user()
@@ -365,53 +872,56 @@ def update_trip(trip_id):
         if not trip:
             return jsonify({'msg': 'Trip not found'}), 404
 
-        data = request.get_json()
-        if not data:
-            return jsonify({'msg': 'No data provided'}), 400
-
-        # 更新目的地
-        if 'destination' in data:
-            trip.destination = data['destination']
-
-        # 更新日期
-        if 'start_date' in data:
-            try:
-                trip.start_date = datetime.strptime(data['start_date'], '%Y-%m-%d').date()
-            except ValueError:
-                return jsonify({'msg': 'Invalid start_date format. Use YYYY-MM-DD'}), 400
+        # If-Match 與目前版本不符代表其他人已修改過此行程
+        if precondition_failed(trip_etag(trip.id, trip.version)):
+            return jsonify({'msg': 'Trip has been modified by another request'}), 412
 
-        if 'end_date' in data:
-            try:
-                trip.end_date = datetime.strptime(data['end_date'], '%Y-%m-%d').date()
-            except ValueError:
-                return jsonify({'msg': 'Invalid end_date format. Use YYYY-MM-DD'}), 400
-
-        # 驗證日期邏輯
-        if trip.start_date >= trip.end_date:
-            return jsonify({'msg': 'End date must be after start date'}), 400
+        data = request.get_json()
+        try:
+            fields = validate_trip_data(
+                data, partial=True, current_start=trip.start_date, current_end=trip.end_date
+            )
+            overlap_policy = parse_overlap_policy(request.args.get('on_overlap'))
+        except ValueError as e:
+            return jsonify({'msg': str(e)}), 400
 
-        # 更新座標和行程
-        if 'coordinates' in data:
-            trip.coordinates = data['coordinates']
+        # 只有日期變更時才需要重新檢查重疊
+        overlapping = []
+        if 'start_date' in fields or 'end_date' in fields:
+            overlapping, conflict = overlap_conflict(
+                overlap_policy, user.id,
+                fields.get('start_date', trip.start_date), fields.get('end_date', trip.end_date),
+                exclude_id=trip.id
+            )
+            if conflict:
+                return conflict
 
-        if 'itinerary' in data:
-            trip.itinerary = data['itinerary']
+        # 更新有提供的欄位，itinerary 會整份取代
+        itinerary_rows = fields.pop('itinerary_rows', None)
+        for field, value in fields.items():
+            setattr(trip, field, value)
+        if itinerary_rows is not None:
+            trip.set_itinerary_rows(itinerary_rows)
 
-        db.session.commit()
+        try:
+            db.session.commit()
+        except StaleDataError:
+            # 讀取後、提交前版本已被其他請求更新
+            db.session.rollback()
+            return jsonify({'msg': 'Trip has been modified by another request'}), 412
+        invalidate_trips(user.id, trip.id)
 
-        trip_data = {
-            'id': trip.id,
-            'destination': trip.destination,
-            'start_date': trip.start_date.isoformat(),
-            'end_date': trip.end_date.isoformat(),
-            'coordinates': trip.coordinates,
-            'itinerary': trip.itinerary
-        }
+        trip_data = serialize_trip(trip)
 
-        return jsonify({
+        body = {
             'message': 'Trip updated successfully',
             'trip': trip_data
-        }), 200
+        }
+        if overlapping:
+            body['overlapping_trips'] = overlapping
+        response = jsonify(body)
+        response.set_etag(trip_etag(trip.id, trip.version))
+        return response, 200
 
     except Exception as e:
         db.session.rollback()
@@ -419,6 +929,7 @@ def update_trip(trip_id):
 
 @trip_bp.route('/trips/<int:trip_id>', methods=['DELETE'])
 @auth_required
+@rate_limit('api')
 def delete_trip(trip_id):
     """
     刪除行程
@@ -458,9 +969,370 @@ def delete_trip(trip_id):
 
         db.session.delete(trip)
         db.session.commit()
+        invalidate_trips(user.id, trip_id)
 
         return jsonify({'message': 'Trip deleted successfully'}), 200
 
     except Exception as e:
         db.session.rollback()
-        return jsonify({'msg': f'Error deleting trip: {str(e)}'}), 500
\ No newline at end of file
+        return jsonify({'msg': f'Error deleting trip: {str(e)}'}), 500
+
+@trip_bp.route('/trips/import', methods=['POST'])
+@auth_required
+@rate_limit('api')
+def import_trips():
+    """
+    以 NDJSON 串流匯入行程
+    ---
+    tags:
+      - Trips
+    security:
+      - Bearer: []
+    description: >
+      請求本體為 newline-delimited JSON，每行一筆行程，驗證規則與創建行程相同。
+      伺服器逐行讀取請求串流，並以固定大小的批次寫入，記憶體用量不隨檔案大小增加。
+      格式錯誤的行會被略過並回報，不會中止整個匯入。
+    consumes:
+      - application/x-ndjson
+    parameters:
+      - in: body
+        name: trips
+        required: true
+        description: 每行一筆行程 JSON
+        schema:
+          type: string
+          example: '{"destination": "東京", "start_date": "2024-03-01", "end_date": "2024-03-07"}'
+    responses:
+      200:
+        description: 匯入完成 (可能包含部分失敗的行)
+        schema:
+          type: object
+          properties:
+            processed:
+              type: integer
+              example: 1000
+            imported:
+              type: integer
+              example: 998
+            failed:
+              type: integer
+              example: 2
+            errors:
+              type: array
+              description: 逐行錯誤 (最多 100 筆)
+              items:
+                type: object
+                properties:
+                  line:
+                    type: integer
+                    example: 17
+                  msg:
+                    type: string
+                    example: "Missing required field: end_date"
+            errors_truncated:
+              type: boolean
+              example: false
+      401:
+        description: 未授權
+    """
+    try:
+        user = get_current_user()
+        if not user:
+            return jsonify({'msg': 'User not found'}), 401
+
+        # 直接迭代請求串流，不會把整個本體讀進記憶體
+        report = import_trips_ndjson(request.stream, user.id)
+        return jsonify(report), 200
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'msg': f'Error importing trips: {str(e)}'}), 500
+
+@trip_bp.route('/trips/export', methods=['GET'])
+@auth_required
+@rate_limit('api')
+def export_trips():
+    """
+    串流匯出用戶的所有行程
+    ---
+    tags:
+      - Trips
+    security:
+      - Bearer: []
+    description: >
+      以 generator 邊查詢邊輸出，資料列以 yield_per 分批讀取，
+      不會把整個結果集載入記憶體。
+    produces:
+      - application/json
+      - application/x-ndjson
+    parameters:
+      - in: query
+        name: format
+        type: string
+        enum: [json, ndjson]
+        required: false
+        description: json (預設，單一 JSON 陣列) 或 ndjson (每行一筆行程)
+    responses:
+      200:
+        description: 行程串流 (依 start_date, id 排序)
+      400:
+        description: 不支援的格式
+      401:
+        description: 未授權
+    """
+    user = get_current_user()
+    if not user:
+        return jsonify({'msg': 'User not found'}), 401
+
+    export_format = request.args.get('format', 'json')
+    if export_format not in ('json', 'ndjson'):
+        return jsonify({'msg': 'Unsupported format. Use json or ndjson'}), 400
+
+    # 每次從資料庫取 EXPORT_CHUNK_SIZE 筆，行程規劃也以同樣大小的 IN 查詢批次載入
+    statement = (
+        select(Trip)
+        .where(Trip.user_id == user.id)
+        .order_by(Trip.start_date, Trip.id)
+        .options(selectinload(Trip.itinerary_items))
+        .execution_options(yield_per=EXPORT_CHUNK_SIZE)
+    )
+    dumps = current_app.json.dumps
+
+    def generate():
+        trips = db.session.scalars(statement)
+        if export_format == 'ndjson':
+            for trip in trips:
+                yield dumps(serialize_trip(trip)) + '\n'
+            return
+
+        yield '['
+        separator = ''
+        for trip in trips:
+            yield separator + dumps(serialize_trip(trip))
+            separator = ','
+        yield ']\n'
+
+    mimetype = 'application/x-ndjson' if export_format == 'ndjson' else 'application/json'
+    response = current_app.response_class(stream_with_context(generate()), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename=trips.{export_format}'
+    return response
+
+@trip_bp.route('/trips:batch', methods=['POST'])
+@auth_required
+@rate_limit('api')
+def batch_trips():
+    """
+    批次新增、更新與刪除行程
+    ---
+    tags:
+      - Trips
+    security:
+      - Bearer: []
+    description: >
+      所有操作會先全部驗證，任一操作失敗時整批都不會套用；
+      驗證通過後以批次 INSERT / UPDATE / DELETE 在單一交易中完成。
+    parameters:
+      - in: body
+        name: batch
+        required: true
+        schema:
+          type: object
+          required:
+            - operations
+          properties:
+            operations:
+              type: array
+              description: 最多 TRIPS_BATCH_MAX_OPERATIONS 筆 (預設 500)
+              items:
+                type: object
+                required:
+                  - op
+                properties:
+                  op:
+                    type: string
+                    enum: [create, update, delete]
+                  id:
+                    type: integer
+                    description: update 與 delete 的行程 ID
+                  if_match:
+                    type: string
+                    description: update 時可帶入先前取得的 ETag
+                  trip:
+                    type: object
+                    description: create 與 update 的行程資料，規則同單筆端點
+    responses:
+      200:
+        description: 全部操作已套用
+        schema:
+          type: object
+          properties:
+            results:
+              type: array
+              items:
+                type: object
+                properties:
+                  index:
+                    type: integer
+                    example: 0
+                  op:
+                    type: string
+                    example: "create"
+                  status:
+                    type: integer
+                    example: 201
+                  id:
+                    type: integer
+                    example: 12
+      400:
+        description: 驗證失敗，回傳每筆失敗操作的錯誤，未套用任何操作
+      401:
+        description: 未授權
+      412:
+        description: 套用時行程已被其他請求修改，未套用任何操作
+    """
+    try:
+        user = get_current_user()
+        if not user:
+            return jsonify({'msg': 'User not found'}), 401
+
+        data = request.get_json()
+        operations = data.get('operations') if isinstance(data, dict) else None
+        if not isinstance(operations, list) or not operations:
+            return jsonify({'msg': 'No operations provided'}), 400
+        if len(operations) > BATCH_MAX_OPERATIONS:
+            return jsonify({'msg': f'Too many operations (max {BATCH_MAX_OPERATIONS})'}), 400
+
+        # 以一次查詢載入所有要更新或刪除的行程
+        target_ids = {
+            operation.get('id') for operation in operations
+            if isinstance(operation, dict) and is_trip_id(operation.get('id'))
+        }
+        existing = {}
+        if target_ids:
+            rows = (
+                db.session.query(Trip.id, Trip.destination, Trip.start_date, Trip.end_date, Trip.version)
+                .filter(Trip.user_id == user.id, Trip.id.in_(target_ids))
+                .all()
+            )
+            existing = {row.id: row for row in rows}
+
+        # 先驗證全部操作
+        creates, updates, deletes, errors = [], [], [], []
+        referenced = set()
+        for index, operation in enumerate(operations):
+            op = operation.get('op') if isinstance(operation, dict) else None
+            if op not in BATCH_OPERATIONS:
+                errors.append({'index': index, 'status': 400, 'msg': 'op must be create, update or delete'})
+                continue
+
+            if op == 'create':
+                try:
+                    creates.append((index, validate_trip_data(operation.get('trip'))))
+                except TripValidationError as e:
+                    errors.append({'index': index, 'status': 400, 'msg': str(e)})
+                continue
+
+            trip_id = operation.get('id')
+            if not is_trip_id(trip_id):
+                errors.append({'index': index, 'status': 400, 'msg': 'id must be an integer'})
+                continue
+            current = existing.get(trip_id)
+            if current is None:
+                errors.append({'index': index, 'status': 404, 'msg': 'Trip not found'})
+                continue
+            if trip_id in referenced:
+                errors.append({'index': index, 'status': 400, 'msg': 'Trip referenced by multiple operations'})
+                continue
+            referenced.add(trip_id)
+
+            if op == 'delete':
+                deletes.append((index, trip_id))
+                continue
+
+            if_match = operation.get('if_match')
+            if if_match is not None and not isinstance(if_match, str):
+                errors.append({'index': index, 'status': 400, 'msg': 'if_match must be a string'})
+                continue
+            if if_match and if_match.strip('"') != trip_etag(trip_id, current.version):
+                errors.append({'index': index, 'status': 412, 'msg': 'Trip has been modified by another request'})
+                continue
+            try:
+                fields = validate_trip_data(
+                    operation.get('trip'), partial=True,
+                    current_start=current.start_date, current_end=current.end_date
+                )
+            except TripValidationError as e:
+                errors.append({'index': index, 'status': 400, 'msg': str(e)})
+                continue
+            updates.append((index, current, fields))
+
+        if errors:
+            return jsonify({'msg': 'Batch validation failed, no operations were applied', 'errors': errors}), 400
+
+        # 套用階段: 批次 UPDATE 的版本檢查在執行時就可能拋出 StaleDataError，與提交一起處理
+        try:
+            now = datetime.utcnow()
+            results = []
+            item_rows = []
+
+            if creates:
+                new_ids = bulk_insert_trips(user.id, [fields for _, fields in creates])
+                for (index, _), trip_id in zip(creates, new_ids):
+                    results.append({'index': index, 'op': 'create', 'status': 201, 'id': trip_id,
+                                    'etag': trip_etag(trip_id, 1)})
+
+            # 批次更新 (依主鍵)，version 欄位同時做樂觀鎖檢查並遞增
+            if updates:
+                update_rows = []
+                replaced_itineraries = []
+                for index, current, fields in updates:
+                    itinerary_rows = fields.pop('itinerary_rows', None)
+                    if itinerary_rows is not None:
+                        replaced_itineraries.append(current.id)
+                        item_rows.extend({'trip_id': current.id, **row} for row in itinerary_rows)
+                    update_rows.append({'id': current.id, 'version': current.version, 'updated_at': now, **fields})
+                    results.append({'index': index, 'op': 'update', 'status': 200, 'id': current.id,
+                                    'etag': trip_etag(current.id, current.version + 1)})
+                db.session.execute(update(Trip), update_rows)
+                if replaced_itineraries:
+                    db.session.execute(
+                        delete(ItineraryItem).where(ItineraryItem.trip_id.in_(replaced_itineraries))
+                    )
+
+            if deletes:
+                delete_ids = [trip_id for _, trip_id in deletes]
+                db.session.execute(delete(ItineraryItem).where(ItineraryItem.trip_id.in_(delete_ids)))
+                db.session.execute(delete(Trip).where(Trip.user_id == user.id, Trip.id.in_(delete_ids)))
+                results.extend({'index': index, 'op': 'delete', 'status': 200, 'id': trip_id}
+                               for index, trip_id in deletes)
+
+            if item_rows:
+                db.session.execute(insert(ItineraryItem), item_rows)
+
+            # Core 批次寫入不經過 ORM flush，全文檢索索引與統計在同一交易內自行更新
+            connection = db.session.connection()
+            reindex_trips(connection, [current.id for _, current, _ in updates])
+            remove_trips(connection, [trip_id for _, trip_id in deletes])
+            old_trips = [existing[trip_id] for _, trip_id in deletes] + [current for _, current, _ in updates]
+            apply_trip_deltas(
+                connection,
+                removed=[(user.id, trip.destination, trip.start_date, trip.end_date) for trip in old_trips],
+                added=[
+                    (user.id, fields.get('destination', current.destination),
+                     fields.get('start_date', current.start_date), fields.get('end_date', current.end_date))
+                    for _, current, fields in updates
+                ]
+            )
+
+            db.session.commit()
+        except StaleDataError:
+            db.session.rollback()
+            return jsonify({'msg': 'Trip has been modified by another request, no operations were applied'}), 412
+        invalidate_trips(user.id, *referenced)
+
+        results.sort(key=lambda result: result['index'])
+        return jsonify({'results': results}), 200
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'msg': f'Error applying batch: {str(e)}'}), 500
@@ -1,6 +1,15 @@
 #!/bin/bash
 
 # PlanVenture API 啟動腳本
+# 用法: ./start.sh [dev|prod]   (也可用 SERVER_MODE 環境變數指定，預設 dev)
+#   dev  - Flask 開發伺服器 (debug 模式與自動重新載入)
+#   prod - gunicorn 多 worker 伺服器 (配置見 gunicorn.conf.py)
+
+MODE="${1:-${SERVER_MODE:-dev}}"
+if [ "$MODE" != "dev" ] && [ "$MODE" != "prod" ]; then
+    echo "用法: $0 [dev|prod]"
+    exit 1
+fi
 
 echo "🚀 啟動 PlanVenture API..."
 
@@ -26,6 +35,11 @@ if [ ! -f ".env" ]; then
 fi
 
 # 啟動應用程式
+if [ "$MODE" = "prod" ]; then
+    echo "🌟 以 gunicorn 啟動 PlanVenture API (SIGTERM 或 Ctrl+C 優雅停止，SIGHUP 重新載入 worker)..."
+    exec gunicorn -c gunicorn.conf.py wsgi:app
+fi
+
 echo "🌟 啟動 Flask API (按 Ctrl+C 停止)..."
 echo "📍 API 將在 http://localhost:5000 運行"
 echo "📄 API 文件: http://localhost:5000/apidocs"
@@ -75,6 +75,30 @@ def test_login():
         return response.json().get('token')
     print()
 
+def test_logout():
+    """測試登出與登出所有裝置"""
+    print("=== 測試登出 ===")
+    login_data = {
+        "email": "test@example.com",
+        "password": "testpassword123"
+    }
+    requests.post(f"{BASE_URL}/auth/register", json=login_data)
+    tokens = [requests.post(f"{BASE_URL}/auth/login", json=login_data).json().get('token') for _ in range(2)]
+    headers = [{"Authorization": f"Bearer {token}"} for token in tokens]
+
+    response = requests.post(f"{BASE_URL}/auth/logout", headers=headers[0])
+    print(f"登出狀態碼: {response.status_code}")
+    response = requests.get(f"{BASE_URL}/protected", headers=headers[0])
+    print(f"已登出 token 存取狀態碼 (預期 401): {response.status_code}")
+    response = requests.get(f"{BASE_URL}/protected", headers=headers[1])
+    print(f"其他 token 存取狀態碼 (預期 200): {response.status_code}")
+
+    response = requests.post(f"{BASE_URL}/auth/logout-all", headers=headers[1])
+    print(f"登出所有裝置狀態碼: {response.status_code}")
+    response = requests.get(f"{BASE_URL}/protected", headers=headers[1])
+    print(f"撤銷後存取狀態碼 (預期 401): {response.status_code}")
+    print()
+
 def main():
     """主測試函數"""
     print("開始 API 測試...\n")
@@ -93,6 +117,8 @@ def main():
         
         if token:
             print(f"獲得 JWT Token: {token[:50]}...")
+
+        test_logout()
         
         print("API 測試完成！")
         print(f"\n可以訪問 Swagger UI: {BASE_URL}/swagger/")
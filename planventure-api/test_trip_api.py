@@ -245,6 +245,412 @@ def test_error_cases():
         print(f"獲取不存在行程響應: {response.status_code}")
         print(f"響應內容: {response.json()}")
 
+def get_auth_headers():
+    """登入測試用戶並回傳帶有 token 的請求標頭"""
+    login_data = {
+        "email": "test_trip@example.com",
+        "password": "testpassword123"
+    }
+    response = requests.post(f"{BASE_URL}/auth/login", json=login_data)
+    if response.status_code != 200:
+        return None
+    return {
+        'Authorization': f'Bearer {response.json().get("token")}',
+        'Content-Type': 'application/json'
+    }
+
+def test_trip_pagination():
+    """測試 keyset 分頁"""
+    print("\n" + "="*50)
+    print("測試行程分頁")
+    print("="*50)
+
+    headers = get_auth_headers()
+    if not headers:
+        print("登入失敗，停止測試")
+        return
+
+    for i in range(3):
+        trip_data = {
+            "destination": f"分頁測試 {i}",
+            "start_date": f"2024-06-0{i + 1}",
+            "end_date": f"2024-06-0{i + 3}"
+        }
+        requests.post(f"{BASE_URL}/api/trips", json=trip_data, headers=headers)
+
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        response = requests.get(f"{BASE_URL}/api/trips", params=params, headers=headers)
+        print(f"分頁響應: {response.status_code}")
+        page = response.json()
+        seen.extend(trip['id'] for trip in page['trips'])
+        print(f"本頁行程: {[trip['id'] for trip in page['trips']]}")
+        cursor = page.get('next_cursor')
+        if not cursor:
+            break
+
+    response = requests.get(f"{BASE_URL}/api/trips", headers=headers)
+    all_ids = [trip['id'] for trip in response.json()['trips']]
+    print(f"分頁結果與完整列表一致: {seen == all_ids}")
+
+    response = requests.get(f"{BASE_URL}/api/trips", params={"cursor": "invalid"}, headers=headers)
+    print(f"無效 cursor 響應: {response.status_code}")
+
+    response = requests.get(f"{BASE_URL}/api/trips", params={"view": "summary"}, headers=headers)
+    summary_keys = set(response.json()['trips'][0].keys()) if response.json()['trips'] else set()
+    print(f"摘要模式響應: {response.status_code}, 欄位: {sorted(summary_keys)}")
+
+def test_trip_conditional_requests():
+    """測試 ETag 條件式請求"""
+    print("\n" + "="*50)
+    print("測試 ETag 條件式請求")
+    print("="*50)
+
+    headers = get_auth_headers()
+    if not headers:
+        print("登入失敗，停止測試")
+        return
+
+    trip_data = {
+        "destination": "ETag 測試",
+        "start_date": "2024-07-01",
+        "end_date": "2024-07-05"
+    }
+    response = requests.post(f"{BASE_URL}/api/trips", json=trip_data, headers=headers)
+    trip_id = response.json()['trip']['id']
+    etag = response.headers.get('ETag')
+    print(f"創建行程 ETag: {etag}")
+
+    response = requests.get(f"{BASE_URL}/api/trips/{trip_id}", headers={**headers, 'If-None-Match': etag})
+    print(f"未變更行程響應 (預期 304): {response.status_code}")
+
+    # 先讀取一次，讓行程進入回應快取
+    requests.get(f"{BASE_URL}/api/trips/{trip_id}", headers=headers)
+
+    response = requests.put(f"{BASE_URL}/api/trips/{trip_id}", json={"destination": "ETag 更新"},
+                            headers={**headers, 'If-Match': etag})
+    print(f"If-Match 更新響應 (預期 200): {response.status_code}")
+
+    response = requests.put(f"{BASE_URL}/api/trips/{trip_id}", json={"destination": "過期更新"},
+                            headers={**headers, 'If-Match': etag})
+    print(f"過期 If-Match 更新響應 (預期 412): {response.status_code}")
+
+    response = requests.get(f"{BASE_URL}/api/trips/{trip_id}", headers=headers)
+    print(f"更新後讀取到新內容 (快取已失效): {response.json()['trip']['destination'] == 'ETag 更新'}")
+
+def test_itinerary_items():
+    """測試單日行程規劃端點"""
+    print("\n" + "="*50)
+    print("測試單日行程規劃")
+    print("="*50)
+
+    headers = get_auth_headers()
+    if not headers:
+        print("登入失敗，停止測試")
+        return
+
+    trip_data = {
+        "destination": "大阪",
+        "start_date": "2024-08-01",
+        "end_date": "2024-08-03",
+        "itinerary": [
+            {"day": 1, "plan": "大阪城"},
+            {"day": 1, "plan": "道頓堀"}
+        ]
+    }
+    response = requests.post(f"{BASE_URL}/api/trips", json=trip_data, headers=headers)
+    trip_id = response.json()['trip']['id']
+
+    response = requests.post(f"{BASE_URL}/api/trips/{trip_id}/itinerary/1/items",
+                             json={"plan": "黑門市場", "position": 0}, headers=headers)
+    print(f"插入項目響應: {response.status_code}")
+    item_id = response.json()['item']['id']
+
+    response = requests.put(f"{BASE_URL}/api/trips/{trip_id}/itinerary/items/{item_id}",
+                            json={"day": 2}, headers=headers)
+    print(f"移動項目響應: {response.status_code}")
+
+    response = requests.get(f"{BASE_URL}/api/trips/{trip_id}/itinerary/1", headers=headers)
+    print(f"第 1 天規劃: {[item['plan'] for item in response.json()['items']]}")
+
+    response = requests.delete(f"{BASE_URL}/api/trips/{trip_id}/itinerary/items/{item_id}", headers=headers)
+    print(f"刪除項目響應: {response.status_code}")
+
+    response = requests.get(f"{BASE_URL}/api/trips/{trip_id}", headers=headers)
+    print(f"完整行程規劃: {response.json()['trip']['itinerary']}")
+
+def test_batch_operations():
+    """測試批次操作端點"""
+    print("\n" + "="*50)
+    print("測試批次操作")
+    print("="*50)
+
+    headers = get_auth_headers()
+    if not headers:
+        print("登入失敗，停止測試")
+        return
+
+    operations = [
+        {"op": "create", "trip": {"destination": f"批次 {i}", "start_date": "2024-09-01", "end_date": "2024-09-03"}}
+        for i in range(3)
+    ]
+    response = requests.post(f"{BASE_URL}/api/trips:batch", json={"operations": operations}, headers=headers)
+    print(f"批次新增響應: {response.status_code}")
+    created_ids = [result['id'] for result in response.json()['results']]
+
+    operations = [
+        {"op": "update", "id": created_ids[0], "trip": {"destination": "批次更新"}},
+        {"op": "delete", "id": created_ids[1]},
+        {"op": "delete", "id": created_ids[2]}
+    ]
+    response = requests.post(f"{BASE_URL}/api/trips:batch", json={"operations": operations}, headers=headers)
+    print(f"批次更新與刪除響應: {response.status_code}")
+    print(f"結果: {response.json()['results']}")
+
+    operations = [
+        {"op": "update", "id": created_ids[0], "trip": {"destination": "不會套用"}},
+        {"op": "delete", "id": 99999}
+    ]
+    response = requests.post(f"{BASE_URL}/api/trips:batch", json={"operations": operations}, headers=headers)
+    print(f"驗證失敗響應 (預期 400): {response.status_code}")
+    print(f"錯誤: {response.json().get('errors')}")
+
+    # true 不能當作行程 ID 1，if_match 必須是字串
+    operations = [
+        {"op": "delete", "id": True},
+        {"op": "update", "id": created_ids[0], "if_match": 1, "trip": {"destination": "不會套用"}}
+    ]
+    response = requests.post(f"{BASE_URL}/api/trips:batch", json={"operations": operations}, headers=headers)
+    print(f"無效 id / if_match 響應 (預期 400): {response.status_code}")
+    assert response.status_code == 400
+
+def test_nearby_trips():
+    """測試附近行程搜尋"""
+    print("\n" + "="*50)
+    print("測試附近行程搜尋")
+    print("="*50)
+
+    headers = get_auth_headers()
+    if not headers:
+        print("登入失敗，停止測試")
+        return
+
+    trip_data = {
+        "destination": "附近測試 台北",
+        "start_date": "2024-10-01",
+        "end_date": "2024-10-03",
+        "coordinates": {"lat": 25.0330, "lng": 121.5654}
+    }
+    response = requests.post(f"{BASE_URL}/api/trips", json=trip_data, headers=headers)
+    trip_id = response.json()['trip']['id']
+
+    params = {"lat": 25.0478, "lng": 121.5170, "radius_km": 10, "view": "summary"}
+    response = requests.get(f"{BASE_URL}/api/trips/nearby", params=params, headers=headers)
+    print(f"附近行程響應: {response.status_code}")
+    nearby = {trip['id']: trip['distance_km'] for trip in response.json()['trips']}
+    print(f"找到新建行程: {trip_id in nearby}, 距離: {nearby.get(trip_id)} km")
+
+    params["radius_km"] = 1
+    response = requests.get(f"{BASE_URL}/api/trips/nearby", params=params, headers=headers)
+    print(f"半徑外不回傳: {trip_id not in [trip['id'] for trip in response.json()['trips']]}")
+
+    response = requests.get(f"{BASE_URL}/api/trips/nearby", params={"lat": 100, "lng": 0}, headers=headers)
+    print(f"無效座標響應 (預期 400): {response.status_code}")
+
+    # 半徑邊緣 (99.96 km) 的行程沿經線、緯線方向都要回傳；每次執行使用不同的經度，避免與先前的資料混在一起
+    base_lng = round(-150 + datetime.now().microsecond % 3000 / 10, 1)
+    for center, point in (((0, base_lng), (0.899, base_lng)),
+                          ((0, base_lng), (0, round(base_lng + 0.899, 3))),
+                          ((60, base_lng), (60.899, base_lng))):
+        trip_data = {
+            "destination": "附近測試 邊緣",
+            "start_date": "2024-10-05",
+            "end_date": "2024-10-06",
+            "coordinates": {"lat": point[0], "lng": point[1]}
+        }
+        trip_id = requests.post(f"{BASE_URL}/api/trips", json=trip_data, headers=headers).json()['trip']['id']
+        params = {"lat": center[0], "lng": center[1], "radius_km": 100, "limit": 100, "view": "summary"}
+        response = requests.get(f"{BASE_URL}/api/trips/nearby", params=params, headers=headers)
+        found = trip_id in [trip['id'] for trip in response.json()['trips']]
+        print(f"半徑邊緣的行程 {point} (中心 {center}): {found}")
+        assert found
+
+def test_response_compression():
+    """測試回應壓縮與行程列表的壓縮等級"""
+    print("\n" + "="*50)
+    print("測試回應壓縮")
+    print("="*50)
+
+    headers = get_auth_headers()
+    if not headers:
+        print("登入失敗，停止測試")
+        return
+
+    # 列表需超過 COMPRESSION_MIN_SIZE 才會壓縮，先建立一筆行程規劃較長的行程
+    trip_data = {
+        "destination": "壓縮測試 京都",
+        "start_date": "2024-11-01",
+        "end_date": "2024-11-05",
+        "itinerary": [{"day": day, "plan": "清水寺、伏見稻荷大社與錦市場散步，晚上在先斗町用餐 " * 5}
+                      for day in range(1, 6)]
+    }
+    requests.post(f"{BASE_URL}/api/trips", json=trip_data, headers=headers)
+
+    headers = {**headers, 'Accept-Encoding': 'gzip'}
+    response = requests.get(f"{BASE_URL}/api/trips", params={"limit": 100}, headers=headers, stream=True)
+    body = response.raw.read(decode_content=False)
+    print(f"列表響應: {response.status_code}, Content-Encoding: {response.headers.get('Content-Encoding')}, "
+          f"壓縮後 {len(body)} bytes")
+    assert response.headers.get('Content-Encoding') == 'gzip'
+    # gzip 標頭的 XFL 位元組: 等級 9 時為 2 (列表路由以 @compress_level 覆寫預設的等級 6)
+    print(f"列表使用最高壓縮等級: {body[8] == 2}")
+    assert body[8] == 2
+
+    response = requests.get(f"{BASE_URL}/api/trips", params={"limit": 100},
+                            headers={**headers, 'Accept-Encoding': 'identity'})
+    print(f"不接受壓縮時不壓縮: {'Content-Encoding' not in response.headers}")
+    assert 'Content-Encoding' not in response.headers
+
+def test_date_range_and_overlap():
+    """測試日期範圍篩選與重疊檢查"""
+    print("\n" + "="*50)
+    print("測試日期範圍與重疊檢查")
+    print("="*50)
+
+    headers = get_auth_headers()
+    if not headers:
+        print("登入失敗，停止測試")
+        return
+
+    trip_data = {"destination": "重疊測試", "start_date": "2030-03-10", "end_date": "2030-03-15"}
+    response = requests.post(f"{BASE_URL}/api/trips", json=trip_data, headers=headers)
+    trip_id = response.json()['trip']['id']
+
+    params = {"from": "2030-03-01", "to": "2030-03-31", "view": "summary"}
+    response = requests.get(f"{BASE_URL}/api/trips", params=params, headers=headers)
+    print(f"本月行程響應: {response.status_code}, 包含新行程: {trip_id in [t['id'] for t in response.json()['trips']]}")
+
+    overlapping = {"destination": "重疊行程", "start_date": "2030-03-14", "end_date": "2030-03-18"}
+    response = requests.post(f"{BASE_URL}/api/trips?on_overlap=reject", json=overlapping, headers=headers)
+    print(f"reject 重疊響應 (預期 409): {response.status_code}")
+
+    response = requests.post(f"{BASE_URL}/api/trips", json=overlapping, headers=headers)
+    warned = [trip['id'] for trip in response.json().get('overlapping_trips', [])]
+    print(f"warn 重疊響應 (預期 201): {response.status_code}, 列出重疊行程: {trip_id in warned}")
+
+    # 開始日等於上一個行程的結束日，不算重疊
+    adjacent = {"destination": "相鄰行程", "start_date": "2030-03-15", "end_date": "2030-03-16"}
+    response = requests.post(f"{BASE_URL}/api/trips", json=adjacent, headers=headers)
+    warned = [trip['id'] for trip in response.json().get('overlapping_trips', [])]
+    print(f"首尾相接不算重疊: {trip_id not in warned}")
+
+def test_full_text_search():
+    """測試全文檢索"""
+    print("\n" + "="*50)
+    print("測試全文檢索")
+    print("="*50)
+
+    headers = get_auth_headers()
+    if not headers:
+        print("登入失敗，停止測試")
+        return
+
+    # 每次執行使用不同的關鍵字，重複執行時結果不受先前資料影響
+    keyword = f"fts{datetime.now():%Y%m%d%H%M%S%f}"
+    trip_data = {
+        "destination": "全文檢索 東京",
+        "start_date": "2030-04-01",
+        "end_date": "2030-04-03",
+        "itinerary": [{"day": 1, "plan": f"築地市場吃拉麵 {keyword}"}]
+    }
+    response = requests.post(f"{BASE_URL}/api/trips", json=trip_data, headers=headers)
+    trip_id = response.json()['trip']['id']
+
+    response = requests.get(f"{BASE_URL}/api/trips/search", params={"q": f"拉麵 {keyword}"}, headers=headers)
+    results = response.json()['trips']
+    print(f"搜尋響應: {response.status_code}, 找到新行程: {[t['id'] for t in results] == [trip_id]}")
+    print(f"摘要片段: {results[0]['snippet'] if results else None}")
+
+    update_data = {"itinerary": [{"day": 1, "plan": "淺草寺"}]}
+    requests.put(f"{BASE_URL}/api/trips/{trip_id}", json=update_data, headers=headers)
+    response = requests.get(f"{BASE_URL}/api/trips/search", params={"q": keyword}, headers=headers)
+    print(f"更新後不再符合: {response.json()['trips'] == []}")
+
+    # 使用者 token 只用於限定範圍，搜尋字詞不會比對到它
+    login_data = {"email": "test_trip@example.com", "password": "testpassword123"}
+    user_id = requests.post(f"{BASE_URL}/auth/login", json=login_data).json()['user']['id']
+    for owner_query in ("u", f"u{user_id}"):
+        response = requests.get(f"{BASE_URL}/api/trips/search", params={"q": owner_query, "limit": 200}, headers=headers)
+        matched = [t['id'] for t in response.json()['trips']]
+        print(f"q={owner_query} 不符合無關行程: {trip_id not in matched}")
+        assert trip_id not in matched
+
+    response = requests.get(f"{BASE_URL}/api/trips/search", params={"q": "!!"}, headers=headers)
+    print(f"無效查詢響應 (預期 400): {response.status_code}")
+
+def test_trip_stats():
+    """測試行程統計"""
+    print("\n" + "="*50)
+    print("測試行程統計")
+    print("="*50)
+
+    headers = get_auth_headers()
+    if not headers:
+        print("登入失敗，停止測試")
+        return
+
+    before = requests.get(f"{BASE_URL}/api/trips/stats", headers=headers).json()
+
+    # 每次執行使用不同的目的地，重複執行時結果不受先前資料影響
+    destination = f"統計測試 {datetime.now():%Y%m%d%H%M%S%f}"
+    trip_data = {"destination": destination, "start_date": "2030-05-01", "end_date": "2030-05-04"}
+    response = requests.post(f"{BASE_URL}/api/trips", json=trip_data, headers=headers)
+    trip_id = response.json()['trip']['id']
+
+    response = requests.get(f"{BASE_URL}/api/trips/stats", params={"top": 20}, headers=headers)
+    after = response.json()
+    print(f"統計響應: {response.status_code}")
+    print(f"行程數 +1: {after['trip_count'] == before['trip_count'] + 1}")
+    print(f"天數 +4: {after['total_days'] == before['total_days'] + 4}")
+    print(f"即將出發 +1: {after['upcoming_trips'] == before['upcoming_trips'] + 1}")
+
+    requests.delete(f"{BASE_URL}/api/trips/{trip_id}", headers=headers)
+    after_delete = requests.get(f"{BASE_URL}/api/trips/stats", headers=headers).json()
+    print(f"刪除後回復: {after_delete['trip_count'] == before['trip_count'] and after_delete['total_days'] == before['total_days']}")
+
+    response = requests.get(f"{BASE_URL}/api/trips/stats", params={"top": 0}, headers=headers)
+    print(f"無效 top 響應 (預期 400): {response.status_code}")
+
+def test_rate_limit():
+    """測試 API 速率限制 (使用獨立用戶，以免影響其他測試)"""
+    print("\n" + "="*50)
+    print("測試速率限制")
+    print("="*50)
+
+    user_data = {
+        "email": "test_ratelimit@example.com",
+        "password": "testpassword123"
+    }
+    requests.post(f"{BASE_URL}/auth/register", json=user_data)
+    response = requests.post(f"{BASE_URL}/auth/login", json=user_data)
+    if response.status_code != 200:
+        print("登入失敗，停止測試")
+        return
+    headers = {'Authorization': f'Bearer {response.json().get("token")}'}
+
+    for i in range(200):
+        response = requests.get(f"{BASE_URL}/api/trips?limit=1", headers=headers)
+        if response.status_code == 429:
+            print(f"第 {i + 1} 個請求被限制 (預期 429): {response.status_code}")
+            print(f"Retry-After: {response.headers.get('Retry-After')}")
+            print(f"響應: {response.json()}")
+            return
+    print("未觸發速率限制 (RATE_LIMIT_ENABLED 可能為 false)")
+
 if __name__ == "__main__":
     print("開始測試 Trip API...")
     print("請確保服務器正在運行在 http://localhost:5001")
@@ -263,6 +669,36 @@ if __name__ == "__main__":
         
         # 執行錯誤情況測試
         test_error_cases()
+
+        # 執行分頁測試
+        test_trip_pagination()
+
+        # 執行條件式請求測試
+        test_trip_conditional_requests()
+
+        # 執行單日行程規劃測試
+        test_itinerary_items()
+
+        # 執行批次操作測試
+        test_batch_operations()
+
+        # 執行附近行程搜尋測試
+        test_nearby_trips()
+
+        # 執行回應壓縮測試
+        test_response_compression()
+
+        # 執行日期範圍與重疊檢查測試
+        test_date_range_and_overlap()
+
+        # 執行全文檢索測試
+        test_full_text_search()
+
+        # 執行行程統計測試
+        test_trip_stats()
+
+        # 執行速率限制測試 (放在最後，避免影響其他測試)
+        test_rate_limit()
         
         print("\n" + "="*50)
         print("所有測試完成！")
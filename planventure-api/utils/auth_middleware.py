@@ -1,6 +1,8 @@
-from flask import request, jsonify
+from flask import request, jsonify, g
 from functools import wraps
 from utils.jwt_utils import verify_access_token
+from utils.user_cache import get_user
+from utils.token_denylist import is_revoked
 
 def auth_required(f):
     @wraps(f)
@@ -12,8 +14,21 @@ def auth_required(f):
         payload = verify_access_token(token)
         if not payload:
             return jsonify({'msg': 'Invalid or expired token'}), 401
-        # 可選: 將 payload 存入 g 物件供後續使用
-        # from flask import g
-        # g.user = payload
+        # 快取命中的 token 同樣要檢查撤銷清單 (純記憶體查詢)
+        if is_revoked(payload):
+            return jsonify({'msg': 'Token has been revoked'}), 401
+        # 將驗證後的 payload 存入 g，整個請求只解碼一次 token
+        g.jwt_payload = payload
+        g.current_user_id = payload.get('user_id')
         return f(*args, **kwargs)
     return decorated_function
+
+def get_current_user():
+    """
+    取得目前請求的使用者 (需在 auth_required 之後呼叫)
+    使用者資料由快取提供，同一請求內重複呼叫不會再次查詢
+    """
+    if 'current_user' not in g:
+        user_id = g.get('current_user_id')
+        g.current_user = get_user(user_id) if user_id is not None else None
+    return g.current_user
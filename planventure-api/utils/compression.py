@@ -0,0 +1,137 @@
+"""
+回應壓縮 (gzip / brotli)
+依 Accept-Encoding 協商編碼；串流回應與已編碼的回應不處理，
+節省的位元組與花費的 CPU 時間記錄在 /metrics
+"""
+
+import gzip
+import time
+from typing import Optional
+
+from flask import current_app, request
+
+from config.compression_config import (
+    COMPRESSION_ENABLED, COMPRESSION_MIN_SIZE, COMPRESSION_GZIP_LEVEL,
+    COMPRESSION_BROTLI_QUALITY, COMPRESSIBLE_MIMETYPES
+)
+from utils import metrics
+
+try:
+    import brotli
+except ImportError:  # 選用套件，未安裝時只提供 gzip
+    brotli = None
+
+# 伺服器偏好的編碼順序 (客戶端 q 值相同時)
+ENCODINGS = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+# 不會重新計算的回應狀態碼
+_SKIP_STATUS = {204, 206, 304}
+
+
+def compress_level(gzip_level: Optional[int] = None, brotli_quality: Optional[int] = None):
+    """
+    Override the compression levels for one route; a level of 0 disables
+    that encoding for the route.
+
+    Place it directly under the route decorator so the level is attached to
+    the registered view function.
+    """
+    def decorator(f):
+        f.compression_levels = {'gzip': gzip_level, 'br': brotli_quality}
+        return f
+    return decorator
+
+
+def _route_level(encoding: str) -> int:
+    view = current_app.view_functions.get(request.endpoint)
+    levels = getattr(view, 'compression_levels', None) or {}
+    level = levels.get(encoding)
+    if level is not None:
+        return level
+    return COMPRESSION_BROTLI_QUALITY if encoding == 'br' else COMPRESSION_GZIP_LEVEL
+
+
+def negotiate_encoding() -> Optional[str]:
+    """
+    Pick the best encoding the client accepts (and the route allows).
+    """
+    best, best_quality = None, 0
+    for encoding in ENCODINGS:
+        quality = request.accept_encodings[encoding]
+        if quality > best_quality and _route_level(encoding) > 0:
+            best, best_quality = encoding, quality
+    return best
+
+
+def encoded_etag(etag: str, encoding: str) -> str:
+    # 同一資源的不同編碼是不同的位元組，強 ETag 必須不同
+    return f"{etag}-{encoding}"
+
+
+def _compress(data: bytes, encoding: str) -> bytes:
+    level = _route_level(encoding)
+    if encoding == 'br':
+        return brotli.compress(data, quality=level)
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def compress_response(response):
+    """
+    after_request hook: compress eligible responses in place.
+    """
+    if (response.direct_passthrough or response.is_streamed
+            or 'Content-Encoding' in response.headers
+            or 'no-transform' in response.headers.get('Cache-Control', '')):
+        return response
+
+    if response.status_code in _SKIP_STATUS:
+        # 304 需帶回客戶端快取的那個編碼版本的 ETag
+        if response.status_code == 304:
+            etag, weak = response.get_etag()
+            if etag and not weak:
+                for encoding in ENCODINGS:
+                    if request.if_none_match.contains(encoded_etag(etag, encoding)):
+                        response.set_etag(encoded_etag(etag, encoding))
+                        response.vary.add('Accept-Encoding')
+                        break
+        return response
+
+    if (response.status_code < 200 or response.mimetype not in COMPRESSIBLE_MIMETYPES
+            or request.method == 'HEAD'):
+        return response
+
+    data = response.get_data()
+    if len(data) < COMPRESSION_MIN_SIZE:
+        metrics.increment('compression_skipped_small')
+        return response
+
+    response.vary.add('Accept-Encoding')
+    encoding = negotiate_encoding()
+    if encoding is None:
+        metrics.increment('compression_skipped_not_accepted')
+        return response
+
+    started = time.thread_time()
+    compressed = _compress(data, encoding)
+    cpu_us = int((time.thread_time() - started) * 1_000_000)
+
+    if len(compressed) >= len(data):
+        metrics.increment('compression_skipped_no_gain')
+        return response
+
+    response.set_data(compressed)
+    response.headers['Content-Encoding'] = encoding
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(encoded_etag(etag, encoding))
+
+    metrics.increment(f'compression_responses_{encoding}')
+    metrics.increment('compression_bytes_in', len(data))
+    metrics.increment('compression_bytes_out', len(compressed))
+    metrics.increment('compression_cpu_us', cpu_us)
+    return response
+
+
+def init_compression(app) -> None:
+    if COMPRESSION_ENABLED:
+        app.after_request(compress_response)
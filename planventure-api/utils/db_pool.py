@@ -0,0 +1,94 @@
+"""
+資料庫連線池監控
+記錄取得連線的等待時間與逾時次數，由 /metrics 輸出，用來依 worker 數量調整連線池大小
+"""
+
+import threading
+import time
+
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+from config.database_config import DB_POOL_CONFIG
+
+
+class InstrumentedQueuePool(QueuePool):
+    """
+    QueuePool that keeps checkout counters.
+
+    Wait time covers everything between asking the pool for a connection
+    and getting one, including opening a new overflow connection.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stats_lock = threading.Lock()
+        self._in_get = threading.local()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def _do_get(self):
+        # QueuePool._do_get 會遞迴呼叫自己，只在最外層計時
+        if getattr(self._in_get, 'active', False):
+            return super()._do_get()
+
+        self._in_get.active = True
+        started = time.perf_counter()
+        timed_out = False
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            timed_out = True
+            raise
+        finally:
+            self._in_get.active = False
+            waited = time.perf_counter() - started
+            with self._stats_lock:
+                if timed_out:
+                    self.timeouts += 1
+                else:
+                    self.checkouts += 1
+                self.wait_seconds_total += waited
+                self.wait_seconds_max = max(self.wait_seconds_max, waited)
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            attempts = self.checkouts + self.timeouts
+            return {
+                'size': self.size(),
+                'checked_out': self.checkedout(),
+                'checked_in': self.checkedin(),
+                'overflow': max(0, self.overflow()),
+                'max_overflow': self._max_overflow,
+                'checkouts': self.checkouts,
+                'timeouts': self.timeouts,
+                'wait_seconds_total': round(self.wait_seconds_total, 6),
+                'wait_seconds_avg': round(self.wait_seconds_total / attempts, 6) if attempts else 0.0,
+                'wait_seconds_max': round(self.wait_seconds_max, 6),
+            }
+
+
+def engine_options(database_uri: str) -> dict:
+    """
+    Build SQLALCHEMY_ENGINE_OPTIONS for ``database_uri``.
+
+    Server databases get the DB_POOL_CONFIG settings on an instrumented
+    pool; SQLite keeps SQLAlchemy's defaults.
+    """
+    if make_url(database_uri).get_backend_name() == 'sqlite':
+        return {}
+    return {'poolclass': InstrumentedQueuePool, **DB_POOL_CONFIG}
+
+
+def pool_stats(engine) -> dict:
+    """
+    Return the pool counters of ``engine``; pools without counters only
+    report SQLAlchemy's status line.
+    """
+    pool = engine.pool
+    if isinstance(pool, InstrumentedQueuePool):
+        return pool.stats()
+    return {'pool': type(pool).__name__, 'status': pool.status()}
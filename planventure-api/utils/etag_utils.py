@@ -0,0 +1,68 @@
+"""
+ETag 與條件式請求工具
+行程的 ETag 由 id 與 version 組成，不需要序列化內容即可計算
+"""
+
+import hashlib
+from typing import Iterable, Tuple
+
+from flask import current_app, request
+
+from utils.compression import ENCODINGS, encoded_etag
+
+
+def trip_etag(trip_id: int, version: int) -> str:
+    """
+    Strong ETag for a single trip representation.
+    """
+    return f"trip-{trip_id}-v{version}"
+
+
+def trip_list_etag(rows: Iterable[Tuple[int, int]], *params) -> str:
+    """
+    Strong ETag for a trip listing.
+
+    ``rows`` are the (id, version) pairs in response order; ``params`` are
+    anything else that changes the representation (fields, cursor, ...).
+    """
+    digest = hashlib.sha1()
+    for param in params:
+        digest.update(repr(param).encode('utf-8'))
+        digest.update(b'\0')
+    for trip_id, version in rows:
+        digest.update(f"{trip_id}:{version};".encode('ascii'))
+    return f"trips-{digest.hexdigest()}"
+
+
+def _representations(etag: str):
+    # 壓縮後的回應 ETag 會加上編碼後綴 (見 utils/compression.py)，同樣視為相符
+    return (etag, *(encoded_etag(etag, encoding) for encoding in ENCODINGS))
+
+
+def is_not_modified(etag: str) -> bool:
+    """
+    True if the request's If-None-Match matches ``etag`` (in any encoding).
+    """
+    if_none_match = request.if_none_match
+    if not if_none_match:
+        return False
+    return any(if_none_match.contains(tag) for tag in _representations(etag))
+
+
+def precondition_failed(etag: str) -> bool:
+    """
+    True if the request carries an If-Match header that does not match ``etag``.
+    """
+    if_match = request.if_match
+    if not if_match or if_match.star_tag:
+        return False
+    return not any(if_match.contains(tag) for tag in _representations(etag))
+
+
+def not_modified_response(etag: str):
+    """
+    Empty 304 response carrying the current ETag.
+    """
+    response = current_app.response_class(status=304)
+    response.set_etag(etag)
+    return response
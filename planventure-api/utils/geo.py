@@ -0,0 +1,158 @@
+"""
+地理座標工具
+geohash 編碼、以 geohash 前綴覆蓋搜尋範圍，以及 haversine 距離
+"""
+
+import math
+from typing import List, Optional, Tuple
+
+EARTH_RADIUS_KM = 6371.0088
+# 與 haversine_km 使用同一個球體半徑 (約 111.195 km)，否則搜尋範圍的外框會比半徑小，漏掉邊緣的行程
+KM_PER_DEGREE_LAT = math.pi * EARTH_RADIUS_KM / 180
+
+# 儲存在 trips.geohash 的精度 (12 字元約 3.7cm x 1.9cm)
+GEOHASH_PRECISION = 12
+
+_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+BoundingBox = Tuple[float, float, float, float]  # (min_lat, min_lng, max_lat, max_lng)
+
+
+def encode_geohash(lat: float, lng: float, precision: int = GEOHASH_PRECISION) -> str:
+    """
+    Encode a point as a geohash of ``precision`` characters.
+    """
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars = []
+    bits, bit_count, even = 0, 0, True
+    while len(chars) < precision:
+        # 偶數位元切經度、奇數位元切緯度
+        value, bounds = (lng, lng_range) if even else (lat, lat_range)
+        mid = (bounds[0] + bounds[1]) / 2
+        if value >= mid:
+            bits = (bits << 1) | 1
+            bounds[0] = mid
+        else:
+            bits <<= 1
+            bounds[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_BASE32[bits])
+            bits, bit_count = 0, 0
+    return ''.join(chars)
+
+
+def cell_size(precision: int) -> Tuple[float, float]:
+    """
+    (height, width) in degrees of a geohash cell of ``precision`` characters.
+    """
+    lng_bits = math.ceil(5 * precision / 2)
+    lat_bits = 5 * precision - lng_bits
+    return 180.0 / 2 ** lat_bits, 360.0 / 2 ** lng_bits
+
+
+def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    a = (math.sin((lat2 - lat1) / 2) ** 2
+         + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def bounding_boxes(lat: float, lng: float, radius_km: float) -> List[BoundingBox]:
+    """
+    Boxes that contain every point within ``radius_km`` of (lat, lng).
+
+    A circle crossing the antimeridian is split into two boxes; one that
+    reaches a pole covers every longitude.
+    """
+    delta_lat = radius_km / KM_PER_DEGREE_LAT
+    min_lat, max_lat = lat - delta_lat, lat + delta_lat
+    if min_lat <= -90 or max_lat >= 90:
+        return [(max(min_lat, -90.0), -180.0, min(max_lat, 90.0), 180.0)]
+
+    # 取圓內緯度最高 (離赤道最遠) 處的經度跨度，才不會漏掉邊緣
+    widest = max(abs(min_lat), abs(max_lat))
+    delta_lng = radius_km / (KM_PER_DEGREE_LAT * math.cos(math.radians(widest)))
+    if delta_lng >= 180:
+        return [(min_lat, -180.0, max_lat, 180.0)]
+
+    min_lng, max_lng = lng - delta_lng, lng + delta_lng
+    if min_lng < -180:
+        return [(min_lat, min_lng + 360, max_lat, 180.0), (min_lat, -180.0, max_lat, max_lng)]
+    if max_lng > 180:
+        return [(min_lat, min_lng, max_lat, 180.0), (min_lat, -180.0, max_lat, max_lng - 360)]
+    return [(min_lat, min_lng, max_lat, max_lng)]
+
+
+def _covering_cells(box: BoundingBox, precision: int) -> List[str]:
+    min_lat, min_lng, max_lat, max_lng = box
+    height, width = cell_size(precision)
+    # 對齊格線後，以每個格子的中心點編碼
+    lat_start = math.floor((min_lat + 90) / height)
+    lat_end = math.floor(min(max_lat + 90, 180 - height / 2) / height)
+    lng_start = math.floor((min_lng + 180) / width)
+    lng_end = math.floor(min(max_lng + 180, 360 - width / 2) / width)
+    return [
+        encode_geohash(-90 + (i + 0.5) * height, -180 + (j + 0.5) * width, precision)
+        for i in range(lat_start, lat_end + 1)
+        for j in range(lng_start, lng_end + 1)
+    ]
+
+
+def _cell_count(box: BoundingBox, precision: int) -> int:
+    min_lat, min_lng, max_lat, max_lng = box
+    height, width = cell_size(precision)
+    rows = math.floor(min(max_lat + 90, 180 - height / 2) / height) - math.floor((min_lat + 90) / height) + 1
+    cols = math.floor(min(max_lng + 180, 360 - width / 2) / width) - math.floor((min_lng + 180) / width) + 1
+    return rows * cols
+
+
+def covering_prefixes(boxes: List[BoundingBox], max_cells: int = 16) -> Optional[List[str]]:
+    """
+    Geohash prefixes whose cells together cover ``boxes``.
+
+    Uses the longest prefix length that needs at most ``max_cells`` cells,
+    so each prefix becomes one index range scan. Returns None when even
+    single-character cells would exceed ``max_cells`` (the search area is a
+    large part of the globe and prefixes would not prune anything).
+    """
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        if sum(_cell_count(box, precision) for box in boxes) <= max_cells:
+            cells = []
+            for box in boxes:
+                cells.extend(_covering_cells(box, precision))
+            return sorted(set(cells))
+    return None
+
+
+def parse_coordinates(coordinates) -> Optional[Tuple[float, float]]:
+    """
+    Validate a ``{"lat": ..., "lng": ...}`` object and return (lat, lng).
+
+    Returns None for None; raises ValueError for anything else that is not
+    a valid coordinate pair.
+    """
+    if coordinates is None:
+        return None
+    if not isinstance(coordinates, dict) or 'lat' not in coordinates or 'lng' not in coordinates:
+        raise ValueError('coordinates must be an object with lat and lng')
+    lat, lng = coordinates['lat'], coordinates['lng']
+    for name, value, limit in (('lat', lat, 90), ('lng', lng, 180)):
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+            raise ValueError(f'{name} must be a number')
+        if not -limit <= value <= limit:
+            raise ValueError(f'{name} must be between {-limit} and {limit}')
+    return float(lat), float(lng)
+
+
+def coordinate_columns(coordinates) -> dict:
+    """
+    Indexed column values (latitude, longitude, geohash) for a validated
+    ``coordinates`` object, all None when there are no coordinates.
+    """
+    point = parse_coordinates(coordinates)
+    if point is None:
+        return {'latitude': None, 'longitude': None, 'geohash': None}
+    lat, lng = point
+    return {'latitude': lat, 'longitude': lng, 'geohash': encode_geohash(lat, lng)}
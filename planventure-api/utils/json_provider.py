@@ -0,0 +1,87 @@
+"""
+Flask JSON provider
+有安裝 orjson 時使用 orjson，否則退回標準函式庫；兩者都將 date/datetime 輸出為 ISO 8601
+"""
+
+import dataclasses
+import decimal
+import os
+import uuid
+from datetime import date
+
+from flask.json.provider import DefaultJSONProvider, JSONProvider
+
+try:
+    import orjson
+except ImportError:  # 選用套件，未安裝時使用 IsoJSONProvider
+    orjson = None
+
+# auto: 有 orjson 時使用 orjson；orjson / default: 指定使用
+JSON_PROVIDER = os.getenv('JSON_PROVIDER', 'auto')
+
+
+def _default(obj):
+    # 兩個 provider 共用的非內建型別處理
+    if isinstance(obj, date):
+        return obj.isoformat()
+    if isinstance(obj, (decimal.Decimal, uuid.UUID)):
+        return str(obj)
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return dataclasses.asdict(obj)
+    if hasattr(obj, '__html__'):
+        return str(obj.__html__())
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+
+class IsoJSONProvider(DefaultJSONProvider):
+    """
+    Standard library provider that writes dates as ISO 8601 instead of
+    Flask's HTTP date format.
+    """
+    default = staticmethod(_default)
+
+
+class OrjsonProvider(JSONProvider):
+    """
+    orjson-backed provider; responses are built from bytes without an
+    intermediate str.
+
+    Mirrors DefaultJSONProvider's ``sort_keys`` / ``compact`` behaviour so
+    the output matches apart from whitespace.
+    """
+    sort_keys = True
+    compact = None
+    mimetype = 'application/json'
+
+    def _options(self, indent: bool = False) -> int:
+        options = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        if indent:
+            options |= orjson.OPT_INDENT_2
+        return options
+
+    def dumps(self, obj, **kwargs) -> str:
+        return orjson.dumps(obj, default=_default, option=self._options(bool(kwargs.get('indent')))).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        body = orjson.dumps(obj, default=_default, option=self._options(indent) | orjson.OPT_APPEND_NEWLINE)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+def init_json_provider(app, provider: str = JSON_PROVIDER) -> None:
+    """
+    Install the configured JSON provider on ``app``.
+    """
+    if provider not in ('auto', 'orjson', 'default'):
+        raise ValueError(f'Unknown JSON_PROVIDER: {provider}')
+    if provider == 'orjson' and orjson is None:
+        raise RuntimeError('JSON_PROVIDER=orjson requires the orjson package')
+
+    use_orjson = orjson is not None and provider != 'default'
+    app.json = OrjsonProvider(app) if use_orjson else IsoJSONProvider(app)
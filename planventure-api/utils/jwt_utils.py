@@ -1,7 +1,14 @@
+import hashlib
+import time
+import uuid
 import jwt
 from datetime import datetime, timedelta
 from typing import Optional
 
+from config.cache_config import TOKEN_CACHE_CONFIG
+from utils import metrics
+from utils.cache import TTLCache
+
 SECRET_KEY = "your-secret-key"  # 請於生產環境改為安全的隨機字串
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60
@@ -12,15 +19,35 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
         expire = datetime.utcnow() + expires_delta
     else:
         expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
+    # jti 讓單一 token 可被撤銷；iat 保留小數秒，登出所有裝置後立即重新登入的 token 不會被誤判
+    to_encode.update({"exp": expire, "iat": time.time(), "jti": uuid.uuid4().hex})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+# 已驗證 token 的快取: sha256(token) -> payload，項目在 token 的 exp 到期時失效
+_token_cache = TTLCache(maxsize=TOKEN_CACHE_CONFIG['maxsize'])
+metrics.register_source('token_cache', lambda: _token_cache.stats())
+
 def verify_access_token(token: str) -> Optional[dict]:
+    # 以摘要作為鍵，快取中不保存原始 token
+    digest = hashlib.sha256(token.encode('utf-8')).digest()
+    payload = _token_cache.get(digest)
+    if payload is not None:
+        metrics.increment('jwt_cache_hits')
+        return dict(payload)
+    metrics.increment('jwt_cache_misses')
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload
     except jwt.ExpiredSignatureError:
         return None
     except jwt.InvalidTokenError:
         return None
+
+    # 只快取帶有 exp 的 token，存活時間不超過其剩餘有效期
+    exp = payload.get('exp')
+    if isinstance(exp, (int, float)):
+        ttl = exp - time.time()
+        if ttl > 0:
+            _token_cache.set(digest, dict(payload), ttl=ttl)
+    return payload
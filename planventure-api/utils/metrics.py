@@ -0,0 +1,48 @@
+"""
+程序內指標
+計數器與各子系統的統計來源，由 /metrics 端點輸出
+"""
+
+import threading
+from collections import defaultdict
+from typing import Callable, Dict
+
+_counters = defaultdict(int)
+_counters_lock = threading.Lock()
+_sources: Dict[str, Callable[[], dict]] = {}
+
+
+def increment(name: str, amount: int = 1) -> None:
+    """
+    Add ``amount`` to the counter ``name``.
+    """
+    with _counters_lock:
+        _counters[name] += amount
+
+
+def register_source(name: str, collect: Callable[[], dict]) -> None:
+    """
+    Register a callable whose dict is reported under ``name`` on every
+    snapshot (e.g. a cache's ``stats``).
+    """
+    _sources[name] = collect
+
+
+def snapshot() -> dict:
+    """
+    Return the current counters and the output of every registered source.
+    """
+    with _counters_lock:
+        counters = dict(_counters)
+    return {
+        'counters': counters,
+        **{name: collect() for name, collect in _sources.items()},
+    }
+
+
+def reset() -> None:
+    """
+    Zero all counters (registered sources are kept).
+    """
+    with _counters_lock:
+        _counters.clear()
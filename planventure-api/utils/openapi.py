@@ -0,0 +1,117 @@
+"""
+預先產生的 OpenAPI 規格
+規格在啟動時 (或以 build_openapi.py 在建置時) 產生一次，
+之後由記憶體直接回應，並提供 gzip 與 ETag
+"""
+
+import gzip
+import hashlib
+import json
+import os
+
+from flask import current_app, request
+
+from config.swagger_config import SWAGGER_CONFIG, SWAGGER_TEMPLATE, SWAGGER_UI_ENABLED, OPENAPI_SPEC_FILE
+
+SPEC_ENDPOINT = 'apispec_1'
+SPEC_ROUTE = '/apispec_1.json'
+
+
+class SpecDocument:
+    """
+    Serialized spec with its gzip body and ETags, computed once.
+
+    The ETag is derived from the content, so every worker serving the same
+    spec agrees on it.
+    """
+
+    def __init__(self, body: bytes):
+        self.body = body
+        self.gzip_body = gzip.compress(body, compresslevel=9, mtime=0)
+        digest = hashlib.sha256(body).hexdigest()[:32]
+        self.etag = f"openapi-{digest}"
+        self.gzip_etag = f"openapi-{digest}-gzip"
+
+    @classmethod
+    def from_spec(cls, spec: dict) -> 'SpecDocument':
+        return cls(dump_spec(spec))
+
+
+def dump_spec(spec: dict) -> bytes:
+    # 排序鍵值讓同一份規格每次產生相同的位元組 (與 ETag)
+    return json.dumps(spec, ensure_ascii=False, sort_keys=True, separators=(',', ':')).encode('utf-8')
+
+
+def init_swagger_ui(app):
+    """
+    Set up flasgger (Swagger UI plus its spec route) when the UI is enabled.
+    """
+    if not SWAGGER_UI_ENABLED:
+        return None
+    from flasgger import Swagger
+    return Swagger(app, config=SWAGGER_CONFIG, template=SWAGGER_TEMPLATE)
+
+
+def build_spec(app) -> dict:
+    """
+    Generate the spec from the route docstrings with flasgger.
+
+    Must run after every blueprint is registered.
+    """
+    swagger = getattr(app, 'swag', None)
+    if swagger is None:
+        # 未啟用 UI: 只註冊規格路由 (之後由 install_openapi 換成記憶體版本)
+        from flasgger import Swagger
+        swagger = Swagger(app, config={**SWAGGER_CONFIG, 'swagger_ui': False}, template=SWAGGER_TEMPLATE)
+    with app.app_context():
+        return swagger.get_apispecs(SPEC_ENDPOINT)
+
+
+def load_spec_document(app, path: str = OPENAPI_SPEC_FILE) -> SpecDocument:
+    """
+    Load the prebuilt spec file when one is configured and exists,
+    otherwise build the spec from the route docstrings.
+    """
+    if path and os.path.exists(path):
+        with open(path, 'rb') as f:
+            return SpecDocument(f.read())
+    return SpecDocument.from_spec(build_spec(app))
+
+
+def serve_spec():
+    document = current_app.extensions['openapi_spec']
+    use_gzip = 'gzip' in request.accept_encodings
+    etag = document.gzip_etag if use_gzip else document.etag
+
+    if request.if_none_match.contains(etag):
+        response = current_app.response_class(status=304)
+    else:
+        response = current_app.response_class(
+            document.gzip_body if use_gzip else document.body,
+            mimetype='application/json'
+        )
+        if use_gzip:
+            response.headers['Content-Encoding'] = 'gzip'
+    response.set_etag(etag)
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.headers['Cache-Control'] = 'public, no-cache'
+    return response
+
+
+def install_openapi(app) -> SpecDocument:
+    """
+    Serve the spec from memory at SPEC_ROUTE.
+
+    When flasgger's spec route exists (UI enabled, or the spec was just
+    built), its view is replaced so the Swagger UI keeps pointing at the
+    same URL.
+    """
+    document = load_spec_document(app)
+    app.extensions['openapi_spec'] = document
+
+    flasgger_endpoint = f"flasgger.{SPEC_ENDPOINT}"
+    if flasgger_endpoint in app.view_functions:
+        app.view_functions[flasgger_endpoint] = serve_spec
+    else:
+        app.add_url_rule(SPEC_ROUTE, SPEC_ENDPOINT, serve_spec)
+    return document
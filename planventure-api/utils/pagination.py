@@ -0,0 +1,79 @@
+"""
+Keyset (cursor) 分頁工具
+cursor 為不透明的 base64url 字串，內容是上一頁最後一筆的排序鍵
+"""
+
+import base64
+import json
+import os
+from datetime import date
+from typing import Optional, Tuple
+
+DEFAULT_PAGE_SIZE = int(os.getenv('TRIPS_DEFAULT_PAGE_SIZE', '50'))
+MAX_PAGE_SIZE = int(os.getenv('TRIPS_MAX_PAGE_SIZE', '200'))
+
+
+def encode_cursor(start_date: date, trip_id: int) -> str:
+    """
+    Encode the (start_date, id) sort key of the last row of a page.
+    """
+    raw = json.dumps([start_date.isoformat(), trip_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[date, int]:
+    """
+    Decode a cursor produced by ``encode_cursor``.
+
+    Raises ValueError if the cursor is malformed.
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        start_date, trip_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return date.fromisoformat(start_date), int(trip_id)
+    except (TypeError, ValueError, UnicodeError) as e:
+        raise ValueError('Invalid cursor') from e
+
+
+def encode_offset_cursor(offset: int) -> str:
+    """
+    Encode a row offset, for result orders with no stable keyset
+    (e.g. search relevance).
+    """
+    raw = json.dumps({'offset': offset}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_offset_cursor(cursor: Optional[str]) -> int:
+    """
+    Decode a cursor produced by ``encode_offset_cursor``; no cursor means 0.
+
+    Raises ValueError if the cursor is malformed.
+    """
+    if not cursor:
+        return 0
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        offset = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))['offset']
+        if not isinstance(offset, int) or offset < 0:
+            raise ValueError('negative offset')
+        return offset
+    except (TypeError, ValueError, KeyError, UnicodeError) as e:
+        raise ValueError('Invalid cursor') from e
+
+
+def parse_limit(value: Optional[str]) -> int:
+    """
+    Parse the ``limit`` query parameter, capped at MAX_PAGE_SIZE.
+
+    Raises ValueError if the value is not a positive integer.
+    """
+    if value is None or value == '':
+        return DEFAULT_PAGE_SIZE
+    try:
+        limit = int(value)
+    except ValueError:
+        limit = 0
+    if limit < 1:
+        raise ValueError('limit must be a positive integer')
+    return min(limit, MAX_PAGE_SIZE)
@@ -1,17 +1,98 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
 import bcrypt
 
+# bcrypt 成本因子，調整後使用者下次登入時會自動以新成本重新雜湊
+BCRYPT_ROUNDS = int(os.getenv('BCRYPT_ROUNDS', '12'))
+
+# 專用執行緒池的大小與佇列上限 (包含執行中的工作)
+PASSWORD_POOL_SIZE = int(os.getenv('PASSWORD_POOL_SIZE', str(min(4, os.cpu_count() or 1))))
+PASSWORD_MAX_PENDING = int(os.getenv('PASSWORD_MAX_PENDING', str(PASSWORD_POOL_SIZE * 8)))
+PASSWORD_TIMEOUT = float(os.getenv('PASSWORD_TIMEOUT', '10'))
+
+# 建議客戶端在收到 PasswordPoolBusy 時等待的秒數
+PASSWORD_RETRY_AFTER = 1
+
+
+class PasswordPoolBusy(RuntimeError):
+    """
+    Raised when the password pool queue is full or an operation times out.
+    """
+
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+_pending = threading.BoundedSemaphore(PASSWORD_MAX_PENDING)
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """
+    Create the pool lazily, and again after a fork, since worker threads do
+    not survive into a forked child process.
+    """
+    global _executor, _executor_pid
+    pid = os.getpid()
+    if _executor is None or _executor_pid != pid:
+        with _executor_lock:
+            if _executor is None or _executor_pid != pid:
+                _executor = ThreadPoolExecutor(max_workers=PASSWORD_POOL_SIZE,
+                                               thread_name_prefix='bcrypt')
+                _executor_pid = pid
+    return _executor
+
+
+def _run_in_pool(fn, *args):
+    """
+    Run ``fn`` on the bcrypt pool and wait for the result.
+
+    bcrypt releases the GIL, so request threads waiting here leave the CPU
+    to other requests, and at most PASSWORD_POOL_SIZE hashes run at once.
+    """
+    if not _pending.acquire(blocking=False):
+        raise PasswordPoolBusy('Too many pending password operations')
+    try:
+        future = _get_executor().submit(fn, *args)
+    except BaseException:
+        _pending.release()
+        raise
+    future.add_done_callback(lambda _: _pending.release())
+    try:
+        return future.result(timeout=PASSWORD_TIMEOUT)
+    except FutureTimeoutError:
+        raise PasswordPoolBusy('Password operation timed out')
+
+
+def _hash(password: str, rounds: int) -> bytes:
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=rounds))
+
+
+def _check(password: str, hashed: bytes) -> bool:
+    return bcrypt.checkpw(password.encode('utf-8'), hashed)
+
 
 def hash_password(password: str) -> bytes:
     """
     Hash a password for storing.
     """
-    salt = bcrypt.gensalt()
-    hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
-    return hashed
+    return _run_in_pool(_hash, password, BCRYPT_ROUNDS)
 
 
 def check_password(password: str, hashed: bytes) -> bool:
     """
     Check a password against an existing hash.
     """
-    return bcrypt.checkpw(password.encode('utf-8'), hashed)
+    return _run_in_pool(_check, password, hashed)
+
+
+def needs_rehash(hashed: bytes) -> bool:
+    """
+    Check whether a hash was created with a cost other than BCRYPT_ROUNDS.
+    """
+    # 格式: $2b$<cost>$<salt+hash>
+    try:
+        return int(hashed.split(b'$')[2]) != BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return True
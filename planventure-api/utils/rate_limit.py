@@ -0,0 +1,200 @@
+"""
+Token bucket 速率限制
+以 @rate_limit('<group>') 套用在路由上，群組設定見 config/rate_limit_config.py
+"""
+
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import Tuple
+
+from flask import g, jsonify, request
+
+from config.rate_limit_config import (
+    RATE_LIMIT_ENABLED, RATE_LIMIT_BACKEND, RATE_LIMIT_SQLITE_PATH, RATE_LIMITS
+)
+
+
+def refill(tokens: float, updated: float, now: float,
+           capacity: float, refill_rate: float, cost: float) -> Tuple[bool, float, float]:
+    """
+    Apply one token bucket step.
+
+    Returns (allowed, tokens_left, retry_after_seconds).
+    """
+    tokens = min(capacity, tokens + max(0.0, now - updated) * refill_rate)
+    if tokens >= cost:
+        return True, tokens - cost, 0.0
+    retry_after = (cost - tokens) / refill_rate if refill_rate > 0 else float('inf')
+    return False, tokens, retry_after
+
+
+class MemoryBackend:
+    """
+    Per-process buckets. The number of tracked keys is bounded; the least
+    recently used bucket is dropped first (which only ever forgives a client).
+    """
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()  # key -> (tokens, updated)
+        self._lock = threading.Lock()
+
+    def consume(self, key: str, capacity: float, refill_rate: float,
+                cost: float = 1) -> Tuple[bool, float]:
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (capacity, now))
+            allowed, tokens, retry_after = refill(tokens, updated, now, capacity, refill_rate, cost)
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return allowed, retry_after
+
+
+class SQLiteBackend:
+    """
+    Buckets shared by every worker on the host through one SQLite file.
+
+    Stand-in for a networked store such as Redis: any object with the same
+    ``consume`` signature can be plugged in via ``set_backend``.
+
+    Buckets that have refilled completely are equivalent to missing rows and
+    are deleted every PRUNE_EVERY writes, so the table stays bounded by the
+    number of recently active keys.
+    """
+
+    # 每個程序每寫入這麼多次清除一次已補滿的 bucket
+    PRUNE_EVERY = 256
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._writes = 0
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        conn = self._connect()
+        # full_at: bucket 補滿的時間 (不補充時為 NULL，不會被清除)
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS rate_limit_buckets ("
+            "key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL, full_at REAL)"
+        )
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(rate_limit_buckets)")}
+        if 'full_at' not in columns:
+            # 舊版資料表: 既有的 bucket 視為已補滿，下次清除時刪除 (只會放寬限制)
+            conn.execute("ALTER TABLE rate_limit_buckets ADD COLUMN full_at REAL NOT NULL DEFAULT 0")
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS ix_rate_limit_buckets_full_at ON rate_limit_buckets (full_at)"
+        )
+        conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _connection(self) -> sqlite3.Connection:
+        # 每個執行緒 (以及 fork 後的每個程序) 使用自己的連線
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or getattr(self._local, 'pid', None) != os.getpid():
+            conn = self._connect()
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def consume(self, key: str, capacity: float, refill_rate: float,
+                cost: float = 1) -> Tuple[bool, float]:
+        # 使用牆上時間，多個程序之間才能比較
+        now = time.time()
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT tokens, updated FROM rate_limit_buckets WHERE key = ?", (key,)
+            ).fetchone()
+            tokens, updated = row if row else (capacity, now)
+            allowed, tokens, retry_after = refill(tokens, updated, now, capacity, refill_rate, cost)
+            full_at = now + (capacity - tokens) / refill_rate if refill_rate > 0 else None
+            conn.execute(
+                "INSERT INTO rate_limit_buckets (key, tokens, updated, full_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET tokens = excluded.tokens, updated = excluded.updated, "
+                "full_at = excluded.full_at",
+                (key, tokens, now, full_at)
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        self._writes += 1
+        if self._writes % self.PRUNE_EVERY == 0:
+            self.prune(now)
+        return allowed, retry_after
+
+    def prune(self, now: float = None) -> int:
+        """
+        Delete buckets that are full again; returns the number removed.
+        """
+        cursor = self._connection().execute(
+            "DELETE FROM rate_limit_buckets WHERE full_at <= ?", (time.time() if now is None else now,)
+        )
+        return cursor.rowcount
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                if RATE_LIMIT_BACKEND == 'sqlite':
+                    _backend = SQLiteBackend(RATE_LIMIT_SQLITE_PATH)
+                elif RATE_LIMIT_BACKEND == 'memory':
+                    _backend = MemoryBackend()
+                else:
+                    raise ValueError(f'Unknown RATE_LIMIT_BACKEND: {RATE_LIMIT_BACKEND}')
+    return _backend
+
+
+def set_backend(backend) -> None:
+    """
+    Replace the bucket store (any object implementing ``consume``).
+    """
+    global _backend
+    _backend = backend
+
+
+def rate_limit(group: str):
+    """
+    Limit a route with the token bucket configured for ``group``.
+
+    Groups keyed by user must be applied below @auth_required so the user id
+    is already on ``g``; without it the client IP is used instead.
+    """
+    config = RATE_LIMITS[group]
+
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            if not RATE_LIMIT_ENABLED:
+                return f(*args, **kwargs)
+
+            user_id = g.get('current_user_id') if config['key'] == 'user' else None
+            client = f'user:{user_id}' if user_id is not None else f'ip:{request.remote_addr}'
+            allowed, retry_after = get_backend().consume(
+                f'{group}:{client}', config['capacity'], config['refill_rate']
+            )
+            if not allowed:
+                response = jsonify({'msg': 'Too many requests, please retry later'})
+                response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+                return response, 429
+            return f(*args, **kwargs)
+        return decorated_function
+    return decorator
@@ -0,0 +1,153 @@
+"""
+唯讀副本路由
+GET 請求的查詢改走 'replica' bind；寫入、同一請求內寫入後的讀取，
+以及使用者剛寫入後的一小段時間 (stickiness) 都留在主資料庫
+"""
+
+import os
+import sqlite3
+import threading
+import time
+
+from flask import g, request, has_app_context
+
+from config.database_config import (
+    REPLICA_STICKY_SECONDS, REPLICA_STICKY_BACKEND, REPLICA_STICKY_SQLITE_PATH
+)
+from utils.cache import TTLCache
+
+REPLICA_BIND = 'replica'
+
+
+class MemoryStickyStore:
+    """
+    Per-process record of recently written users.
+    """
+
+    def __init__(self, maxsize: int = 100_000):
+        self._users = TTLCache(maxsize=maxsize, ttl=REPLICA_STICKY_SECONDS)
+
+    def mark(self, user_id: int, seconds: float) -> None:
+        self._users.set(user_id, True, ttl=seconds)
+
+    def is_sticky(self, user_id: int) -> bool:
+        return self._users.get(user_id, False)
+
+
+class SQLiteStickyStore:
+    """
+    Recently written users shared by every worker on the host through one
+    SQLite file, so a user's next request stays on the primary whichever
+    worker serves it.
+    """
+
+    # 每寫入這麼多次清除一次過期的紀錄
+    PRUNE_EVERY = 256
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._marks = 0
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        conn = self._connect()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS replica_sticky ("
+            "user_id INTEGER PRIMARY KEY, until REAL NOT NULL)"
+        )
+        conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _connection(self) -> sqlite3.Connection:
+        # 每個執行緒 (以及 fork 後的每個程序) 使用自己的連線
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or getattr(self._local, 'pid', None) != os.getpid():
+            conn = self._connect()
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def mark(self, user_id: int, seconds: float) -> None:
+        # 使用牆上時間，多個程序之間才能比較
+        now = time.time()
+        conn = self._connection()
+        conn.execute(
+            "INSERT INTO replica_sticky (user_id, until) VALUES (?, ?) "
+            "ON CONFLICT(user_id) DO UPDATE SET until = max(until, excluded.until)",
+            (user_id, now + seconds)
+        )
+        self._marks += 1
+        if self._marks % self.PRUNE_EVERY == 0:
+            conn.execute("DELETE FROM replica_sticky WHERE until < ?", (now,))
+
+    def is_sticky(self, user_id: int) -> bool:
+        row = self._connection().execute(
+            "SELECT 1 FROM replica_sticky WHERE user_id = ? AND until > ?", (user_id, time.time())
+        ).fetchone()
+        return row is not None
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_sticky_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                if REPLICA_STICKY_BACKEND == 'sqlite':
+                    _store = SQLiteStickyStore(REPLICA_STICKY_SQLITE_PATH)
+                elif REPLICA_STICKY_BACKEND == 'memory':
+                    _store = MemoryStickyStore()
+                else:
+                    raise ValueError(f'Unknown REPLICA_STICKY_BACKEND: {REPLICA_STICKY_BACKEND}')
+    return _store
+
+
+def set_sticky_store(store) -> None:
+    """
+    Replace the sticky-user store (any object implementing ``mark`` and
+    ``is_sticky``).
+    """
+    global _store
+    _store = store
+
+
+def mark_primary_sticky(user_id) -> None:
+    """
+    Keep ``user_id``'s reads on the primary for REPLICA_STICKY_SECONDS.
+    """
+    if user_id is not None and REPLICA_STICKY_SECONDS > 0:
+        get_sticky_store().mark(user_id, REPLICA_STICKY_SECONDS)
+
+
+def is_primary_sticky(user_id) -> bool:
+    return user_id is not None and REPLICA_STICKY_SECONDS > 0 and get_sticky_store().is_sticky(user_id)
+
+
+def prefer_replica(blueprint) -> None:
+    """
+    Let the GET/HEAD handlers of ``blueprint`` read from the replica.
+    """
+    @blueprint.before_request
+    def _prefer_replica():
+        if request.method in ('GET', 'HEAD'):
+            g.prefer_replica = True
+
+
+def replica_allowed() -> bool:
+    """
+    Whether the current request may read from the replica: it opted in via
+    ``prefer_replica`` and its user has not written recently.
+    """
+    if not has_app_context() or not g.get('prefer_replica'):
+        return False
+    # 同一請求內只查詢一次共用的 stickiness 紀錄
+    if 'primary_sticky' not in g:
+        g.primary_sticky = is_primary_sticky(g.get('current_user_id'))
+    return not g.primary_sticky
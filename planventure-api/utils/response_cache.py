@@ -0,0 +1,440 @@
+"""
+行程讀取的回應快取
+快取序列化後的回應位元組，鍵為 (user_id, route, 查詢參數)；
+寫入行程的程式在提交後呼叫 invalidate_trips 精確清除該使用者受影響的項目
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import wraps
+from typing import Iterable, Optional, Tuple
+from urllib.parse import urlencode
+
+from flask import current_app, g, request
+
+from config.cache_config import (
+    RESPONSE_CACHE_CONFIG, RESPONSE_CACHE_BACKEND, RESPONSE_CACHE_SQLITE_PATH
+)
+from models import db
+from utils import metrics
+from utils.etag_utils import is_not_modified, not_modified_response
+
+RESPONSE_CACHE_ENABLED = RESPONSE_CACHE_CONFIG['maxsize'] > 0
+
+# 快取的路由名稱；單一行程的名稱以 view 參數格式化
+TRIPS_ROUTE = 'trips'
+TRIP_ROUTE = 'trip/{trip_id}'
+
+# 估算每個項目除了內容以外佔用的記憶體 (鍵、tuple、索引)
+_ENTRY_OVERHEAD = 256
+
+CacheKey = Tuple[int, str, str]
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    """
+    Serialized body of a cached 200 response plus what is needed to replay it.
+    """
+    body: bytes
+    etag: str
+    mimetype: str
+
+    @property
+    def size(self) -> int:
+        return len(self.body) + len(self.etag) + _ENTRY_OVERHEAD
+
+
+class MemoryBackend:
+    """
+    Per-process LRU cache bounded by entry count and total bytes.
+
+    Entries are indexed by user and route so invalidation only touches the
+    affected keys. Each user also has a generation counter, bumped on every
+    invalidation: a response rendered before a write (generation read before
+    the query) is not stored after that write's invalidation.
+
+    Counters only exist while the user has cached entries. Users without one
+    read the shared floor, which is raised to every counter that is dropped,
+    so a dropped counter never goes backwards.
+    """
+
+    def __init__(self, maxsize: int, max_bytes: int, ttl: float):
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._data = OrderedDict()  # key -> (expires_at, entry)
+        self._routes = {}           # user_id -> {route: set(params)}
+        self._generations = {}      # user_id -> int (只保留仍有項目的使用者)
+        self._generation_floor = 0  # 沒有計數器的使用者的世代
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def generation(self, user_id: int) -> int:
+        with self._lock:
+            return self._generations.get(user_id, self._generation_floor)
+
+    def get(self, key: CacheKey) -> Optional[CachedResponse]:
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, entry = item
+            if expires_at <= now:
+                self._remove(key)
+                return None
+            self._data.move_to_end(key)
+            return entry
+
+    def set(self, key: CacheKey, entry: CachedResponse, generation: int) -> bool:
+        if entry.size > self.max_bytes:
+            return False
+        user_id, route, params = key
+        with self._lock:
+            if self._generations.get(user_id, self._generation_floor) != generation:
+                return False
+            if key in self._data:
+                self._remove(key)
+            self._data[key] = (time.monotonic() + self.ttl, entry)
+            self._routes.setdefault(user_id, {}).setdefault(route, set()).add(params)
+            self._generations.setdefault(user_id, generation)
+            self._bytes += entry.size
+            while len(self._data) > self.maxsize or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._data)))
+                self.evictions += 1
+        return True
+
+    def invalidate(self, user_id: int, routes: Optional[Iterable[str]] = None) -> int:
+        with self._lock:
+            self._generations[user_id] = self._generations.get(user_id, self._generation_floor) + 1
+            user_routes = self._routes.get(user_id, {})
+            routes = list(user_routes) if routes is None else routes
+            keys = [(user_id, route, params) for route in routes for params in user_routes.get(route, ())]
+            for key in keys:
+                self._remove(key)
+            if user_id not in self._routes:
+                self._drop_generation(user_id)
+        return len(keys)
+
+    def _drop_generation(self, user_id: int) -> None:
+        # 呼叫端需持有 self._lock；提高 floor，讓丟棄前讀到舊世代的回應仍無法寫入
+        generation = self._generations.pop(user_id, None)
+        if generation is not None and generation > self._generation_floor:
+            self._generation_floor = generation
+
+    def _remove(self, key: CacheKey) -> None:
+        # 呼叫端需持有 self._lock
+        _, entry = self._data.pop(key)
+        self._bytes -= entry.size
+        user_id, route, params = key
+        user_routes = self._routes[user_id]
+        user_routes[route].discard(params)
+        if not user_routes[route]:
+            del user_routes[route]
+            if not user_routes:
+                # 使用者已沒有任何項目，一併丟棄世代計數器，避免寫入過的使用者無限累積
+                del self._routes[user_id]
+                self._drop_generation(user_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._routes.clear()
+            for user_id in list(self._generations):
+                self._drop_generation(user_id)
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'evictions': self.evictions,
+                'generations': len(self._generations),
+            }
+
+
+class SQLiteBackend:
+    """
+    Cache shared by every worker on the host through one SQLite file, so a
+    write in one worker invalidates the entries the others would serve.
+
+    Stand-in for a networked store such as Redis: any object with the same
+    ``generation`` / ``get`` / ``set`` / ``invalidate`` / ``stats`` methods
+    can be plugged in via ``set_backend``.
+
+    Like the memory backend, generation rows of users without cached
+    entries are dropped (during the periodic prune) and fold into a shared
+    floor.
+    """
+
+    # 每寫入這麼多筆才清除過期項目並檢查容量，避免每次寫入都掃描整個資料表
+    PRUNE_EVERY = 64
+
+    def __init__(self, path: str, maxsize: int, max_bytes: int, ttl: float):
+        self.path = path
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._local = threading.local()
+        self._writes = 0
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        conn = self._connect()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS response_cache ("
+            "user_id INTEGER NOT NULL, route TEXT NOT NULL, params TEXT NOT NULL, "
+            "body BLOB NOT NULL, etag TEXT NOT NULL, mimetype TEXT NOT NULL, "
+            "size INTEGER NOT NULL, expires_at REAL NOT NULL, "
+            "PRIMARY KEY (user_id, route, params))"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS response_cache_generations ("
+            "user_id INTEGER PRIMARY KEY, generation INTEGER NOT NULL)"
+        )
+        # 沒有世代紀錄的使用者所使用的世代 (單一資料列)
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS response_cache_generation_floor ("
+            "id INTEGER PRIMARY KEY CHECK (id = 0), generation INTEGER NOT NULL)"
+        )
+        conn.execute("INSERT OR IGNORE INTO response_cache_generation_floor (id, generation) VALUES (0, 0)")
+        conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _connection(self) -> sqlite3.Connection:
+        # 每個執行緒 (以及 fork 後的每個程序) 使用自己的連線
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or getattr(self._local, 'pid', None) != os.getpid():
+            conn = self._connect()
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    @staticmethod
+    def _generation(conn, user_id: int) -> int:
+        row = conn.execute(
+            "SELECT COALESCE("
+            "(SELECT generation FROM response_cache_generations WHERE user_id = ?), "
+            "(SELECT generation FROM response_cache_generation_floor WHERE id = 0))",
+            (user_id,)
+        ).fetchone()
+        return row[0]
+
+    def generation(self, user_id: int) -> int:
+        return self._generation(self._connection(), user_id)
+
+    def get(self, key: CacheKey) -> Optional[CachedResponse]:
+        # 使用牆上時間，多個程序之間才能比較
+        row = self._connection().execute(
+            "SELECT body, etag, mimetype FROM response_cache "
+            "WHERE user_id = ? AND route = ? AND params = ? AND expires_at > ?",
+            (*key, time.time())
+        ).fetchone()
+        return CachedResponse(*row) if row else None
+
+    def set(self, key: CacheKey, entry: CachedResponse, generation: int) -> bool:
+        if entry.size > self.max_bytes:
+            return False
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if self._generation(conn, key[0]) != generation:
+                conn.execute("ROLLBACK")
+                return False
+            conn.execute(
+                "INSERT OR REPLACE INTO response_cache "
+                "(user_id, route, params, body, etag, mimetype, size, expires_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (*key, entry.body, entry.etag, entry.mimetype, entry.size, time.time() + self.ttl)
+            )
+            self._writes += 1
+            if self._writes % self.PRUNE_EVERY == 0:
+                self._prune(conn)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return True
+
+    def _prune(self, conn) -> None:
+        conn.execute("DELETE FROM response_cache WHERE expires_at <= ?", (time.time(),))
+        # 超出容量時保留最新寫入的項目
+        conn.execute(
+            "DELETE FROM response_cache WHERE rowid IN ("
+            "SELECT rowid FROM (SELECT rowid, "
+            "ROW_NUMBER() OVER (ORDER BY expires_at DESC) AS n, "
+            "SUM(size) OVER (ORDER BY expires_at DESC) AS total "
+            "FROM response_cache) WHERE n > ? OR total > ?)",
+            (self.maxsize, self.max_bytes)
+        )
+        self._prune_generations(conn)
+
+    @staticmethod
+    def _prune_generations(conn) -> None:
+        # 丟棄已沒有快取項目的使用者的世代，floor 提高到其中最大的世代
+        conn.execute(
+            "UPDATE response_cache_generation_floor SET generation = max(generation, ("
+            "SELECT COALESCE(MAX(generation), 0) FROM response_cache_generations "
+            "WHERE user_id NOT IN (SELECT user_id FROM response_cache))) WHERE id = 0"
+        )
+        conn.execute(
+            "DELETE FROM response_cache_generations "
+            "WHERE user_id NOT IN (SELECT user_id FROM response_cache)"
+        )
+
+    def invalidate(self, user_id: int, routes: Optional[Iterable[str]] = None) -> int:
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT INTO response_cache_generations (user_id, generation) "
+                "SELECT ?, generation + 1 FROM response_cache_generation_floor WHERE id = 0 "
+                "ON CONFLICT(user_id) DO UPDATE SET generation = generation + 1",
+                (user_id,)
+            )
+            if routes is None:
+                cursor = conn.execute("DELETE FROM response_cache WHERE user_id = ?", (user_id,))
+            else:
+                routes = list(routes)
+                placeholders = ', '.join('?' * len(routes))
+                cursor = conn.execute(
+                    f"DELETE FROM response_cache WHERE user_id = ? AND route IN ({placeholders})",
+                    (user_id, *routes)
+                )
+            # 只寫入不讀取的使用者也會新增世代紀錄，同樣定期清除
+            self._writes += 1
+            if self._writes % self.PRUNE_EVERY == 0:
+                self._prune_generations(conn)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return cursor.rowcount
+
+    def clear(self) -> None:
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM response_cache")
+            self._prune_generations(conn)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def stats(self) -> dict:
+        conn = self._connection()
+        size, total = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM response_cache"
+        ).fetchone()
+        generations = conn.execute("SELECT COUNT(*) FROM response_cache_generations").fetchone()[0]
+        return {'size': size, 'maxsize': self.maxsize, 'bytes': total, 'max_bytes': self.max_bytes,
+                'generations': generations}
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                if RESPONSE_CACHE_BACKEND == 'sqlite':
+                    _backend = SQLiteBackend(RESPONSE_CACHE_SQLITE_PATH, **RESPONSE_CACHE_CONFIG)
+                elif RESPONSE_CACHE_BACKEND == 'memory':
+                    _backend = MemoryBackend(**RESPONSE_CACHE_CONFIG)
+                else:
+                    raise ValueError(f'Unknown RESPONSE_CACHE_BACKEND: {RESPONSE_CACHE_BACKEND}')
+    return _backend
+
+
+def set_backend(backend) -> None:
+    """
+    Replace the cache store (see SQLiteBackend for the expected methods).
+    """
+    global _backend
+    _backend = backend
+
+
+def _request_params() -> str:
+    # 查詢參數排序後作為鍵的一部分，順序不同的相同請求共用項目
+    return urlencode(sorted(request.args.items(multi=True)))
+
+
+def _cacheable(response) -> bool:
+    etag, weak = response.get_etag()
+    return (response.status_code == 200 and etag is not None and not weak
+            and not response.is_streamed and not response.direct_passthrough
+            # 唯讀副本可能落後主資料庫，其結果不寫入快取
+            and not db.session.info.get('read_replica'))
+
+
+def cache_response(route: str):
+    """
+    Cache a read route's 200 responses per user.
+
+    ``route`` names the cached resource and is formatted with the view
+    arguments (e.g. TRIP_ROUTE); writers invalidate by the same names. Apply
+    below @auth_required so the user id is on ``g``. The view must set a
+    strong ETag, which is replayed on hits (including 304s).
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            user_id = g.get('current_user_id')
+            if not RESPONSE_CACHE_ENABLED or user_id is None:
+                return f(*args, **kwargs)
+
+            backend = get_backend()
+            key = (user_id, route.format(**kwargs), _request_params())
+            entry = backend.get(key)
+            if entry is not None:
+                metrics.increment('response_cache_hits')
+                if is_not_modified(entry.etag):
+                    return not_modified_response(entry.etag)
+                response = current_app.response_class(entry.body, mimetype=entry.mimetype)
+                response.set_etag(entry.etag)
+                return response
+
+            metrics.increment('response_cache_misses')
+            # 在查詢前取得世代，查詢期間若有寫入則不儲存這次的結果
+            generation = backend.generation(user_id)
+            response = current_app.make_response(f(*args, **kwargs))
+            if _cacheable(response):
+                entry = CachedResponse(response.get_data(), response.get_etag()[0], response.mimetype)
+                if backend.set(key, entry, generation):
+                    metrics.increment('response_cache_stores')
+            return response
+        return decorated_function
+    return decorator
+
+
+def invalidate_trips(user_id: int, *trip_ids: int) -> None:
+    """
+    Drop the user's cached trip listings and the given trips.
+
+    Call after the write is committed.
+    """
+    if not RESPONSE_CACHE_ENABLED:
+        return
+    routes = [TRIPS_ROUTE, *(TRIP_ROUTE.format(trip_id=trip_id) for trip_id in trip_ids)]
+    removed = get_backend().invalidate(user_id, routes)
+    metrics.increment('response_cache_invalidations', removed)
+
+
+if RESPONSE_CACHE_ENABLED:
+    metrics.register_source('response_cache', lambda: get_backend().stats())
@@ -0,0 +1,26 @@
+"""
+Trip 與 User 的共用序列化
+日期保留為 date/datetime 物件，由 app 的 JSON provider 統一輸出為 ISO 8601
+"""
+
+from typing import Iterable
+
+# 行程可回傳的欄位，以及列表頁使用的摘要欄位 (不含大型 JSON 欄位)
+TRIP_FIELDS = ('id', 'destination', 'start_date', 'end_date', 'coordinates', 'itinerary')
+SUMMARY_FIELDS = ('id', 'destination', 'start_date', 'end_date')
+
+USER_FIELDS = ('id', 'email')
+
+
+def serialize_trip(trip, fields: Iterable[str] = TRIP_FIELDS) -> dict:
+    """
+    Build the API representation of a trip, limited to ``fields``.
+    """
+    return {field: getattr(trip, field) for field in fields}
+
+
+def serialize_user(user) -> dict:
+    """
+    Build the API representation of a user (a User row or a CachedUser).
+    """
+    return {field: getattr(user, field) for field in USER_FIELDS}
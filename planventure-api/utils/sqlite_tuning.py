@@ -0,0 +1,78 @@
+"""
+SQLite 連線調校
+透過引擎的 connect 事件，在每個新連線上套用 config/database_config.py 的 PRAGMA
+"""
+
+import os
+import re
+from typing import Dict
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from config.database_config import SQLITE_PRAGMAS
+
+# 只接受已知的 PRAGMA 與簡單的值，設定值會直接組進 SQL
+ALLOWED_PRAGMAS = {'journal_mode', 'synchronous', 'busy_timeout', 'mmap_size', 'cache_size', 'temp_store'}
+_VALUE_PATTERN = re.compile(r'^-?[A-Za-z0-9_]+$')
+
+
+def validate_pragmas(pragmas: Dict[str, str]) -> Dict[str, str]:
+    """
+    Raise ValueError for unknown pragma names or values that are not a
+    bare keyword or integer.
+    """
+    for name, value in pragmas.items():
+        if name not in ALLOWED_PRAGMAS:
+            raise ValueError(f'Unsupported SQLite pragma: {name}')
+        if not _VALUE_PATTERN.match(str(value)):
+            raise ValueError(f'Invalid value for SQLite pragma {name}: {value!r}')
+    return pragmas
+
+
+def set_sqlite_pragmas(dbapi_connection, pragmas: Dict[str, str]) -> None:
+    """
+    Execute the pragmas on a raw DB-API connection.
+    """
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name}={value}')
+    finally:
+        cursor.close()
+
+
+def ensure_database_dir(engine: Engine) -> None:
+    """
+    Create the directory of a file-based SQLite database if it is missing
+    (SQLite creates the file, but not its directory).
+    """
+    database = engine.url.database
+    if engine.dialect.name != 'sqlite' or not database or database == ':memory:' or database.startswith('file:'):
+        return
+    os.makedirs(os.path.dirname(os.path.abspath(database)), exist_ok=True)
+
+
+def install_sqlite_pragmas(engine: Engine, pragmas: Dict[str, str] = SQLITE_PRAGMAS) -> Dict[str, object]:
+    """
+    Apply ``pragmas`` to every new connection of ``engine`` and return the
+    values SQLite reports back for them.
+
+    Does nothing (and returns {}) for non-SQLite engines. Connections that
+    were pooled before the call are discarded so that none lack the pragmas.
+    The database directory is created first, since reading the pragmas back
+    opens a connection.
+    """
+    if engine.dialect.name != 'sqlite' or not pragmas:
+        return {}
+    ensure_database_dir(engine)
+    pragmas = validate_pragmas(dict(pragmas))
+
+    @event.listens_for(engine, 'connect')
+    def _on_connect(dbapi_connection, connection_record):
+        set_sqlite_pragmas(dbapi_connection, pragmas)
+
+    engine.dispose()
+    # 讀回實際生效的值 (例如記憶體資料庫的 journal_mode 會是 memory)
+    with engine.connect() as conn:
+        return {name: conn.exec_driver_sql(f'PRAGMA {name}').scalar() for name in pragmas}
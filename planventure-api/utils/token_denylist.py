@@ -0,0 +1,169 @@
+"""
+JWT 撤銷清單 (登出與登出所有裝置)
+撤銷紀錄保存在 revoked_tokens 資料表，並由背景執行緒載入記憶體，
+auth_required 的檢查只做字典查詢，不會存取資料庫
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Optional
+
+from sqlalchemy import select, delete
+
+from models import db, RevokedToken
+from utils.jwt_utils import ACCESS_TOKEN_EXPIRE_MINUTES
+
+# 背景執行緒讀取新撤銷紀錄的間隔 (秒)，也是其他 worker 看到撤銷的最長延遲
+DENYLIST_REFRESH_SECONDS = float(os.getenv('DENYLIST_REFRESH_SECONDS', '5'))
+# 完整重新載入並清除過期紀錄的間隔 (秒)
+DENYLIST_PRUNE_SECONDS = float(os.getenv('DENYLIST_PRUNE_SECONDS', '300'))
+
+logger = logging.getLogger(__name__)
+
+# jti -> 到期時間；user_id -> (issued_before, 到期時間)
+# 讀取不加鎖 (單一 dict 查詢在 CPython 中是原子操作)，寫入與替換時持有 _lock
+_revoked_jtis = {}
+_user_cutoffs = {}
+_cursor = 0
+_lock = threading.Lock()
+
+_app = None
+_thread = None
+
+
+def is_revoked(payload: dict) -> bool:
+    """
+    Check a verified token payload against the in-memory denylist.
+
+    Tokens without an ``iat`` claim are treated as issued at time zero, so
+    they are covered by any logout-all cutoff.
+    """
+    jti = payload.get('jti')
+    if jti is not None and jti in _revoked_jtis:
+        return True
+    cutoff = _user_cutoffs.get(payload.get('user_id'))
+    return cutoff is not None and payload.get('iat', 0) <= cutoff[0]
+
+
+def _remember_jti(jti: str, expires_at: float) -> None:
+    _revoked_jtis[jti] = expires_at
+
+
+def _remember_cutoff(user_id: int, issued_before: float, expires_at: float) -> None:
+    current = _user_cutoffs.get(user_id)
+    if current is None or current[0] < issued_before:
+        _user_cutoffs[user_id] = (issued_before, expires_at)
+
+
+def revoke_token(payload: dict) -> None:
+    """
+    Revoke a single token by its ``jti`` until the token's own expiry.
+
+    The row is added to the current session and committed; this worker
+    stops accepting the token immediately, other workers within
+    DENYLIST_REFRESH_SECONDS.
+    """
+    expires_at = float(payload['exp'])
+    db.session.add(RevokedToken(jti=payload['jti'], user_id=payload.get('user_id'),
+                                expires_at=expires_at))
+    db.session.commit()
+    with _lock:
+        _remember_jti(payload['jti'], expires_at)
+
+
+def revoke_all(user_id: int, now: Optional[float] = None) -> None:
+    """
+    Revoke every token of ``user_id`` issued up to now.
+
+    The entry only has to outlive the longest-lived token issued before it.
+    """
+    issued_before = time.time() if now is None else now
+    expires_at = issued_before + ACCESS_TOKEN_EXPIRE_MINUTES * 60
+    db.session.add(RevokedToken(user_id=user_id, issued_before=issued_before,
+                                expires_at=expires_at))
+    db.session.commit()
+    with _lock:
+        _remember_cutoff(user_id, issued_before, expires_at)
+
+
+def refresh(full: bool = False) -> None:
+    """
+    Load denylist rows into memory (needs an app context).
+
+    By default only rows newer than the last one seen are read. A full
+    refresh deletes expired rows, rebuilds both maps from what is left and
+    swaps them in, which also drops expired entries from memory.
+    """
+    global _revoked_jtis, _user_cutoffs, _cursor
+    now = time.time()
+
+    if full:
+        db.session.execute(delete(RevokedToken).where(RevokedToken.expires_at < now))
+        db.session.commit()
+        query = select(RevokedToken.id, RevokedToken.jti, RevokedToken.user_id,
+                       RevokedToken.issued_before, RevokedToken.expires_at)
+    else:
+        query = select(RevokedToken.id, RevokedToken.jti, RevokedToken.user_id,
+                       RevokedToken.issued_before, RevokedToken.expires_at
+                       ).where(RevokedToken.id > _cursor)
+    rows = db.session.execute(query.order_by(RevokedToken.id)).all()
+
+    with _lock:
+        if full:
+            # 先在新的 dict 建好再整個替換，保留這段期間本 worker 新增的撤銷
+            jtis = {jti: exp for jti, exp in _revoked_jtis.items() if exp >= now}
+            cutoffs = {uid: entry for uid, entry in _user_cutoffs.items() if entry[1] >= now}
+            _revoked_jtis, _user_cutoffs = jtis, cutoffs
+        for row_id, jti, user_id, issued_before, expires_at in rows:
+            if expires_at < now:
+                continue
+            if jti is not None:
+                _remember_jti(jti, expires_at)
+            elif user_id is not None and issued_before is not None:
+                _remember_cutoff(user_id, issued_before, expires_at)
+        if rows:
+            _cursor = max(_cursor, rows[-1][0])
+
+
+def _refresh_loop(app) -> None:
+    # 啟動時先完整載入一次，之後定期增量更新；完整重新載入也補上
+    # 其他資料庫 (ID 不保證依提交順序遞增) 可能漏讀的紀錄
+    last_full = None
+    while True:
+        full = last_full is None or time.monotonic() - last_full >= DENYLIST_PRUNE_SECONDS
+        try:
+            with app.app_context():
+                refresh(full=full)
+            if full:
+                last_full = time.monotonic()
+        except Exception as e:
+            # 例如資料表尚未建立 (create_tables.py 還沒執行)，下次再試
+            logger.warning('Token denylist refresh failed: %s', e)
+        time.sleep(DENYLIST_REFRESH_SECONDS)
+
+
+def start_refresher(app) -> None:
+    """
+    Start the background refresher for ``app`` (once per process).
+    """
+    global _app, _thread
+    _app = app
+    if _thread is not None and _thread.is_alive():
+        return
+    _thread = threading.Thread(target=_refresh_loop, args=(app,),
+                               name='token-denylist', daemon=True)
+    _thread.start()
+
+
+def _reset_after_fork() -> None:
+    # fork 後只有呼叫 fork 的執行緒存在：重建鎖並在子程序中重新啟動背景執行緒
+    global _lock, _thread
+    _lock = threading.Lock()
+    _thread = None
+    if _app is not None:
+        start_refresher(_app)
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
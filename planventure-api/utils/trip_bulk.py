@@ -0,0 +1,125 @@
+"""
+行程批次寫入與 NDJSON 匯入
+批次端點、匯入端點與 import_trips.py 共用
+"""
+
+import json
+import os
+from datetime import datetime
+from typing import Callable, Iterable, List, Optional
+
+from sqlalchemy import insert
+
+from models import db, Trip, ItineraryItem
+from models.trip_search import reindex_trips
+from models.trip_stats import apply_trip_deltas
+from utils.response_cache import invalidate_trips
+from utils.trip_validation import validate_trip_data, TripValidationError
+
+IMPORT_CHUNK_SIZE = int(os.getenv('TRIPS_IMPORT_CHUNK_SIZE', '500'))
+
+# 匯入報告最多保留的逐行錯誤數量，避免大量錯誤佔用記憶體
+MAX_REPORTED_ERRORS = 100
+
+
+def bulk_insert_trips(user_id: int, trips: List[dict]) -> List[int]:
+    """
+    Insert validated trips (see ``validate_trip_data``) with executemany-style
+    INSERTs and return their new ids in input order.
+
+    Runs inside the current session transaction; the caller commits.
+    """
+    if not trips:
+        return []
+
+    now = datetime.utcnow()
+    trip_rows = [
+        {
+            'user_id': user_id,
+            'updated_at': now,
+            **{key: value for key, value in fields.items() if key != 'itinerary_rows'},
+        }
+        for fields in trips
+    ]
+    # RETURNING 依參數順序取回 ID，才能對應到各自的行程規劃
+    new_ids = db.session.execute(
+        insert(Trip).returning(Trip.id, sort_by_parameter_order=True), trip_rows
+    ).scalars().all()
+
+    item_rows = [
+        {'trip_id': trip_id, **row}
+        for fields, trip_id in zip(trips, new_ids)
+        for row in fields.get('itinerary_rows') or []
+    ]
+    if item_rows:
+        db.session.execute(insert(ItineraryItem), item_rows)
+    # Core INSERT 不經過 ORM flush，全文檢索索引與統計需自行更新
+    connection = db.session.connection()
+    reindex_trips(connection, new_ids)
+    apply_trip_deltas(connection, added=[
+        (user_id, fields['destination'], fields['start_date'], fields['end_date']) for fields in trips
+    ])
+    return new_ids
+
+
+def import_trips_ndjson(lines: Iterable, user_id: int,
+                        chunk_size: int = IMPORT_CHUNK_SIZE,
+                        on_progress: Optional[Callable[[dict], None]] = None) -> dict:
+    """
+    Import newline-delimited JSON trips for ``user_id``.
+
+    ``lines`` may be any iterable of str/bytes lines (a file, a request
+    stream), so memory use is bounded by ``chunk_size`` rather than input
+    size. Each line is validated with the same rules as create_trip; invalid
+    lines are reported and skipped. Valid trips are inserted and committed
+    one chunk at a time, and ``on_progress`` receives the running report
+    after every chunk.
+    """
+    report = {'processed': 0, 'imported': 0, 'failed': 0, 'errors': [], 'errors_truncated': False}
+
+    def add_error(line_number, message):
+        report['failed'] += 1
+        if len(report['errors']) < MAX_REPORTED_ERRORS:
+            report['errors'].append({'line': line_number, 'msg': message})
+        else:
+            report['errors_truncated'] = True
+
+    def flush(chunk):
+        if not chunk:
+            return
+        try:
+            bulk_insert_trips(user_id, [fields for _, fields in chunk])
+            db.session.commit()
+            invalidate_trips(user_id)
+            report['imported'] += len(chunk)
+        except Exception as e:
+            db.session.rollback()
+            for line_number, _ in chunk:
+                add_error(line_number, f'Error inserting trip: {str(e)}')
+        if on_progress:
+            on_progress(report)
+
+    chunk = []
+    for line_number, line in enumerate(lines, start=1):
+        if isinstance(line, bytes):
+            line = line.decode('utf-8', errors='replace')
+        line = line.strip()
+        if not line:
+            continue
+
+        report['processed'] += 1
+        try:
+            chunk.append((line_number, validate_trip_data(json.loads(line))))
+        except json.JSONDecodeError as e:
+            add_error(line_number, f'Invalid JSON: {e.msg}')
+            continue
+        except TripValidationError as e:
+            add_error(line_number, str(e))
+            continue
+
+        if len(chunk) >= chunk_size:
+            flush(chunk)
+            chunk = []
+
+    flush(chunk)
+    return report
@@ -0,0 +1,47 @@
+"""
+附近行程搜尋
+以 geohash 前綴與外接矩形在索引上篩選候選行程，再以 haversine 距離精確過濾
+"""
+
+from typing import List, Tuple
+
+from sqlalchemy import and_, or_, select, union_all
+
+from models import db, Trip
+from utils.geo import bounding_boxes, covering_prefixes, haversine_km
+
+
+def nearby_trip_distances(user_id: int, lat: float, lng: float,
+                          radius_km: float, limit: int) -> List[Tuple[int, float]]:
+    """
+    Return up to ``limit`` (trip_id, distance_km) pairs for the user's trips
+    within ``radius_km`` of (lat, lng), nearest first.
+
+    Only the id and coordinate columns of the candidates are read; each
+    geohash prefix covering the search area is one range scan on the
+    (user_id, geohash) index.
+    """
+    boxes = bounding_boxes(lat, lng, radius_km)
+    in_boxes = or_(*[
+        and_(Trip.latitude.between(min_lat, max_lat), Trip.longitude.between(min_lng, max_lng))
+        for min_lat, min_lng, max_lat, max_lng in boxes
+    ])
+    candidates = select(Trip.id, Trip.latitude, Trip.longitude).where(Trip.user_id == user_id, in_boxes)
+
+    prefixes = covering_prefixes(boxes)
+    if prefixes is None:
+        statement = candidates.where(Trip.geohash.isnot(None))
+    else:
+        # 格子互不重疊，以 UNION ALL 合併 (寫成 OR 時查詢規劃器可能改用其他索引)
+        statement = union_all(*[
+            candidates.where(Trip.geohash >= prefix, Trip.geohash < prefix + '~')
+            for prefix in prefixes
+        ])
+
+    distances = []
+    for trip_id, trip_lat, trip_lng in db.session.execute(statement):
+        distance = haversine_km(lat, lng, trip_lat, trip_lng)
+        if distance <= radius_km:
+            distances.append((trip_id, distance))
+    distances.sort(key=lambda pair: (pair[1], pair[0]))
+    return distances[:limit]
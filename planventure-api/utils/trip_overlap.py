@@ -0,0 +1,70 @@
+"""
+行程日期範圍查詢與重疊檢查
+以 (user_id, start_date, id, end_date) 索引回答「某段期間內的行程」與「新行程是否與既有行程重疊」
+"""
+
+import os
+from datetime import date
+from typing import List, Optional
+
+from sqlalchemy import select
+
+from models import db, Trip
+from utils.serializers import SUMMARY_FIELDS, serialize_trip
+
+# 建立/更新行程與既有行程重疊時的處理方式:
+#   warn   - 照常寫入，回應附上重疊的行程
+#   reject - 回傳 409，不寫入
+#   ignore - 不檢查
+OVERLAP_POLICIES = ('warn', 'reject', 'ignore')
+OVERLAP_POLICY = os.getenv('TRIPS_OVERLAP_POLICY', 'warn')
+
+# 回應中最多列出的重疊行程數量
+OVERLAP_REPORT_LIMIT = 10
+
+
+def parse_overlap_policy(value: Optional[str]) -> str:
+    """
+    Parse the ``on_overlap`` query parameter, defaulting to OVERLAP_POLICY.
+
+    Raises ValueError for an unknown policy.
+    """
+    policy = value or OVERLAP_POLICY
+    if policy not in OVERLAP_POLICIES:
+        raise ValueError(f"on_overlap must be one of: {', '.join(OVERLAP_POLICIES)}")
+    return policy
+
+
+def date_range_filter(date_from: Optional[date], date_to: Optional[date]) -> list:
+    """
+    Filter clauses for trips that touch [date_from, date_to] (inclusive);
+    either bound may be omitted.
+    """
+    clauses = []
+    if date_to is not None:
+        clauses.append(Trip.start_date <= date_to)
+    if date_from is not None:
+        clauses.append(Trip.end_date >= date_from)
+    return clauses
+
+
+def find_overlapping_trips(user_id: int, start_date: date, end_date: date,
+                           exclude_id: Optional[int] = None,
+                           limit: int = OVERLAP_REPORT_LIMIT) -> List[dict]:
+    """
+    Summaries of the user's trips that overlap [start_date, end_date].
+
+    A trip ending on the day another starts does not count as overlapping.
+    Runs as one range scan on the (user_id, start_date, id, end_date) index;
+    end_date is checked from the index, so only matching rows are read from
+    the table.
+    """
+    statement = (
+        select(Trip.id, Trip.destination, Trip.start_date, Trip.end_date)
+        .where(Trip.user_id == user_id, Trip.start_date < end_date, Trip.end_date > start_date)
+        .order_by(Trip.start_date, Trip.id)
+        .limit(limit)
+    )
+    if exclude_id is not None:
+        statement = statement.where(Trip.id != exclude_id)
+    return [serialize_trip(row, SUMMARY_FIELDS) for row in db.session.execute(statement)]
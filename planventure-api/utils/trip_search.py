@@ -0,0 +1,87 @@
+"""
+行程全文檢索查詢
+把使用者輸入轉成安全的 FTS5 MATCH 運算式，依 bm25 排序並產生摘要片段
+索引的維護見 models/trip_search.py
+"""
+
+import html
+import re
+from typing import List, Optional, Tuple
+
+from sqlalchemy import text
+
+from models import db
+from models.trip_search import SEARCH_TABLE, TOKEN_SEPARATOR, owner_token, segment_text
+
+# 查詢字串長度與詞數上限，避免過長的 MATCH 運算式
+MAX_QUERY_LENGTH = 200
+MAX_QUERY_TERMS = 16
+
+# bm25 欄位權重 (owner, destination, plans)：目的地命中比行程規劃內文重要
+RANK_WEIGHTS = (0.0, 10.0, 1.0)
+
+# 摘要片段的最多詞數
+SNIPPET_TOKENS = 12
+
+# snippet() 先以控制字元標記命中詞，HTML 跳脫後再換成 <mark>
+_MARK_START, _MARK_END = '\x02', '\x03'
+
+_TERM = re.compile(r'\w+')
+
+
+def build_match_query(q: str, user_id: int) -> Optional[str]:
+    """
+    Turn free text into an FTS5 MATCH expression limited to the user's trips
+    and to the destination and plans columns.
+
+    Every word must match (implicit AND); FTS5 operators and quotes in the
+    input are treated as plain text. The last word also matches as a prefix
+    so partially typed queries find results. Returns None when the input
+    has no searchable words.
+    """
+    words = _TERM.findall(q[:MAX_QUERY_LENGTH])[:MAX_QUERY_TERMS]
+    if not words:
+        return None
+    # \w 不含雙引號，每個詞都能安全地包成 FTS5 字串；中日韓文字拆成逐字片語
+    phrases = [
+        '"' + ' '.join(filter(None, segment_text(word).split(TOKEN_SEPARATOR))) + '"'
+        for word in words
+    ]
+    phrases[-1] += ' *'
+    # 使用者的詞只比對文字欄位，owner 欄位只用於限定使用者 (否則 q=u1 會符合該使用者的所有行程)
+    return f"owner:{owner_token(user_id)} AND ({{destination plans}}: ({' '.join(phrases)}))"
+
+
+def _format_snippet(snippet: str) -> str:
+    snippet = snippet.replace(TOKEN_SEPARATOR, '').strip()
+    return (html.escape(snippet, quote=False)
+            .replace(_MARK_START, '<mark>')
+            .replace(_MARK_END, '</mark>'))
+
+
+def search_trip_matches(match_query: str, limit: int, offset: int = 0) -> List[Tuple[int, float, str]]:
+    """
+    Return up to ``limit`` (trip_id, score, snippet) tuples for a query
+    built by ``build_match_query``, best match first.
+
+    ``score`` is the negated bm25 rank (higher is better); the snippet is
+    HTML-escaped with matched words wrapped in ``<mark>``.
+    """
+    weights = ', '.join(str(weight) for weight in RANK_WEIGHTS)
+    # 分別取目的地與行程規劃的片段，優先顯示行程規劃中的命中處
+    rows = db.session.execute(
+        text(
+            f"SELECT rowid, bm25({SEARCH_TABLE}, {weights}) AS rank, "
+            f"snippet({SEARCH_TABLE}, 1, :start, :end, '…', {SNIPPET_TOKENS}), "
+            f"snippet({SEARCH_TABLE}, 2, :start, :end, '…', {SNIPPET_TOKENS}) "
+            f"FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH :query "
+            "ORDER BY rank, rowid LIMIT :limit OFFSET :offset"
+        ),
+        {'query': match_query, 'start': _MARK_START, 'end': _MARK_END,
+         'limit': limit, 'offset': offset}
+    )
+    return [
+        (trip_id, round(-rank, 6),
+         _format_snippet(plans if _MARK_START in plans else destination))
+        for trip_id, rank, destination, plans in rows
+    ]
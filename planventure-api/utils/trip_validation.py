@@ -0,0 +1,87 @@
+"""
+行程資料驗證
+create_trip、update_trip 與批次端點共用同一套規則
+"""
+
+from datetime import datetime, date
+from typing import Optional
+
+from models.itinerary import itinerary_item_rows
+from utils.geo import coordinate_columns
+
+REQUIRED_FIELDS = ('destination', 'start_date', 'end_date')
+
+
+class TripValidationError(ValueError):
+    """Raised when a trip payload fails validation; the message is client-facing."""
+
+
+def parse_date(value) -> date:
+    return datetime.strptime(value, '%Y-%m-%d').date()
+
+
+def validate_trip_data(data, partial: bool = False,
+                       current_start: Optional[date] = None,
+                       current_end: Optional[date] = None) -> dict:
+    """
+    Validate a trip payload and return the normalized column values.
+
+    With ``partial=True`` (updates) only the keys present in ``data`` are
+    returned, and the date order is checked against ``current_start`` /
+    ``current_end`` for the dates that are not being changed. A supplied
+    itinerary is also returned as ``itinerary_rows`` ready for insertion,
+    and coordinates come with their latitude/longitude/geohash columns.
+
+    Raises TripValidationError with the same messages the routes return.
+    """
+    if not data or not isinstance(data, dict):
+        raise TripValidationError('No data provided')
+
+    fields = {}
+
+    if partial:
+        # 更新時只驗證有提供的欄位
+        if 'destination' in data:
+            fields['destination'] = data['destination']
+        for field in ('start_date', 'end_date'):
+            if field in data:
+                try:
+                    fields[field] = parse_date(data[field])
+                except (TypeError, ValueError):
+                    raise TripValidationError(f'Invalid {field} format. Use YYYY-MM-DD')
+    else:
+        # 驗證必填欄位
+        for field in REQUIRED_FIELDS:
+            if field not in data or not data[field]:
+                raise TripValidationError(f'Missing required field: {field}')
+        fields['destination'] = data['destination']
+
+        # 驗證日期格式
+        try:
+            fields['start_date'] = parse_date(data['start_date'])
+            fields['end_date'] = parse_date(data['end_date'])
+        except (TypeError, ValueError):
+            raise TripValidationError('Invalid date format. Use YYYY-MM-DD')
+
+    # 驗證日期邏輯
+    start_date = fields.get('start_date', current_start)
+    end_date = fields.get('end_date', current_end)
+    if start_date is not None and end_date is not None and start_date >= end_date:
+        raise TripValidationError('End date must be after start date')
+
+    if 'coordinates' in data or not partial:
+        coordinates = data.get('coordinates')
+        try:
+            # 同時產生經緯度與 geohash 欄位，ORM 與批次寫入都維持同步
+            fields.update(coordinate_columns(coordinates))
+        except ValueError as e:
+            raise TripValidationError(f'Invalid coordinates: {str(e)}')
+        fields['coordinates'] = coordinates
+
+    if 'itinerary' in data:
+        try:
+            fields['itinerary_rows'] = itinerary_item_rows(data['itinerary'])
+        except ValueError as e:
+            raise TripValidationError(f'Invalid itinerary: {str(e)}')
+
+    return fields
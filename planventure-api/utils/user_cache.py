@@ -0,0 +1,66 @@
+"""
+使用者查詢快取
+auth_required 透過這裡取得目前使用者，避免每個請求都查詢 users 資料表
+"""
+
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy import event
+
+from config.cache_config import USER_CACHE_CONFIG
+from models import db, User
+from utils import metrics
+from utils.cache import TTLCache
+
+
+@dataclass(frozen=True)
+class CachedUser:
+    """
+    Read-only snapshot of a user row.
+
+    Snapshots are detached from any session, so they can be shared across
+    requests and threads safely.
+    """
+    id: int
+    email: str
+
+
+_user_cache = TTLCache(**USER_CACHE_CONFIG)
+metrics.register_source('user_cache', lambda: _user_cache.stats())
+
+
+def get_user(user_id: int) -> Optional[CachedUser]:
+    """
+    Return the user snapshot for ``user_id``, loading it on a cache miss.
+    """
+    user = _user_cache.get(user_id)
+    if user is not None:
+        return user
+
+    # 驗證身分一律查詢主資料庫: 副本可能尚未複製到剛註冊的使用者
+    row = db.session.get(User, user_id, bind_arguments={'bind': db.engine})
+    if row is None:
+        return None
+
+    user = CachedUser(id=row.id, email=row.email)
+    _user_cache.set(user_id, user)
+    return user
+
+
+def evict_user(user_id: int) -> None:
+    """
+    Drop a user from the cache.
+    """
+    _user_cache.pop(user_id)
+
+
+def cache_stats() -> dict:
+    return _user_cache.stats()
+
+
+# 使用者資料變更或刪除時，立即清除對應的快取
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def _evict_on_change(mapper, connection, target):
+    evict_user(target.id)
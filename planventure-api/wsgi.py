@@ -0,0 +1,22 @@
+"""
+生產環境 WSGI 進入點
+    gunicorn wsgi:app    (配置見 gunicorn.conf.py)
+
+開發時使用 `python app.py` (debug 模式與自動重新載入)
+"""
+
+from dotenv import load_dotenv
+
+# 與 flask run 相同，從 .env 載入環境變數 (已設定的環境變數優先)
+load_dotenv()
+
+import os
+
+from app import create_app
+
+# DEFER_BACKGROUND_TASKS 由 gunicorn.conf.py 設定 (preload 時背景執行緒在 post_fork 才啟動)
+app = create_app({
+    'DEFER_BACKGROUND_TASKS': os.getenv('DEFER_BACKGROUND_TASKS', 'false').lower() == 'true'
+})
+# 生產環境一律關閉 debug (不顯示互動式除錯器與錯誤細節)
+app.debug = False